@@ -6,25 +6,58 @@ Version: 2.0.0 - Bug fixes and improvements
 
 import sys
 import os
+import abc
+import asyncio
 import wave
 import tempfile
 import threading
 import atexit
+import contextlib
+import difflib
+import importlib.metadata
+import importlib.util
+import inspect
 import logging
 import json
-from datetime import datetime
+import hashlib
+import re
+import argparse
+import multiprocessing
+import time
+import queue
+import shutil
+import sqlite3
+import struct
+from array import array
+from bisect import bisect_right
+from functools import partial
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from math import gcd
+from datetime import datetime, timedelta
+from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
 
 import pyaudio
 import numpy as np
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QPushButton, QTextEdit, QLabel, QComboBox,
-                             QProgressBar, QMessageBox, QFileDialog, QHBoxLayout)
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from PyQt5.QtGui import QFont
+                             QProgressBar, QMessageBox, QFileDialog, QHBoxLayout,
+                             QCheckBox, QPlainTextEdit, QListView, QStackedWidget, QListWidget,
+                             QListWidgetItem)
+from PyQt5.QtCore import QThread, QObject, QTimer, QAbstractListModel, QModelIndex, pyqtSignal, Qt
+from PyQt5.QtGui import QFont, QTextCursor
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import resample_poly, firwin
 import whisper
 from gpt4all import GPT4All
 
+try:
+    import soundfile  # opzionale: registrazione compressa FLAC/Opus e decodifica senza ffmpeg
+except ImportError:
+    soundfile = None
+
 
 # Path per cache modelli e logs
 MODEL_CACHE_DIR = Path.home() / ".recorder_models"
@@ -33,6 +66,14 @@ MODEL_CACHE_DIR.mkdir(exist_ok=True)
 LOG_DIR = Path.home() / ".recorder_logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+# Cache dei risultati (trascrizioni e summary), accanto alla cache modelli
+RESULT_CACHE_DIR = MODEL_CACHE_DIR.parent / ".recorder_cache"
+
+# Coda persistente delle elaborazioni: database SQLite e registrazioni in attesa
+JOBS_DIR = MODEL_CACHE_DIR.parent / ".recorder_jobs"
+# Registrazioni a segmenti scritte dall'app, fuori dalla pulizia dei file temporanei
+RECORDINGS_DIR = JOBS_DIR / "recordings"
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +85,157 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Budget di memoria per i modelli Whisper residenti (MB, configurabile via env)
+WHISPER_CACHE_MAX_BYTES = int(os.environ.get("RECORDER_WHISPER_CACHE_MB", "2048")) * 1024 * 1024
+
+# Motore di trascrizione: "auto" usa il più veloce installato (faster-whisper, whisper.cpp, openai-whisper)
+TRANSCRIPTION_BACKEND = os.environ.get("RECORDER_BACKEND", "auto").lower()
+# Quantizzazione dei motori CTranslate2/ggml (int8, float16, float32)
+BACKEND_COMPUTE_TYPE = os.environ.get("RECORDER_COMPUTE_TYPE", "int8").lower()
+# Parametri dei modelli, per stimare la memoria dei motori non PyTorch
+WHISPER_MODEL_PARAMS = {"tiny": 39e6, "base": 74e6, "small": 244e6, "medium": 769e6}
+
+# Precarica in background il modello selezionato all'avvio (RECORDER_PRELOAD=0 per disabilitare)
+PRELOAD_WHISPER_MODEL = os.environ.get("RECORDER_PRELOAD", "1") != "0"
+
+# Dimensione massima della cache risultati (MB, 0 = disabilitata)
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RECORDER_RESULT_CACHE_MB", "512")) * 1024 * 1024
+
+# Modello GPT4All di default per le analisi
+DEFAULT_LLM_MODEL = "Mistral-7B-Instruct-v0.2.Q4_0.gguf"
+
+# Secondi di inattività dopo cui il modello GPT4All viene rilasciato (0 = mai)
+LLM_IDLE_TIMEOUT = float(os.environ.get("RECORDER_LLM_IDLE_TIMEOUT", "600"))
+
+# Secondi di attesa del lock di un host GPT4All alla chiusura prima di lasciarlo al sistema operativo
+LLM_SHUTDOWN_TIMEOUT = float(os.environ.get("RECORDER_LLM_SHUTDOWN_TIMEOUT", "5"))
+
+# Riuso dello stato KV del prefisso fisso dei prompt (RECORDER_LLM_PREFIX_CACHE=0 per disabilitare)
+LLM_PREFIX_CACHE = os.environ.get("RECORDER_LLM_PREFIX_CACHE", "1") != "0"
+# Il riuso del prefisso usa l'API interna llmodel di GPT4All, verificata solo sulle versioni 2.8.x
+# (intervallo [min, max)): con le altre versioni il prompt viene passato intero a generate()
+LLM_PREFIX_GPT4ALL_VERSIONS = ((2, 8), (2, 9))
+# Parametri di campionamento di default di GPT4All.generate() letti dalla firma della versione
+# installata, per le generazioni dopo il prefisso
+LLM_SAMPLING_DEFAULTS = {name: param.default for name, param in inspect.signature(GPT4All.generate).parameters.items()
+                         if param.default is not inspect.Parameter.empty
+                         and name not in ("n_predict", "streaming", "callback")}
+
+# Summary map-reduce: budget di token (contesto GPT4All di default: 2048 token)
+SUMMARY_CONTEXT_TOKENS = 2048
+SUMMARY_MAX_TOKENS = 1000
+SUMMARY_MAP_MAX_TOKENS = 400
+SUMMARY_PROMPT_OVERHEAD_TOKENS = 250
+SUMMARY_CHUNK_TOKENS = SUMMARY_CONTEXT_TOKENS - SUMMARY_MAP_MAX_TOKENS - SUMMARY_PROMPT_OVERHEAD_TOKENS
+CHARS_PER_TOKEN = 4
+# Testo tollerato prima della graffa di apertura e tentativi per un campo non valido
+SUMMARY_MAX_PREAMBLE_CHARS = 200
+SUMMARY_FIELD_RETRIES = 1
+
+# Istanze GPT4All in parallelo per la fase map (ognuna ha il proprio contesto)
+SUMMARY_MAP_WORKERS = max(1, int(os.environ.get("RECORDER_SUMMARY_WORKERS", "1")))
+
+# Trascrizione live: durata dei chunk e sovrapposizione tra chunk consecutivi (secondi)
+STREAM_CHUNK_SECONDS = 30.0
+STREAM_OVERLAP_SECONDS = 2.0
+# Chunk in attesa della trascrizione live: oltre questo ritardo (~4 minuti) la live viene
+# abbandonata e la registrazione trascritta per intero alla fine
+STREAM_QUEUE_CHUNKS = 8
+# Istanza Whisper della trascrizione live, separata da quelle dei job in coda (0, 1, ...)
+STREAM_WHISPER_INSTANCE = "live"
+
+# VAD: silenzio mantenuto attorno al parlato (secondi) e soglie energetiche (RMS normalizzato)
+VAD_KEEP_SILENCE_SECONDS = 0.5
+VAD_SPEECH_RATIO = 3.0
+VAD_MIN_RMS = 0.003
+
+# Modalità batch: estensioni audio elaborate e suffisso dei file di output
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".mp4"}
+ANALYSIS_SUFFIX = ".analisi"
+
+# Scheduler multi-processo: thread torch per processo e byte/s stimati per formati compressi
+BATCH_THREADS_PER_WORKER = max(1, int(os.environ.get("RECORDER_THREADS_PER_WORKER", "4")))
+COMPRESSED_BYTES_PER_SECOND = 16000
+
+# Registrazione in memoria: oltre questa soglia (MB) il buffer passa su file memory-mapped
+MEMORY_BUFFER_MAX_BYTES = int(os.environ.get("RECORDER_MEMORY_BUFFER_MB", "256")) * 1024 * 1024
+
+# Sample rate atteso da Whisper
+WHISPER_SAMPLE_RATE = 16000
+
+# Decodifica a batch (opzionale): finestre da 30 s decodificate insieme per passata
+DECODE_BATCH_SIZE = max(2, int(os.environ.get("RECORDER_DECODE_BATCH", "8")))
+DECODE_WINDOW_SECONDS = 30.0
+# Secondi finali di ogni finestra in cui cercare il punto più silenzioso per il taglio
+DECODE_CUT_SEARCH_SECONDS = 5.0
+# Soglie di fallback sulla temperatura, come in whisper.transcribe()
+DECODE_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+DECODE_COMPRESSION_RATIO_THRESHOLD = 2.4
+DECODE_LOGPROB_THRESHOLD = -1.0
+DECODE_NO_SPEECH_THRESHOLD = 0.6
+
+# Formato della registrazione su disco: container, codec libsndfile ed estensione
+# (FLAC lossless ~2x, Opus ~10x più piccolo del WAV; richiedono soundfile)
+RECORDING_FORMATS = {
+    "wav": (None, None, ".wav"),
+    "flac": ("FLAC", "PCM_16", ".flac"),
+    "opus": ("OGG", "OPUS", ".ogg"),
+}
+RECORDING_FORMAT = os.environ.get("RECORDER_FORMAT", "wav").lower()
+# Registrazione in segmenti di lunghezza fissa con manifest: dopo un crash si perde al più
+# il segmento aperto e la trascrizione riparte dall'ultimo segmento completato (0 = un solo segmento)
+RECORDING_SEGMENT_SECONDS = float(os.environ.get("RECORDER_SEGMENT_SECONDS", "300"))
+RECORDING_MANIFEST = "manifest.json"
+# Mappa dei tempi del VAD nella directory della registrazione, aggiornata a ogni segmento chiuso
+RECORDING_TIMEMAP = "timemap.json"
+# Audio dei segmenti adiacenti trascritto insieme a ogni segmento: le frasi a cavallo del confine
+# restano intere e vengono assegnate al segmento che contiene il loro punto medio
+RECORDING_SEGMENT_OVERLAP = float(os.environ.get("RECORDER_SEGMENT_OVERLAP_SECONDS", "2"))
+
+# Registrazione multi-dispositivo: ritardo massimo tra tracce prima di inserire silenzio
+# nella traccia in ritardo (dispositivo bloccato o deriva del clock), in secondi
+TRACK_MAX_LAG_SECONDS = 2.0
+
+# Sample rate di cattura: "native" usa quello di default del dispositivo (es. 48 kHz per i
+# driver loopback) e ricampiona a 16 kHz in streaming; un numero forza quel rate
+_capture_rate_env = os.environ.get("RECORDER_CAPTURE_RATE", "native")
+CAPTURE_RATE = None if _capture_rate_env == "native" else int(_capture_rate_env)
+
+# Rendering GUI: testo accodato ogni RENDER_INTERVAL_MS, al massimo RENDER_CHUNK_CHARS per passo
+RENDER_INTERVAL_MS = 50
+RENDER_CHUNK_CHARS = 32 * 1024
+# A capo almeno ogni RENDER_LINE_CHARS: il layout di un paragrafo enorme rallenta ogni inserimento
+RENDER_LINE_CHARS = 2000
+# Oltre questi segmenti la trascrizione passa alla vista per segmento, caricata durante lo scroll
+LAZY_VIEW_SEGMENTS = int(os.environ.get("RECORDER_LAZY_VIEW_SEGMENTS", "2000"))
+LAZY_VIEW_FETCH_ROWS = 200
+
+# Cattura in callback mode: frame per blocco (a 16 kHz, scalati sul rate di cattura) e blocchi massimi in coda verso il thread di scrittura
+CAPTURE_BLOCK_FRAMES = 1024
+CAPTURE_QUEUE_BLOCKS = max(1, int(os.environ.get("RECORDER_CAPTURE_QUEUE_BLOCKS", "2048")))
+
+# Coda delle elaborazioni: stadi in ordine e job eseguiti in parallelo per stadio
+JOB_STAGES = ("transcribe", "summarize")
+JOB_CONCURRENCY = {
+    "transcribe": max(1, int(os.environ.get("RECORDER_TRANSCRIBE_JOBS", "1"))),
+    "summarize": max(1, int(os.environ.get("RECORDER_SUMMARY_JOBS", "1"))),
+}
+# Servizio HTTP locale (recorder_app.py serve): indirizzo, job accettati tra coda ed esecuzione
+# prima di rispondere 503 e dimensione massima di un upload
+SERVER_HOST = os.environ.get("RECORDER_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("RECORDER_SERVER_PORT", "8765"))
+SERVER_JOBS_DIR = JOBS_DIR / "server"
+SERVER_MAX_PENDING = max(1, int(os.environ.get("RECORDER_SERVER_MAX_PENDING", "16")))
+SERVER_MAX_UPLOAD_BYTES = int(os.environ.get("RECORDER_SERVER_MAX_UPLOAD_MB", "1024")) * 1024 * 1024
+SERVER_READ_BYTES = 64 * 1024
+SERVER_RETRY_AFTER_SECONDS = 10
+# File accanto alla registrazione che la seguono nella directory dei job
+RECORDING_SIDECARS = (".tracks.json",)
+
+# Metriche per stadio in JSON-lines accanto ad app.log (RECORDER_METRICS=0 per disabilitare)
+METRICS_FILE = LOG_DIR / "metrics.jsonl"
+METRICS_ENABLED = os.environ.get("RECORDER_METRICS", "1") != "0"
+
 # Lista globale dei file temporanei da pulire
 _temp_files = []
 
@@ -62,325 +254,3593 @@ def cleanup_temp_files():
 atexit.register(cleanup_temp_files)
 
 
-class AudioRecorder(QThread):
-    """Thread per registrazione audio - Fixed: resource leaks, memory leak, race condition"""
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-
-    def __init__(self, device_index, sample_rate=16000):
-        super().__init__()
-        self.device_index = device_index
-        self.sample_rate = sample_rate
-        # FIX #4: Thread-safe stop event invece di bool
-        self.stop_event = threading.Event()
+class Metrics:
+    """Span temporali e contatori per stadio, esportati come JSON-lines"""
 
-    def run(self):
-        global _temp_files
-        p = None
-        stream = None
-        temp_path = None
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self.counters = {}
+        self._last = {}
 
+    @contextlib.contextmanager
+    def span(self, name, **fields):
+        """Misura un blocco; il dict restituito accoglie campi aggiuntivi (token, RTF, ...)"""
+        record = dict(fields)
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
         try:
-            logger.info(f"Avvio registrazione, device {self.device_index}, sample_rate {self.sample_rate}")
+            yield record
+        except Exception as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            record["cpu_seconds"] = round(time.thread_time() - cpu_start, 4)
+            if record.get("audio_seconds"):
+                # Real-time factor: secondi di elaborazione per secondo di audio
+                record["rtf"] = round(record["seconds"] / record["audio_seconds"], 4)
+            self.emit("span", name, **record)
 
-            p = pyaudio.PyAudio()
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
 
-            # Verifica che il device sia valido
+    def last(self, name):
+        """Ultimo record emesso con questo nome (o None)"""
+        with self._lock:
+            return self._last.get(name)
+
+    def emit(self, kind, name, **fields):
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "kind": kind, "name": name,
+                  "pid": os.getpid(), "thread": threading.current_thread().name, **fields}
+        with self._lock:
+            self._last[name] = record
+            if self.path is None:
+                return
             try:
-                device_info = p.get_device_info_by_index(self.device_index)
-                if device_info['maxInputChannels'] == 0:
-                    raise ValueError(f"Device {self.device_index} non ha canali di input")
-            except (ValueError, OSError) as e:
-                raise ValueError(f"Device audio non valido: {e}")
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                logger.warning(f"Scrittura metriche fallita: {e}")
 
-            stream = p.open(
-                format=pyaudio.paInt16,
-                channels=1,
-                rate=self.sample_rate,
-                input=True,
-                input_device_index=self.device_index,
-                frames_per_buffer=1024
-            )
+    def flush_counters(self):
+        """Scrive i contatori accumulati come un unico record"""
+        with self._lock:
+            counters = dict(self.counters)
+        if counters:
+            self.emit("counters", "counters", **counters)
 
-            # FIX #3: Scrivi direttamente su file invece di accumulare in memoria
-            # Crea file temporaneo
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            temp_path = temp_file.name
-            temp_file.close()
-            _temp_files.append(temp_path)  # Registra per cleanup
 
-            logger.info(f"File temporaneo creato: {temp_path}")
+metrics = Metrics(METRICS_FILE if METRICS_ENABLED else None)
+atexit.register(metrics.flush_counters)
 
-            # FIX #2: Usa context manager per wave.open
-            with wave.open(temp_path, 'wb') as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-                wf.setframerate(self.sample_rate)
 
-                # FIX #4: Usa stop_event invece di bool
-                # FIX #3: Scrivi direttamente, nessun accumulo in memoria
-                frames_written = 0
-                while not self.stop_event.is_set():
-                    try:
-                        data = stream.read(1024, exception_on_overflow=False)
-                        wf.writeframes(data)
-                        frames_written += 1024
-                    except IOError as e:
-                        logger.warning(f"Buffer overflow ignorato: {e}")
-                        continue
+class ResultCache:
+    """Cache su disco indirizzata per contenuto, con eviction LRU per dimensione totale"""
 
-            logger.info(f"Registrazione completata, {frames_written} frame scritti")
-            self.finished.emit(temp_path)
+    def __init__(self, directory, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
 
-        except ValueError as e:
-            # Errori di validazione (device non valido, etc.)
-            logger.error(f"Errore validazione: {e}")
-            self.error.emit(f"Errore: {str(e)}")
-        except (IOError, OSError) as e:
-            # Errori I/O (file, audio device)
-            logger.error(f"Errore I/O registrazione: {e}", exc_info=True)
-            self.error.emit(f"Errore I/O: {str(e)}")
-        except Exception as e:
-            # Altri errori inaspettati
-            logger.exception(f"Errore inaspettato durante registrazione")
-            self.error.emit(f"Errore registrazione: {str(e)}")
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(*parts):
+        """Hash SHA-256 di parti serializzabili in JSON"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def audio_key(audio, **options):
+        """Hash dei byte audio (file o array) più le opzioni di decodifica"""
+        digest = hashlib.sha256()
+        if isinstance(audio, np.ndarray):
+            digest.update(f"{audio.dtype}:{audio.shape}".encode())
+            if audio.flags.c_contiguous:
+                digest.update(memoryview(audio).cast("B"))  # senza copiare la registrazione
+            else:
+                # Viste non contigue (es. un canale di un file multi-traccia): copie a blocchi di righe,
+                # stessi byte di una copia intera
+                for start in range(0, len(audio), 1024 * 1024):
+                    digest.update(np.ascontiguousarray(audio[start:start + 1024 * 1024]))
+        else:
+            with open(audio, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        return ResultCache.key(digest.hexdigest(), options)
+
+    def _path(self, namespace, key):
+        return self.directory / namespace / f"{key}.json"
+
+    def get(self, namespace, key):
+        if not self.enabled:
+            return None
+        path = self._path(namespace, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # aggiorna l'ordine LRU
+            logger.info(f"Cache hit {namespace}/{key[:12]}")
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Voce di cache illeggibile {path}: {e}")
+            return None
+
+    def put(self, namespace, key, value):
+        if not self.enabled:
+            return
+        path = self._path(namespace, key)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # File temporaneo univoco: più processi possono scrivere la stessa chiave insieme
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{key[:12]}.", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # scrittura atomica
+            tmp_path = None
+            self.evict()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Impossibile salvare in cache {namespace}/{key[:12]}: {e}")
         finally:
-            # FIX #1: Sempre chiudi risorse in finally
-            if stream is not None:
-                try:
-                    stream.stop_stream()
-                    stream.close()
-                    logger.debug("Stream audio chiuso")
-                except:
-                    pass
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
 
-            if p is not None:
+    def evict(self):
+        """Rimuove le voci meno recenti finché la cache rientra nel limite"""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*/*.json"):
                 try:
-                    p.terminate()
-                    logger.debug("PyAudio terminato")
-                except:
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    continue
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                except OSError:
                     pass
 
-    def stop(self):
-        """Ferma la registrazione in modo thread-safe"""
-        logger.info("Richiesta stop registrazione")
-        self.stop_event.set()
 
+result_cache = ResultCache(RESULT_CACHE_DIR)
 
-class TranscriptionWorker(QThread):
-    """Thread per trascrizione con Whisper - Fixed: exception handling, configurable language"""
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
-    progress = pyqtSignal(str)
 
-    def __init__(self, audio_file, model_size="base", language="it"):
-        super().__init__()
-        self.audio_file = audio_file
-        self.model_size = model_size
-        self.language = language  # FIX #12: Lingua configurabile
+def _estimate_model_bytes(model):
+    """Stima la memoria occupata da un modello torch (parametri + buffer)"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+class ModelCache:
+    """Registry thread-safe dei modelli caricati, con eviction LRU entro un budget di memoria
+
+    I modelli fissati (pin) e quelli in uso (in_use) non vengono mai rimossi: le istanze
+    dei worker concorrenti non si sfrattano a vicenda ricaricandosi a ogni trascrizione.
+    """
+
+    def __init__(self, max_bytes, size_of=_estimate_model_bytes):
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._models = OrderedDict()  # key -> (model, bytes), ordine LRU
+        # key -> [lock, thread che caricano o attendono]: rimosso dall'ultimo, resta limitato ai caricamenti in corso
+        self._key_locks = {}
+        self._pinned = set()
+        self._in_use = {}  # key -> utilizzi in corso
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, size=None, pin=False):
+        """Ritorna il modello per key, caricandolo con loader() se non residente
+
+        size sostituisce size_of() per i modelli di cui non si possono contare i tensori;
+        pin=True esclude il modello dall'eviction finché la cache non viene svuotata.
+        """
+        with self._lock:
+            if pin:
+                self._pinned.add(key)
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
 
-    def run(self):
         try:
-            logger.info(f"Avvio trascrizione: file={self.audio_file}, model={self.model_size}, lang={self.language}")
+            # Un solo caricamento per chiave: gli altri thread attendono e riusano il risultato
+            with key_lock[0]:
+                return self._load(key, loader, size)
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
 
-            # Verifica che il file esista
-            if not os.path.exists(self.audio_file):
-                raise FileNotFoundError(f"File audio non trovato: {self.audio_file}")
+    def _load(self, key, loader, size):
+        # Chiamare con il lock della chiave acquisito
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
 
-            self.progress.emit("Caricamento modello Whisper...")
-            model = whisper.load_model(self.model_size)
-            logger.info(f"Modello Whisper '{self.model_size}' caricato")
+        logger.info(f"Caricamento modello in cache: {key}")
+        model = loader()
+        if size is None:
+            size = self.size_of(model)
 
-            self.progress.emit("Trascrizione in corso...")
-            result = model.transcribe(self.audio_file, language=self.language)
+        with self._lock:
+            self._models[key] = (model, size)
+            self._evict(protect=key)
+            if self.total_bytes() > self.max_bytes and len(self._models) > 1:
+                logger.warning(f"Cache modelli oltre il budget: {len(self._models)} modelli in uso o fissati, "
+                               f"{self.total_bytes() / 1024 / 1024:.0f} MB su {self.max_bytes / 1024 / 1024:.0f} MB "
+                               f"(aumentare RECORDER_WHISPER_CACHE_MB)")
+        logger.info(f"Modello {key} residente ({size / 1024 / 1024:.0f} MB, totale {self.total_bytes() / 1024 / 1024:.0f} MB)")
+        return model
 
-            transcript = result["text"].strip()
-            logger.info(f"Trascrizione completata, {len(transcript)} caratteri")
+    @contextlib.contextmanager
+    def in_use(self, key):
+        """Esclude key dall'eviction per la durata del blocco (anche se non ancora caricato)"""
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+                self._evict()
 
-            self.finished.emit(transcript)
+    def _lookup(self, key):
+        entry = self._models.get(key)
+        if entry is None:
+            return None
+        self._models.move_to_end(key)
+        return entry[0]
+
+    def _evict(self, protect=None):
+        # Chiamare con self._lock acquisito
+        while self.total_bytes() > self.max_bytes:
+            victim = next((k for k in self._models
+                           if k != protect and k not in self._pinned and k not in self._in_use), None)
+            if victim is None:
+                break
+            self._models.pop(victim)
+            logger.info(f"Modello {victim} rimosso dalla cache (budget {self.max_bytes / 1024 / 1024:.0f} MB)")
+
+    def total_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._pinned.clear()
+
+
+_whisper_cache = ModelCache(WHISPER_CACHE_MAX_BYTES)
+
+
+def _default_device():
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def whisper_model_key(model_size, device=None, instance=0):
+    """Chiave del modello Whisper nella cache di processo"""
+    return ("whisper", model_size, device or _default_device(), instance)
+
+
+def get_whisper_model(model_size, device=None, instance=0, pin=False):
+    """Ritorna il modello Whisper dalla cache di processo, caricandolo solo la prima volta
+
+    instance > 0 crea copie indipendenti per trascrizioni concorrenti: transcribe()
+    installa hook di KV cache sul modello e non è sicuro da thread diversi.
+    """
+    device = device or _default_device()
+
+    def load():
+        with metrics.span("whisper.load", model=model_size, device=device):
+            return whisper.load_model(model_size, device=device)
+
+    return _whisper_cache.get(whisper_model_key(model_size, device, instance), load, pin=pin)
+
+
+def load_audio_file(path):
+    """Decodifica un file audio in float32 mono a 16 kHz
+
+    WAV/FLAC/Ogg vengono letti con soundfile se disponibile (niente processo ffmpeg),
+    gli altri formati passano da ffmpeg via Whisper.
+    """
+    with metrics.span("audio.decode", file=os.path.basename(str(path))) as span:
+        if soundfile is not None and Path(path).suffix.lower() in (".wav", ".flac", ".ogg"):
+            span["decoder"] = "soundfile"
+            data, sample_rate = soundfile.read(str(path), dtype="float32", always_2d=True)
+            audio = _to_whisper_rate(data.mean(axis=1) if data.shape[1] > 1 else data[:, 0], sample_rate)
+        else:
+            span["decoder"] = "ffmpeg"
+            audio = whisper.load_audio(str(path))
+        span["audio_seconds"] = round(len(audio) / WHISPER_SAMPLE_RATE, 2)
+    return audio
+
+
+def segment_windows(audio, window_seconds=DECODE_WINDOW_SECONDS, search_seconds=DECODE_CUT_SEARCH_SECONDS,
+                    frame_seconds=0.1, sample_rate=WHISPER_SAMPLE_RATE):
+    """Confini (inizio, fine) in campioni di finestre lunghe al massimo window_seconds
+
+    Ogni finestra viene tagliata nel frame meno energetico dei suoi ultimi search_seconds,
+    così le parole a cavallo dei 30 s non vengono spezzate tra due finestre.
+    """
+    window = int(window_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = int(frame_seconds * sample_rate)
+    bounds = []
+    start = 0
+    while start < len(audio):
+        end = min(start + window, len(audio))
+        if end < len(audio):
+            region = audio[end - search:end]
+            frames = len(region) // frame
+            energy = np.square(region[:frames * frame].reshape(frames, frame)).mean(axis=1)
+            # A parità di energia il frame più tardo, per non accorciare le finestre nel silenzio
+            quietest = frames - 1 - int(np.argmin(energy[::-1]))
+            end = end - search + quietest * frame + frame // 2
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def _needs_fallback(result):
+    if result.no_speech_prob > DECODE_NO_SPEECH_THRESHOLD and result.avg_logprob < DECODE_LOGPROB_THRESHOLD:
+        return False  # silenzio: nessun nuovo tentativo
+    return (result.compression_ratio > DECODE_COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < DECODE_LOGPROB_THRESHOLD)
+
+
+def _decode_with_fallback(model, mel, language, fp16):
+    """whisper.decode su un batch di mel; le finestre degenerate vengono ridecodificate a temperatura crescente"""
+    options = dict(language=language, task="transcribe", fp16=fp16)
+    results = whisper.decode(model, mel, whisper.DecodingOptions(temperature=DECODE_TEMPERATURES[0], **options))
+    pending = [i for i, result in enumerate(results) if _needs_fallback(result)]
+    for temperature in DECODE_TEMPERATURES[1:]:
+        if not pending:
+            break
+        retry = whisper.decode(model, mel[pending], whisper.DecodingOptions(temperature=temperature, **options))
+        for i, result in zip(pending, retry):
+            results[i] = result
+        pending = [i for i, result in zip(pending, retry) if _needs_fallback(result)]
+    return results
+
+
+def timestamp_segments(tokens, timestamp_begin, eot, window_seconds):
+    """Divide i token di una finestra in (inizio, fine, token di testo) dai token timestamp"""
+    tokens = [t for t in tokens if t != eot]
+    is_timestamp = [t >= timestamp_begin for t in tokens]
+    # Coppie di timestamp consecutivi chiudono un segmento e ne aprono un altro
+    cuts = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+    if len(tokens) >= 2 and is_timestamp[-1] and not is_timestamp[-2]:
+        cuts.append(len(tokens))  # ultimo segmento chiuso da un timestamp singolo
+
+    def seconds(token):
+        return min((token - timestamp_begin) * 0.02, window_seconds)
+
+    if not cuts:
+        timestamps = [t for t in tokens if t >= timestamp_begin]
+        end = seconds(timestamps[-1]) if timestamps and seconds(timestamps[-1]) > 0 else window_seconds
+        return [(0.0, end, [t for t in tokens if t < timestamp_begin])]
+
+    segments = []
+    last = 0
+    # Coda senza timestamp di chiusura (finestra troncata): arriva fino alla fine della finestra
+    for cut in cuts + ([len(tokens)] if cuts[-1] < len(tokens) else []):
+        piece = tokens[last:cut]
+        last = cut
+        text_tokens = [t for t in piece if t < timestamp_begin]
+        if not text_tokens:
+            continue
+        start = seconds(piece[0]) if piece[0] >= timestamp_begin else (segments[-1][1] if segments else 0.0)
+        end = seconds(piece[-1]) if piece[-1] >= timestamp_begin else window_seconds
+        segments.append((start, end, text_tokens))
+    return segments
+
+
+def transcribe_batched(model, audio, language="it", batch_size=DECODE_BATCH_SIZE, progress=None, on_segments=None):
+    """Trascrizione a batch: più finestre da 30 s per ogni passata di mel e decode
+
+    Rispetto a transcribe() le finestre non sono condizionate dal testo precedente: è
+    questo che permette di decodificarle insieme. Il risultato ha la stessa forma;
+    on_segments riceve i segmenti di ogni batch appena decodificato.
+    """
+    import torch
+
+    progress = progress or (lambda message: None)
+    on_segments = on_segments or (lambda segments: None)
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                                language=language, task="transcribe")
+    windows = [(s, e) for s, e in segment_windows(audio) if e - s >= WHISPER_SAMPLE_RATE // 10]
+    fp16 = str(model.device).startswith("cuda")
+
+    segments = []
+    for first in range(0, len(windows), batch_size):
+        batch = windows[first:first + batch_size]
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[s:e]), n_mels=model.dims.n_mels)
+            for s, e in batch
+        ]).to(model.device)
+        decoded = _decode_with_fallback(model, mel, language, fp16)
+
+        batch_first = len(segments)
+        for (start, end), result in zip(batch, decoded):
+            if result.no_speech_prob > DECODE_NO_SPEECH_THRESHOLD and result.avg_logprob < DECODE_LOGPROB_THRESHOLD:
+                continue
+            offset = start / WHISPER_SAMPLE_RATE
+            for seg_start, seg_end, text_tokens in timestamp_segments(result.tokens, tokenizer.timestamp_begin,
+                                                                      tokenizer.eot, (end - start) / WHISPER_SAMPLE_RATE):
+                segments.append({
+                    "id": len(segments),
+                    "seek": start,
+                    "start": round(offset + seg_start, 2),
+                    "end": round(offset + seg_end, 2),
+                    "text": tokenizer.decode(text_tokens),
+                    "tokens": text_tokens,
+                    "temperature": result.temperature,
+                    "avg_logprob": result.avg_logprob,
+                    "compression_ratio": result.compression_ratio,
+                    "no_speech_prob": result.no_speech_prob
+                })
+        on_segments(segments[batch_first:])
+        progress(f"Trascrizione in corso... {min(first + batch_size, len(windows))}/{len(windows)} finestre")
+    return {"text": "".join(segment["text"] for segment in segments), "segments": segments, "language": language}
+
+
+class TranscriptionBackend(abc.ABC):
+    """Motore di trascrizione: carica un modello e ritorna risultati nel formato di whisper.transcribe()"""
+    name = None
+    label = None
+    module = None  # modulo richiesto, cercato senza importarlo
+    # Thread CPU per istanza del modello; None = core disponibili divisi tra le trascrizioni in parallelo
+    cpu_threads = None
+
+    def available(self):
+        return importlib.util.find_spec(self.module) is not None
+
+    @classmethod
+    def threads(cls, concurrent=None):
+        """Thread CPU da assegnare a un'istanza senza sovrascrivere i core delle istanze concorrenti
+
+        concurrent è il numero di trascrizioni in parallelo (None = JOB_CONCURRENCY["transcribe"]).
+        """
+        if cls.cpu_threads:
+            return cls.cpu_threads
+        return max(1, len(BatchScheduler.available_cores()) // (concurrent or JOB_CONCURRENCY["transcribe"]))
+
+    def cache_options(self):
+        """Opzioni che cambiano il risultato, per la chiave della cache risultati"""
+        return {"compute_type": BACKEND_COMPUTE_TYPE}
+
+    def model_bytes(self, model_size, compute_type):
+        bytes_per_weight = {"int8": 1, "float16": 2}.get(compute_type.split("_")[0], 4)
+        return int(WHISPER_MODEL_PARAMS.get(model_size, 0) * bytes_per_weight)
+
+    def model_key(self, model_size, instance=0):
+        """Chiave del modello nella cache di processo condivisa con Whisper"""
+        return (self.name, model_size, _default_device(), BACKEND_COMPUTE_TYPE, instance)
+
+    def get_model(self, model_size, instance=0, pin=False, concurrent=None):
+        """Modello dalla cache di processo condivisa con Whisper, caricato solo la prima volta"""
+        key = self.model_key(model_size, instance)
+        device, compute_type = key[2], key[3]
+
+        def load():
+            with metrics.span("whisper.load", backend=self.name, model=model_size, device=device,
+                              compute_type=compute_type):
+                return self.load(model_size, device, compute_type, concurrent)
+
+        return _whisper_cache.get(key, load, size=self.model_bytes(model_size, compute_type), pin=pin)
+
+    @abc.abstractmethod
+    def load(self, model_size, device, compute_type, concurrent=None):
+        """Carica il modello (chiamato da get_model solo se non è già in cache); vedi threads()"""
+
+    @abc.abstractmethod
+    def transcribe(self, model, audio, language, decode_batch=1, progress=None, on_segments=None):
+        """Risultato nel formato di whisper.transcribe(); on_segments riceve i segmenti man mano"""
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """openai-whisper su PyTorch: il riferimento, con decodifica a batch via transcribe_batched()"""
+    name = "openai-whisper"
+    label = "Whisper (PyTorch)"
+    module = "whisper"
+
+    def cache_options(self):
+        return {}
+
+    def model_key(self, model_size, instance=0):
+        return whisper_model_key(model_size, instance=instance)
+
+    def get_model(self, model_size, instance=0, pin=False, concurrent=None):
+        return get_whisper_model(model_size, instance=instance, pin=pin)
+
+    def load(self, model_size, device, compute_type, concurrent=None):
+        # I thread torch sono impostati per processo (torch.set_num_threads), non per modello
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, model, audio, language, decode_batch=1, progress=None, on_segments=None):
+        if decode_batch > 1:
+            return transcribe_batched(model, audio, language, decode_batch, progress, on_segments)
+        # transcribe() non espone i segmenti intermedi: arrivano tutti alla fine
+        result = model.transcribe(audio, language=language)
+        if on_segments is not None:
+            on_segments(result.get("segments", []))
+        return result
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper: stessi modelli convertiti in CTranslate2, quantizzati int8"""
+    name = "faster-whisper"
+    label = "faster-whisper (CTranslate2)"
+    module = "faster_whisper"
+
+    def load(self, model_size, device, compute_type, concurrent=None):
+        from faster_whisper import WhisperModel
+        return WhisperModel(model_size, device=device, compute_type=compute_type,
+                            cpu_threads=self.threads(concurrent),
+                            download_root=str(MODEL_CACHE_DIR / "faster-whisper"))
+
+    def transcribe(self, model, audio, language, decode_batch=1, progress=None, on_segments=None):
+        progress = progress or (lambda message: None)
+        on_segments = on_segments or (lambda segments: None)
+        engine, options = model, {}
+        if decode_batch > 1:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+                engine, options = BatchedInferencePipeline(model=model), {"batch_size": decode_batch}
+            except ImportError:
+                logger.info("faster-whisper senza BatchedInferencePipeline, decodifica sequenziale")
+        # beam_size=1: decodifica greedy come whisper.transcribe()
+        segments, info = engine.transcribe(audio, language=language, beam_size=1, **options)
+
+        result = []
+        # Generatore: la decodifica avviene durante l'iterazione
+        for segment in segments:
+            result.append({
+                "id": len(result),
+                "seek": segment.seek,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "tokens": list(segment.tokens),
+                "temperature": segment.temperature,
+                "avg_logprob": segment.avg_logprob,
+                "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob
+            })
+            on_segments(result[-1:])
+            progress(f"Trascrizione in corso... {segment.end:.0f}/{info.duration:.0f} s")
+        return {"text": "".join(segment["text"] for segment in result), "segments": result,
+                "language": info.language}
+
+
+class WhisperCppBackend(TranscriptionBackend):
+    """whisper.cpp (pywhispercpp): modelli ggml su CPU, quantizzati q8_0 con compute_type int8"""
+    name = "whisper.cpp"
+    label = "whisper.cpp (ggml)"
+    module = "pywhispercpp"
+    # Suffisso dei modelli ggml quantizzati
+    QUANTIZED_SUFFIX = {"int8": "-q8_0"}
+
+    def load(self, model_size, device, compute_type, concurrent=None):
+        from pywhispercpp.model import Model
+        return Model(model_size + self.QUANTIZED_SUFFIX.get(compute_type, ""),
+                     models_dir=str(MODEL_CACHE_DIR / "whisper.cpp"),
+                     n_threads=self.threads(concurrent),
+                     print_progress=False, print_realtime=False)
+
+    def transcribe(self, model, audio, language, decode_batch=1, progress=None, on_segments=None):
+        # Nessuna decodifica a batch in whisper.cpp; t0/t1 sono in centesimi di secondo
+        segments = [{"id": i, "seek": 0, "start": s.t0 / 100, "end": s.t1 / 100, "text": " " + s.text.strip()}
+                    for i, s in enumerate(model.transcribe(np.ascontiguousarray(audio, dtype=np.float32),
+                                                           language=language))]
+        if on_segments is not None:
+            on_segments(segments)
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments,
+                "language": language}
+
+
+# In ordine di preferenza per "auto": il primo installato è il più veloce su CPU
+TRANSCRIPTION_BACKENDS = OrderedDict((backend.name, backend) for backend in (
+    FasterWhisperBackend(), WhisperCppBackend(), OpenAIWhisperBackend()))
+
+
+def available_backends():
+    """Motori di trascrizione installati, in ordine di preferenza"""
+    return [name for name, backend in TRANSCRIPTION_BACKENDS.items() if backend.available()]
+
+
+def resolve_backend(name=None):
+    """Motore effettivo: "auto" o un motore non installato ricadono sul più veloce disponibile"""
+    name = (name or TRANSCRIPTION_BACKEND).lower()
+    available = available_backends()
+    if name in available:
+        return TRANSCRIPTION_BACKENDS[name]
+    if name != "auto":
+        logger.warning(f"Motore di trascrizione '{name}' non disponibile, uso {available[0]}")
+    return TRANSCRIPTION_BACKENDS[available[0]]
+
+
+def transcribe_audio(audio, model_size="base", language="it", progress=None, instance=0, cache=None,
+                     decode_batch=1, backend=None, on_segments=None, concurrent=None):
+    """Trascrive un file audio (o un array float32 a 16 kHz) e ritorna il risultato di transcribe()
+
+    decode_batch > 1 decodifica a batch le finestre da 30 s; backend è un nome di
+    TRANSCRIPTION_BACKENDS (default TRANSCRIPTION_BACKEND, "auto"). on_segments riceve
+    le liste di segmenti man mano che il motore li produce. concurrent è il numero di
+    trascrizioni in parallelo tra cui dividere i core (None = JOB_CONCURRENCY).
+    """
+    if SegmentedRecording.is_recording(audio):
+        return transcribe_segmented(audio, model_size, language, progress, instance, cache, decode_batch,
+                                    backend, on_segments, concurrent=concurrent)
+
+    progress = progress or (lambda message: None)
+    on_segments = on_segments or (lambda segments: None)
+    backend = resolve_backend(backend)
+
+    # Verifica che il file esista; gli array in memoria non passano da ffmpeg
+    if not isinstance(audio, np.ndarray) and not os.path.exists(audio):
+        raise FileNotFoundError(f"File audio non trovato: {audio}")
+
+    cache_key = None
+    if cache is not None and cache.enabled:
+        # La decodifica a batch produce un risultato diverso: chiave separata
+        decoding = {"decoding": "batched"} if decode_batch > 1 else {}
+        cache_key = ResultCache.audio_key(audio, backend=backend.name, model=model_size, language=language,
+                                          **decoding, **backend.cache_options())
+        cached = cache.get("transcripts", cache_key)
+        if cached is not None:
+            progress("Trascrizione trovata in cache")
+            on_segments(cached.get("segments", []))
+            return cached
+
+    # In uso: escluso dall'eviction finché la trascrizione non termina
+    with _whisper_cache.in_use(backend.model_key(model_size, instance)):
+        progress("Caricamento modello Whisper...")
+        model = backend.get_model(model_size, instance=instance, concurrent=concurrent)
+        logger.info(f"Modello Whisper '{model_size}' pronto ({backend.name})")
+
+        if not isinstance(audio, np.ndarray):
+            progress("Decodifica audio...")
+            audio = load_audio_file(audio)
+
+        progress("Trascrizione in corso...")
+        audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+        with metrics.span("whisper.transcribe", backend=backend.name, model=model_size, language=language,
+                          audio_seconds=round(audio_seconds, 2), decode_batch=decode_batch) as span:
+            result = backend.transcribe(model, audio, language, decode_batch, progress, on_segments)
+            segments = result.get("segments", [])
+            # Finestre da 30 s decodificate (seek distinti) e token generati
+            span["segments"] = len(segments)
+            span["windows"] = len({segment.get("seek") for segment in segments})
+            span["tokens"] = sum(len(segment.get("tokens", ())) for segment in segments)
+    metrics.count("whisper.audio_seconds", round(audio_seconds, 2))
+    if cache_key is not None:
+        cache.put("transcripts", cache_key, result)
+    return result
+
+
+def _shift_segments(segments, offset):
+    """Segmenti con i tempi spostati di offset secondi, senza i token (non servono nel checkpoint)"""
+    return [{"start": round(segment["start"] + offset, 2), "end": round(segment["end"] + offset, 2),
+             "text": segment["text"], "avg_logprob": segment.get("avg_logprob", 0.0),
+             "no_speech_prob": segment.get("no_speech_prob", 0.0)}
+            for segment in segments]
+
+
+def _owned_segments(segments, keep_from, keep_to):
+    """Segmenti con il punto medio nella finestra posseduta, come per i chunk della trascrizione live"""
+    return [segment for segment in segments if keep_from <= (segment["start"] + segment["end"]) / 2 < keep_to]
+
+
+def _load_segment_audio(path):
+    """Audio di un segmento in float32 a 16 kHz (i WAV si leggono anche senza soundfile)"""
+    return read_tracks(path)[0] if path.suffix == ".wav" else load_audio_file(path)
+
+
+def transcribe_segmented(path, model_size="base", language="it", progress=None, instance=0, cache=None,
+                         decode_batch=1, backend=None, on_segments=None, overlap=RECORDING_SEGMENT_OVERLAP,
+                         concurrent=None):
+    """Trascrive una SegmentedRecording un segmento alla volta, riprendendo dai checkpoint
+
+    Ogni segmento viene trascritto con overlap secondi dei segmenti adiacenti e tiene solo i
+    segmenti Whisper con il punto medio nel proprio tratto. Il risultato di ogni segmento è
+    salvato accanto all'audio: dopo un crash o una chiusura dell'app si riparte dal primo
+    segmento senza checkpoint valido per le stesse opzioni. Con il VAD i tempi vengono
+    riportati a quelli della registrazione originale.
+    """
+    progress = progress or (lambda message: None)
+    on_segments = on_segments or (lambda segments: None)
+    recording = SegmentedRecording(path)
+    time_map = recording.load_time_map()
+    to_recording = (lambda items: items) if time_map is None else time_map.map_segments
+    options = {"backend": resolve_backend(backend).name, "model": model_size, "language": language,
+               "batched": decode_batch > 1, "overlap": overlap}
+    # Coda troppo corta per Whisper: non trascritta, resta nella sovrapposizione del precedente
+    usable = [entry["frames"] >= recording.sample_rate // 10 for entry in recording.segments]
+    context = int(overlap * WHISPER_SAMPLE_RATE)
+    total = len(recording.segments)
+    loaded = {}
+    texts = []
+    segments = []
+    for index in range(total):
+        result = recording.checkpoint(index, options)
+        if result is not None:
+            progress(f"Segmento {index + 1}/{total} già trascritto")
+            on_segments(to_recording(result["segments"]))
+        elif not usable[index]:
+            result = {"text": "", "segments": []}
+        else:
+            # Solo il segmento corrente e i vicini restano in memoria
+            needed = range(index - 1, index + 2) if context else (index,)
+            loaded = {i: loaded[i] if i in loaded else _load_segment_audio(recording.segment_path(i))
+                      for i in needed if 0 <= i < total and usable[i]}
+            audio = loaded[index]
+            lead = loaded[index - 1][-context:] if index - 1 in loaded else audio[:0]
+            trail = loaded[index + 1][:context] if index + 1 in loaded else audio[:0]
+            keep_from = len(lead) / WHISPER_SAMPLE_RATE
+            keep_to = keep_from + len(audio) / WHISPER_SAMPLE_RATE if len(trail) else float("inf")
+            offset = recording.segment_offset(index) - keep_from
+            step = f"Segmento {index + 1}/{total}"
+            result = transcribe_audio(
+                np.concatenate((lead, audio, trail)), model_size, language,
+                progress=lambda message: progress(f"{step}: {message}"), instance=instance, cache=cache,
+                decode_batch=decode_batch, backend=backend, concurrent=concurrent,
+                on_segments=lambda items: on_segments(
+                    to_recording(_shift_segments(_owned_segments(items, keep_from, keep_to), offset))))
+            owned = _owned_segments(result.get("segments", []), keep_from, keep_to)
+            result = {"text": "".join(segment["text"] for segment in owned).strip(),
+                      "segments": _shift_segments(owned, offset)}
+            recording.save_checkpoint(index, options, result)
+        texts.append(result["text"])
+        segments.extend(result["segments"])
+    return {"text": " ".join(text for text in texts if text), "segments": to_recording(segments)}
+
+
+def read_tracks(path):
+    """Legge un file multi-canale come lista di tracce float32 a 16 kHz"""
+    path = str(path)
+    if soundfile is not None and Path(path).suffix.lower() in (".wav", ".flac", ".ogg"):
+        data, sample_rate = soundfile.read(path, dtype="float32", always_2d=True)
+    else:
+        with wave.open(path, 'rb') as wf:
+            sample_rate = wf.getframerate()
+            raw = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            data = raw.reshape(-1, wf.getnchannels()).astype(np.float32) / 32768.0
+    return [_to_whisper_rate(np.ascontiguousarray(data[:, c]), sample_rate) for c in range(data.shape[1])]
+
+
+def load_track_labels(path, channels):
+    """Etichette delle tracce dal file .tracks.json accanto alla registrazione"""
+    try:
+        with open(f"{path}.tracks.json", 'r', encoding='utf-8') as f:
+            labels = json.load(f).get("labels", [])
+    except (OSError, ValueError):
+        labels = []
+    return [labels[c] if c < len(labels) else f"Traccia {c + 1}" for c in range(channels)]
+
+
+def _format_timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def merge_track_segments(results, labels):
+    """Unisce i segmenti delle tracce in ordine temporale, con etichetta della traccia"""
+    segments = []
+    for label, result in zip(labels, results):
+        for segment in result.get("segments", []):
+            text = segment["text"].strip()
+            if text:
+                segments.append({**segment, "text": text, "speaker": label})
+    segments.sort(key=lambda segment: segment["start"])
+
+    # Segmenti consecutivi della stessa traccia su una sola riga
+    lines = []
+    for segment in segments:
+        if lines and lines[-1][1] == segment["speaker"]:
+            lines[-1][2].append(segment["text"])
+        else:
+            lines.append((segment["start"], segment["speaker"], [segment["text"]]))
+    text = "\n".join(f"[{_format_timestamp(start)}] {speaker}: {' '.join(texts)}" for start, speaker, texts in lines)
+    return {"text": text, "segments": segments}
+
+
+Segment = namedtuple("Segment", ["start", "end", "text", "avg_logprob", "no_speech_prob"])
+
+
+class SegmentStore:
+    """Segmenti della trascrizione in colonne compatte: tempi e confidenze in array di double, testi in lista"""
+
+    def __init__(self, segments=()):
+        self._start = array("d")
+        self._end = array("d")
+        self._avg_logprob = array("d")
+        self._no_speech_prob = array("d")
+        self._texts = []
+        self.extend(segments)
+
+    def append(self, start, end, text, avg_logprob=0.0, no_speech_prob=0.0):
+        self._start.append(start)
+        self._end.append(end)
+        self._avg_logprob.append(avg_logprob)
+        self._no_speech_prob.append(no_speech_prob)
+        self._texts.append(text.strip())
+
+    def extend(self, segments):
+        """Aggiunge segmenti nel formato di whisper.transcribe() o Segment; ritorna quelli aggiunti"""
+        first = len(self)
+        for segment in segments:
+            if isinstance(segment, Segment):
+                self.append(*segment)
+                continue
+            text = segment["text"].strip()
+            if segment.get("speaker"):
+                text = f"{segment['speaker']}: {text}"
+            self.append(segment["start"], segment["end"], text, segment.get("avg_logprob", 0.0),
+                        segment.get("no_speech_prob", 0.0))
+        return [self[i] for i in range(first, len(self))]
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return Segment(self._start[index], self._end[index], self._texts[index],
+                       self._avg_logprob[index], self._no_speech_prob[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def text(self):
+        return " ".join(text for text in self._texts if text)
+
+    @property
+    def duration(self):
+        return self._end[-1] if self._texts else 0.0
+
+    def timestamped_text(self):
+        """Una riga per segmento: [inizio - fine] testo"""
+        return "\n".join(f"[{_format_timestamp(segment.start)} - {_format_timestamp(segment.end)}] {segment.text}"
+                         for segment in self if segment.text)
+
+    def to_dicts(self):
+        return [segment._asdict() for segment in self]
+
+
+def transcribe_tracks(path, model_size="base", language="it", progress=None, labels=None, cache=None,
+                      decode_batch=1, backend=None, instance=0):
+    """Trascrive in parallelo ogni canale di una registrazione multi-traccia
+
+    La prima traccia usa l'istanza Whisper del chiamante, le altre istanze (instance, traccia) proprie.
+    """
+    progress = progress or (lambda message: None)
+    progress("Lettura tracce...")
+    tracks = read_tracks(path)
+    labels = labels or load_track_labels(path, len(tracks))
+    logger.info(f"Trascrizione multi-traccia: {len(tracks)} tracce {labels}")
+    progress(f"Trascrizione di {len(tracks)} tracce in parallelo...")
+
+    # Un'istanza Whisper per traccia: transcribe() non è sicuro tra thread sullo stesso modello
+    with ThreadPoolExecutor(max_workers=len(tracks)) as executor:
+        futures = [executor.submit(transcribe_audio, track, model_size, language,
+                                   instance=(instance, i) if i else instance, cache=cache,
+                                   decode_batch=decode_batch, backend=backend)
+                   for i, track in enumerate(tracks)]
+        results = [future.result() for future in futures]
+    return merge_track_segments(results, labels)
+
+
+def _package_version(name):
+    """Versione installata di un pacchetto come tupla di interi (vuota se non installato)"""
+    try:
+        return tuple(int(part) for part in re.findall(r"\d+", importlib.metadata.version(name))[:3])
+    except importlib.metadata.PackageNotFoundError:
+        return ()
+
+
+GPT4ALL_VERSION = _package_version("gpt4all")
+
+
+class GenerationCancelled(RuntimeError):
+    """Generazione interrotta da LLMHost.cancel() (chiusura dell'applicazione)"""
+
+
+class LLMHost:
+    """Host persistente GPT4All: carica il modello una volta, lo riusa e lo rilascia dopo inattività"""
+
+    def __init__(self, model_name, model_dir=MODEL_CACHE_DIR, idle_timeout=LLM_IDLE_TIMEOUT, factory=None,
+                 prefix_cache=LLM_PREFIX_CACHE):
+        self.model_name = model_name
+        self.model_dir = Path(model_dir)
+        self.idle_timeout = idle_timeout
+        low, high = LLM_PREFIX_GPT4ALL_VERSIONS
+        if prefix_cache and not low <= GPT4ALL_VERSION < high:
+            logger.info(f"Riuso del prefisso disattivato: gpt4all {'.'.join(map(str, GPT4ALL_VERSION))} "
+                        f"non verificata (supportate {low[0]}.{low[1]}.x)")
+            prefix_cache = False
+        self.prefix_cache = prefix_cache
+        self._factory = factory or self._create_model
+        self._model = None
+        # Prefisso valutato per ultimo e i suoi token: lo stato KV corrispondente resta nel contesto
+        self._prefix = None
+        self.prefix_stats = {"hits": 0, "misses": 0, "saved_tokens": 0}
+        # GPT4All non è thread-safe: load/generate/release serializzati
+        self._lock = threading.RLock()
+        self._active = 0
+        self._last_used = time.monotonic()
+        self._idle_timer = None
+        self._warmup_thread = None
+        # Richiesta di stop cooperativo: controllata dalla callback di GPT4All a ogni token
+        self._cancelled = threading.Event()
+
+    @property
+    def model_path(self):
+        return self.model_dir / self.model_name
+
+    def is_loaded(self):
+        return self._model is not None
+
+    def _create_model(self):
+        return GPT4All(
+            model_name=self.model_name,
+            model_path=str(self.model_dir),
+            allow_download=True
+        )
+
+    def _ensure_loaded(self):
+        # Chiamare con self._lock acquisito
+        if self._model is None:
+            logger.info(f"Caricamento modello GPT4All {self.model_name}...")
+            with metrics.span("llm.load", model=self.model_name) as span:
+                self._model = self._factory()
+            logger.info(f"Modello GPT4All caricato in {span['seconds']:.1f}s")
+        return self._model
+
+    def load(self):
+        """Carica il modello in modo sincrono (no-op se già residente)"""
+        with self._lock:
+            self._ensure_loaded()
+            self._last_used = time.monotonic()
+        self._schedule_release()
+
+    def warmup(self):
+        """Carica il modello in un thread di background, senza bloccare il chiamante"""
+        if self.is_loaded() or (self._warmup_thread and self._warmup_thread.is_alive()):
+            return
+        self._warmup_thread = threading.Thread(target=self._warmup, name=f"llm-warmup-{self.model_name}", daemon=True)
+        self._warmup_thread.start()
+
+    def _warmup(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.warning(f"Warmup GPT4All fallito: {e}")
+
+    def generate(self, prompt, on_token=None, prefix=None, **kwargs):
+        """Genera una risposta usando il modello residente (caricandolo se necessario)
+
+        on_token riceve ogni token appena generato; se ritorna True la generazione si ferma.
+        prefix è la parte fissa iniziale del prompt: il suo stato KV viene riusato tra chiamate.
+        """
+        with self._lock:
+            self._active += 1
+            try:
+                if self._cancelled.is_set():
+                    raise GenerationCancelled(f"Generazione {self.model_name} interrotta")
+                model = self._ensure_loaded()
+                response = self._generate_timed(model, prompt, on_token, prefix, **kwargs)
+                if self._cancelled.is_set():
+                    raise GenerationCancelled(f"Generazione {self.model_name} interrotta")
+                return response
+            finally:
+                self._active -= 1
+                self._last_used = time.monotonic()
+                self._schedule_release()
+
+    def _generate_timed(self, model, prompt, on_token=None, prefix=None, **kwargs):
+        # In streaming il primo token separa la valutazione del prompt dalla generazione
+        with metrics.span("llm.generate", model=self.model_name, prompt_tokens=estimate_tokens(prompt),
+                          max_tokens=kwargs.get("max_tokens")) as span:
+            stopped = threading.Event()
+            # GPT4All interrompe la generazione quando la callback ritorna False
+            kwargs["callback"] = lambda token_id, response: not (stopped.is_set() or self._cancelled.is_set())
+            start = time.perf_counter()
+            output = None
+            if prefix and self.prefix_cache and prompt.startswith(prefix) and self._supports_prefix(model):
+                try:
+                    output = self._generate_after_prefix(model.model, prefix, prompt[len(prefix):], span, **kwargs)
+                except (AttributeError, TypeError, ValueError, RuntimeError) as e:
+                    # API interna cambiata: si torna alla generazione completa per questo host
+                    logger.warning(f"Riuso del prefisso non riuscito, disattivato: {e}")
+                    self.prefix_cache = False
+                    self._prefix = None
+                    span["prefix_cache"] = "error"
+            if output is None:
+                output = model.generate(prompt, streaming=True, **kwargs)
+            if isinstance(output, str):
+                # Backend senza streaming: solo tempo totale
+                span["tokens"] = estimate_tokens(output)
+                if on_token is not None:
+                    on_token(output)
+                return output
+            tokens = []
+            first_token_at = None
+            for token in output:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                tokens.append(token)
+                if self._cancelled.is_set() or (on_token is not None and on_token(token)):
+                    stopped.set()
+                    break
+            end = time.perf_counter()
+            for _ in output:
+                pass  # attende la fine della chiamata nativa prima di riusare il contesto
+            span["tokens"] = len(tokens)
+            span["stopped_early"] = stopped.is_set()
+            if first_token_at is not None:
+                span["prompt_seconds"] = round(first_token_at - start, 4)
+                generation = end - first_token_at
+                span["generation_seconds"] = round(generation, 4)
+                if generation > 0 and len(tokens) > 1:
+                    span["tokens_per_second"] = round((len(tokens) - 1) / generation, 2)
+            metrics.count("llm.tokens", len(tokens))
+            return "".join(tokens)
+
+    @staticmethod
+    def _supports_prefix(model):
+        """Il riuso del prefisso richiede il contesto llmodel di GPT4All, fuori da una chat_session"""
+        llmodel = getattr(model, "model", None)
+        return (hasattr(llmodel, "prompt_model_streaming") and hasattr(llmodel, "context")
+                and getattr(model, "_history", None) is None)
+
+    def _generate_after_prefix(self, llmodel, prefix, suffix, span, callback=None, **kwargs):
+        """Ripristina (o valuta) lo stato KV del prefisso e genera valutando solo il suffisso"""
+        options = {**LLM_SAMPLING_DEFAULTS, **kwargs}
+        reused = self._restore_prefix(llmodel, prefix, options["n_batch"])
+        stats = self.prefix_stats
+        stats["hits" if reused else "misses"] += 1
+        stats["saved_tokens"] += reused
+        metrics.count("llm.prefix_cache.hits" if reused else "llm.prefix_cache.misses")
+        metrics.count("llm.prefix_cache.saved_tokens", reused)
+        span["prefix_cache"] = "hit" if reused else "miss"
+        span["prefix_tokens_saved"] = reused
+        span["prefix_hit_rate"] = round(stats["hits"] / (stats["hits"] + stats["misses"]), 3)
+        options["n_predict"] = options.pop("max_tokens")
+        return llmodel.prompt_model_streaming(suffix, "%1", callback or (lambda token_id, response: True),
+                                              reset_context=False, **options)
+
+    def _restore_prefix(self, llmodel, prefix, n_batch):
+        """Riporta n_past alla fine del prefisso; ritorna i token riusati (0 se è stato rivalutato)"""
+        context = llmodel.context
+        if self._prefix is not None and self._prefix[0] == prefix and context is not None:
+            tokens = self._prefix[1]
+            # I token in contesto cambiano se la generazione precedente ha fatto scorrere la finestra
+            if context.tokens_size >= len(tokens) and tuple(context.tokens[:len(tokens)]) == tokens:
+                context.n_past = len(tokens)
+                return len(tokens)
+        # "%1%2" come GPT4All per il system prompt: nessuno spazio aggiunto dopo il prefisso
+        llmodel.prompt_model(prefix, "%1%2", lambda token_id, response: True, n_predict=0, n_batch=n_batch,
+                             reset_context=True)
+        context = llmodel.context
+        self._prefix = (prefix, tuple(context.tokens[:context.n_past]))
+        return 0
+
+    def release(self):
+        """Rilascia il modello per restituire RAM al sistema"""
+        with self._lock:
+            if self._model is None:
+                return
+            close = getattr(self._model, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Errore chiusura GPT4All: {e}")
+            self._model = None
+            self._prefix = None
+            logger.info(f"Modello GPT4All {self.model_name} rilasciato")
+
+    def _schedule_release(self):
+        if not self.idle_timeout or self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self._idle_timer = threading.Timer(self.idle_timeout, self._release_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _release_if_idle(self):
+        with self._lock:
+            idle_for = time.monotonic() - self._last_used
+            if self._active == 0 and idle_for >= self.idle_timeout:
+                logger.info(f"GPT4All inattivo da {idle_for:.0f}s, rilascio modello")
+                self.release()
+
+    def cancel(self):
+        """Ferma la generazione in corso al prossimo token; le successive falliscono fino a shutdown()"""
+        self._cancelled.set()
+
+    def shutdown(self, timeout=LLM_SHUTDOWN_TIMEOUT):
+        """Interrompe le generazioni e rilascia il modello; ritorna False se l'host resta occupato"""
+        self.cancel()
+        # Una generazione nativa che non risponde allo stop non deve bloccare la chiusura
+        if not self._lock.acquire(timeout=timeout):
+            logger.warning(f"GPT4All {self.model_name} ancora occupato dopo {timeout:.0f}s, rilascio saltato")
+            return False
+        try:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self.release()
+            self._cancelled.clear()
+        finally:
+            self._lock.release()
+        return True
+
+
+_llm_hosts = {}
+_llm_hosts_lock = threading.Lock()
+
+
+def get_llm_host(model_name=DEFAULT_LLM_MODEL, slot=0):
+    """Ritorna l'host GPT4All condiviso per model_name (slot > 0 per istanze parallele)"""
+    with _llm_hosts_lock:
+        host = _llm_hosts.get((model_name, slot))
+        if host is None:
+            host = LLMHost(model_name)
+            _llm_hosts[(model_name, slot)] = host
+        return host
+
+
+def shutdown_llm_hosts():
+    """Rilascia tutti i modelli GPT4All residenti, saltando quelli ancora occupati"""
+    with _llm_hosts_lock:
+        hosts = list(_llm_hosts.values())
+    # Prima ferma tutte le generazioni, poi attende ogni host
+    for host in hosts:
+        host.cancel()
+    for host in hosts:
+        host.shutdown()
+
+
+# Chunk audio per la trascrizione live: offset e finestra "posseduta" in secondi relativi al chunk;
+# time_map (VAD) riporta i tempi dell'audio senza silenzi a quelli della registrazione
+AudioChunk = namedtuple("AudioChunk", ["audio", "sample_rate", "offset", "keep_from", "keep_to", "time_map"],
+                        defaults=(None,))
+
+
+class AudioChunker:
+    """Divide un flusso di campioni float32 in chunk di lunghezza fissa con sovrapposizione"""
+
+    def __init__(self, sample_rate, chunk_seconds=STREAM_CHUNK_SECONDS, overlap_seconds=STREAM_OVERLAP_SECONDS):
+        self.sample_rate = sample_rate
+        self.chunk_len = int(chunk_seconds * sample_rate)
+        self.overlap = int(overlap_seconds * sample_rate)
+        if not 0 <= self.overlap < self.chunk_len:
+            raise ValueError("La sovrapposizione deve essere minore della durata del chunk")
+        self.step = self.chunk_len - self.overlap
+        # Buffer preallocato: niente concatenazioni ripetute a ogni blocco
+        self._buffer = np.zeros(self.chunk_len, dtype=np.float32)
+        self._fill = 0
+        self._start = 0  # posizione globale (campioni) del primo campione nel buffer
+        self.time_map = None  # TimeMap del VAD, allegata a ogni chunk
+
+    def _make_chunk(self, audio, final):
+        half_overlap = self.overlap / 2 / self.sample_rate
+        keep_from = half_overlap if self._start > 0 else 0.0
+        keep_to = float("inf") if final else (self.chunk_len / self.sample_rate) - half_overlap
+        return AudioChunk(audio, self.sample_rate, self._start / self.sample_rate, keep_from, keep_to,
+                          self.time_map)
+
+    def push(self, samples):
+        """Aggiunge campioni e ritorna la lista dei chunk completi"""
+        chunks = []
+        pos = 0
+        while pos < len(samples):
+            n = min(len(samples) - pos, self.chunk_len - self._fill)
+            self._buffer[self._fill:self._fill + n] = samples[pos:pos + n]
+            self._fill += n
+            pos += n
+            if self._fill == self.chunk_len:
+                chunks.append(self._make_chunk(self._buffer.copy(), final=False))
+                # La coda del chunk diventa l'inizio del successivo
+                self._buffer[:self.overlap] = self._buffer[self.step:]
+                self._fill = self.overlap
+                self._start += self.step
+        return chunks
+
+    def flush(self):
+        """Ritorna l'ultimo chunk parziale (o None se già coperto dal precedente)"""
+        already_owned = self.overlap // 2 if self._start > 0 else 0
+        if self._fill <= already_owned:
+            return None
+        chunk = self._make_chunk(self._buffer[:self._fill].copy(), final=True)
+        self._fill = 0
+        return chunk
+
+
+def _to_whisper_rate(audio, sample_rate):
+    """Ricampiona audio float32 a 16 kHz se necessario"""
+    if sample_rate == WHISPER_SAMPLE_RATE:
+        return audio
+    g = gcd(int(sample_rate), WHISPER_SAMPLE_RATE)
+    return resample_poly(audio, WHISPER_SAMPLE_RATE // g, int(sample_rate) // g).astype(np.float32)
+
+
+def _pcm16_to_float(data):
+    return np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _float_to_pcm16(samples):
+    return (np.clip(samples, -1.0, 32767 / 32768) * 32768.0).astype(np.int16).tobytes()
+
+
+def native_capture_rate(device_info, fallback):
+    """Sample rate di default del dispositivo, o fallback se non dichiarato"""
+    rate = device_info.get('defaultSampleRate') if isinstance(device_info, dict) else None
+    return int(rate) if rate else int(fallback)
+
+
+class StreamResampler:
+    """Resampler polifase a blocchi con storia tra un blocco e l'altro
+
+    Usa lo stesso filtro FIR di resample_poly (firwin, finestra Kaiser) e ne riproduce
+    l'uscita compensando il ritardo di gruppo: la concatenazione dei blocchi più flush()
+    coincide con resample_poly applicato all'intero segnale.
+    """
+
+    def __init__(self, in_rate, out_rate=WHISPER_SAMPLE_RATE, half_len_factor=10):
+        g = gcd(int(in_rate), int(out_rate))
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        self.up = self.out_rate // g
+        self.down = self.in_rate // g
+        max_rate = max(self.up, self.down)
+        half_len = half_len_factor * max_rate
+        taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * self.up
+        self.delay = half_len
+        # Banco polifase: riga p = coefficienti della fase p, in ordine crescente di campione
+        self.taps_per_phase = -(-len(taps) // self.up)
+        taps = np.pad(taps, (0, self.taps_per_phase * self.up - len(taps)))
+        self.bank = np.ascontiguousarray(taps.reshape(self.taps_per_phase, self.up).T[:, ::-1], dtype=np.float32)
+        # Campioni di ingresso ancora necessari; _base è l'indice assoluto di _buffer[0]
+        self._buffer = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self._base = -(self.taps_per_phase - 1)
+        self._next_output = 0
+        self.input_samples = 0
+
+    def _last_input(self, outputs):
+        """Indice dell'ultimo campione di ingresso usato dalle uscite indicate"""
+        return (outputs * self.down + self.delay) // self.up
+
+    def _produce(self, end):
+        if end <= self._next_output:
+            return np.empty(0, dtype=np.float32)
+        outputs = np.arange(self._next_output, end)
+        positions = outputs * self.down + self.delay
+        last = positions // self.up
+        windows = sliding_window_view(self._buffer, self.taps_per_phase)
+        rows = windows[last - (self.taps_per_phase - 1) - self._base]
+        result = np.einsum('nk,nk->n', rows, self.bank[positions % self.up]).astype(np.float32)
+        self._next_output = end
+        # Scarta i campioni che nessuna uscita futura userà
+        keep_from = int(self._last_input(end)) - (self.taps_per_phase - 1) - self._base
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._base += keep_from
+        return result
+
+    def process(self, samples):
+        """Ricampiona un blocco float32; ritorna le uscite già calcolabili"""
+        samples = np.asarray(samples, dtype=np.float32)
+        self._buffer = np.concatenate((self._buffer, samples))
+        self.input_samples += len(samples)
+        # Uscite il cui ultimo campione di ingresso è già disponibile
+        end = (self.input_samples * self.up - 1 - self.delay) // self.down + 1
+        return self._produce(max(end, 0))
+
+    def flush(self):
+        """Completa il segnale (coda del filtro su zeri), come resample_poly"""
+        total = -(-self.input_samples * self.up // self.down)
+        if total <= self._next_output:
+            return np.empty(0, dtype=np.float32)
+        needed = int(self._last_input(total - 1)) + 1 - (self._base + len(self._buffer))
+        if needed > 0:
+            self._buffer = np.concatenate((self._buffer, np.zeros(needed, dtype=np.float32)))
+        return self._produce(total)
+
+
+class TimeMap:
+    """Mappa i tempi dell'audio compresso (silenzi rimossi) sui tempi della registrazione originale"""
+
+    def __init__(self, sample_rate, started_at=None, entries=None):
+        self.sample_rate = sample_rate
+        self.started_at = started_at or datetime.now()
+        # (campione in output, campione in input) all'inizio di ogni tratto continuo
+        self.entries = entries or [(0, 0)]
+
+    def add(self, output_sample, input_sample):
+        self.entries.append((output_sample, input_sample))
+
+    def to_input_seconds(self, output_seconds):
+        """Secondi nell'audio salvato -> secondi dall'inizio della registrazione"""
+        out = output_seconds * self.sample_rate
+        index = bisect_right([e[0] for e in self.entries], out) - 1
+        out_start, in_start = self.entries[max(index, 0)]
+        return (in_start + out - out_start) / self.sample_rate
+
+    def to_wall_clock(self, output_seconds):
+        return self.started_at + timedelta(seconds=self.to_input_seconds(output_seconds))
+
+    def map_segments(self, segments):
+        """Segmenti Whisper (dict) con start/end riportati ai secondi della registrazione"""
+        return [{**segment, "start": round(self.to_input_seconds(segment["start"]), 2),
+                 "end": round(self.to_input_seconds(segment["end"]), 2)} for segment in segments]
+
+    def save(self, path):
+        _write_json_atomic(path, {
+            "sample_rate": self.sample_rate,
+            "started_at": self.started_at.isoformat(),
+            "entries": self.entries
+        })
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["sample_rate"], datetime.fromisoformat(data["started_at"]),
+                   [tuple(e) for e in data["entries"]])
+
+
+class VoiceActivityGate:
+    """Gate energetico sui blocchi int16: scarta i silenzi lunghi mantenendo la TimeMap"""
+
+    def __init__(self, sample_rate, keep_silence_seconds=VAD_KEEP_SILENCE_SECONDS,
+                 speech_ratio=VAD_SPEECH_RATIO, min_rms=VAD_MIN_RMS):
+        self.sample_rate = sample_rate
+        self.keep_silence = int(keep_silence_seconds * sample_rate)
+        self.speech_ratio = speech_ratio
+        self.min_rms = min_rms
+        self.noise_rms = min_rms
+        self.time_map = TimeMap(sample_rate)
+        self.input_samples = 0
+        self.output_samples = 0
+        self._silence_run = 0
+        self._dropping = False
+        # Ultimi blocchi scartati: reinseriti prima del parlato per non tagliarne l'attacco
+        self._preroll = deque()
+        self._preroll_samples = 0
+
+    def is_speech(self, samples):
+        rms = float(np.sqrt(np.mean(np.square(samples.astype(np.float32) / 32768.0)))) if len(samples) else 0.0
+        speech = rms > max(self.noise_rms * self.speech_ratio, self.min_rms)
+        if not speech:
+            # Rumore di fondo: scende subito, sale lentamente
+            weight = 0.5 if rms < self.noise_rms else 0.05
+            self.noise_rms = max((1 - weight) * self.noise_rms + weight * rms, 1e-6)
+        return speech
+
+    def process(self, data):
+        """Ritorna la lista dei blocchi da scrivere per il blocco int16 in ingresso"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        block_start = self.input_samples
+        self.input_samples += len(samples)
+
+        if self.is_speech(samples):
+            blocks = []
+            if self._dropping:
+                # Ripresa dopo un silenzio scartato: nuovo tratto nella TimeMap
+                self.time_map.add(self.output_samples, block_start - self._preroll_samples)
+                blocks.extend(self._preroll)
+                self._dropping = False
+            self._clear_preroll()
+            self._silence_run = 0
+            blocks.append(data)
+            self.output_samples += sum(len(b) for b in blocks) // 2
+            return blocks
+
+        self._silence_run += len(samples)
+        if self._silence_run <= self.keep_silence:
+            # Pausa breve: mantenuta
+            self.output_samples += len(samples)
+            return [data]
+
+        self._dropping = True
+        self._preroll.append(data)
+        self._preroll_samples += len(samples)
+        while self._preroll and self._preroll_samples - len(self._preroll[0]) // 2 >= self.keep_silence // 2:
+            self._preroll_samples -= len(self._preroll.popleft()) // 2
+        return []
+
+    def _clear_preroll(self):
+        self._preroll.clear()
+        self._preroll_samples = 0
+
+    @property
+    def dropped_seconds(self):
+        return (self.input_samples - self.output_samples) / self.sample_rate
+
+
+class AudioBuffer:
+    """Buffer float32 preallocato per la registrazione in memoria, con spill su memmap oltre soglia"""
+
+    def __init__(self, sample_rate, initial_seconds=600, max_memory_bytes=MEMORY_BUFFER_MAX_BYTES):
+        self.sample_rate = sample_rate
+        self.max_memory_samples = max(1, max_memory_bytes // 4)
+        capacity = min(int(initial_seconds * sample_rate), self.max_memory_samples)
+        self._data = np.empty(max(capacity, 1), dtype=np.float32)
+        self.length = 0
+        self.spill_path = None
+        self.time_map = None  # TimeMap del VAD: tempi dell'audio senza silenzi -> tempi della registrazione
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    def append(self, data):
+        """Aggiunge un blocco int16 (bytes) o float32, convertendolo direttamente nel buffer"""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(data, dtype=np.int16)
+            scale = 1.0 / 32768.0
+        else:
+            samples = data
+            scale = 1.0
+        end = self.length + len(samples)
+        if end > self.capacity:
+            self._grow(end)
+        np.multiply(samples, scale, out=self._data[self.length:end], casting='unsafe')
+        self.length = end
+
+    def _grow(self, needed):
+        new_capacity = max(needed, self.capacity * 2)
+        if self.spill_path is None and new_capacity <= self.max_memory_samples:
+            data = np.empty(new_capacity, dtype=np.float32)
+            data[:self.length] = self._data[:self.length]
+            self._data = data
+            return
+
+        if self.spill_path is None:
+            # Spill su disco: la RAM resta limitata anche per registrazioni molto lunghe
+            spill = tempfile.NamedTemporaryFile(delete=False, suffix='.f32')
+            spill.close()
+            self.spill_path = spill.name
+            _temp_files.append(self.spill_path)
+            logger.info(f"Buffer audio oltre {self.max_memory_samples * 4 / 1024 / 1024:.0f} MB, "
+                        f"spill su {self.spill_path}")
+            old = self._data[:self.length]
+        else:
+            old = None
+            self._data.flush()
+            del self._data
+
+        # Estende il file e lo rimappa: i dati già su disco non vengono copiati
+        with open(self.spill_path, 'r+b') as f:
+            f.truncate(new_capacity * 4)
+        self._data = np.memmap(self.spill_path, dtype=np.float32, mode='r+', shape=(new_capacity,))
+        if old is not None:
+            self._data[:self.length] = old
+
+    def view(self):
+        """Audio registrato come array float32 (vista, senza copia)"""
+        return self._data[:self.length]
+
+    def close(self):
+        """Libera la memoria ed elimina l'eventuale file di spill"""
+        self._data = np.empty(0, dtype=np.float32)
+        self.length = 0
+        if self.spill_path and os.path.exists(self.spill_path):
+            try:
+                os.remove(self.spill_path)
+            except OSError as e:
+                logger.warning(f"Impossibile rimuovere {self.spill_path}: {e}")
+        self.spill_path = None
+
+
+def resolve_recording_format(audio_format):
+    """Formato effettivo: i formati compressi ricadono su WAV se soundfile manca"""
+    audio_format = (audio_format or "wav").lower()
+    if audio_format not in RECORDING_FORMATS:
+        logger.warning(f"Formato di registrazione non supportato: {audio_format}, uso WAV")
+        return "wav"
+    if RECORDING_FORMATS[audio_format][0] is not None and soundfile is None:
+        logger.warning(f"Formato {audio_format} richiede il pacchetto soundfile, uso WAV")
+        return "wav"
+    return audio_format
+
+
+class SoundFileWriter:
+    """Encoder FLAC/Opus in streaming con la stessa interfaccia di wave.Wave_write"""
+
+    def __init__(self, path, sample_rate, audio_format, channels=1):
+        container, subtype, _ = RECORDING_FORMATS[audio_format]
+        self.channels = channels
+        self._file = soundfile.SoundFile(str(path), 'w', samplerate=sample_rate, channels=channels,
+                                         format=container, subtype=subtype)
+
+    def writeframes(self, data):
+        # Frame interlacciati int16, come wave.Wave_write
+        self._file.write(np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _write_json_atomic(path, data):
+    """Scrive JSON su un file temporaneo e lo rinomina: dopo un crash il file è il vecchio o il nuovo, mai a metà"""
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_file(path):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+def _repair_wav(path):
+    """Corregge le dimensioni nell'header di un WAV PCM mono non chiuso; ritorna i frame utilizzabili"""
+    size = os.path.getsize(path)
+    if size <= 44:
+        return 0
+    data_bytes = (size - 44) // 2 * 2
+    with open(path, 'r+b') as f:
+        f.seek(4)
+        f.write(struct.pack('<I', 36 + data_bytes))
+        f.seek(40)
+        f.write(struct.pack('<I', data_bytes))
+        f.truncate(44 + data_bytes)
+    return data_bytes // 2
+
+
+class SegmentedRecording:
+    """Registrazione in una directory di segmenti di lunghezza fissa con manifest JSON
+
+    Ha la stessa interfaccia di wave.Wave_write: ogni segmento pieno viene chiuso, sincronizzato su
+    disco e aggiunto al manifest con una scrittura atomica. Dopo un crash recover() recupera il
+    segmento rimasto aperto. Accanto ai segmenti vengono salvati i checkpoint della trascrizione.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / RECORDING_MANIFEST, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.sample_rate = self.manifest["sample_rate"]
+        self.audio_format = self.manifest["format"]
+        self.segment_frames = int(self.manifest["segment_seconds"] * self.sample_rate)
+        self._writer = None
+        self._frames = 0  # frame scritti nel segmento aperto
+        self.time_map = None  # TimeMap del VAD, salvata insieme al manifest
+
+    @classmethod
+    def create(cls, directory, sample_rate, audio_format="wav", segment_seconds=RECORDING_SEGMENT_SECONDS):
+        """Crea una nuova registrazione vuota in directory"""
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        path = Path(tempfile.mkdtemp(prefix=datetime.now().strftime("%Y%m%d-%H%M%S-"), dir=str(directory)))
+        _write_json_atomic(path / RECORDING_MANIFEST, {
+            "sample_rate": sample_rate,
+            "format": audio_format,
+            "segment_seconds": segment_seconds,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "segments": [],
+            "complete": False
+        })
+        return cls(path)
+
+    @staticmethod
+    def is_recording(path):
+        """True se path è la directory di una registrazione a segmenti"""
+        return isinstance(path, (str, Path)) and os.path.isfile(os.path.join(path, RECORDING_MANIFEST))
+
+    @property
+    def segments(self):
+        return self.manifest["segments"]
+
+    @property
+    def complete(self):
+        return self.manifest["complete"]
+
+    @property
+    def duration(self):
+        return sum(segment["frames"] for segment in self.segments) / self.sample_rate
+
+    def segment_path(self, index):
+        return self.path / f"{index:05d}{RECORDING_FORMATS[self.audio_format][2]}"
+
+    def segment_offset(self, index):
+        """Secondi dall'inizio della registrazione all'inizio del segmento"""
+        return sum(segment["frames"] for segment in self.segments[:index]) / self.sample_rate
+
+    def writeframes(self, data):
+        """Scrive frame int16 mono, passando al segmento successivo a ogni segment_frames"""
+        while data:
+            if self._writer is None:
+                self._open_segment()
+            frames = len(data) // 2
+            if self.segment_frames > 0:
+                frames = min(frames, self.segment_frames - self._frames)
+            self._writer.writeframes(data[:frames * 2])
+            self._frames += frames
+            data = data[frames * 2:]
+            if self._frames == self.segment_frames:
+                self._close_segment()
+
+    def _open_segment(self):
+        path = self.segment_path(len(self.segments))
+        if self.audio_format == "wav":
+            self._writer = wave.open(str(path), 'wb')
+            self._writer.setnchannels(1)
+            self._writer.setsampwidth(2)
+            self._writer.setframerate(self.sample_rate)
+        else:
+            self._writer = SoundFileWriter(path, self.sample_rate, self.audio_format)
+        self._frames = 0
+
+    def _close_segment(self):
+        path = self.segment_path(len(self.segments))
+        self._writer.close()
+        self._writer = None
+        _fsync_file(path)
+        self.segments.append({"file": path.name, "frames": self._frames})
+        self._save_manifest()
+        logger.debug(f"Segmento {path.name} chiuso, {self._frames / self.sample_rate:.1f}s")
+
+    def _save_manifest(self):
+        if self.time_map is not None:
+            self.time_map.save(self.path / RECORDING_TIMEMAP)
+        _write_json_atomic(self.path / RECORDING_MANIFEST, self.manifest)
+
+    def load_time_map(self):
+        """TimeMap del VAD per riportare i tempi dei segmenti alla registrazione originale (None senza VAD)"""
+        try:
+            return TimeMap.load(self.path / RECORDING_TIMEMAP)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Mappa dei tempi illeggibile in {self.path}: {e}")
+            return None
+
+    def close(self):
+        """Chiude il segmento aperto e segna la registrazione come completa"""
+        if self._writer is not None:
+            self._close_segment()
+        self.manifest["complete"] = True
+        self._save_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def recover(self):
+        """Dopo un crash: aggiunge al manifest il segmento rimasto aperto, se leggibile, e lo chiude"""
+        path = self.segment_path(len(self.segments))
+        if path.exists():
+            frames = self._recover_segment(path)
+            if frames:
+                self.segments.append({"file": path.name, "frames": frames})
+                logger.info(f"Recuperato il segmento aperto {path}: {frames / self.sample_rate:.1f}s")
+            else:
+                os.remove(path)
+        self.manifest["complete"] = True
+        self._save_manifest()
+
+    def _recover_segment(self, path):
+        if self.audio_format == "wav":
+            return _repair_wav(path)
+        if soundfile is None:
+            logger.warning(f"Segmento {path} non recuperabile senza soundfile")
+            return 0
+        try:
+            return soundfile.info(str(path)).frames
+        except RuntimeError as e:
+            logger.warning(f"Segmento {path} non recuperabile: {e}")
+            return 0
+
+    def _checkpoint_path(self, index):
+        return self.path / f"{index:05d}.transcript.json"
+
+    def checkpoint(self, index, options):
+        """Trascrizione salvata del segmento, se fatta con le stesse opzioni (altrimenti None)"""
+        try:
+            with open(self._checkpoint_path(index), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint illeggibile {self._checkpoint_path(index)}: {e}")
+            return None
+        return data if data.get("options") == options else None
+
+    def save_checkpoint(self, index, options, result):
+        _write_json_atomic(self._checkpoint_path(index), {"options": options, **result})
+
+
+class CaptureQueue:
+    """Coda limitata tra la callback PyAudio e il thread di scrittura, con contatori di perdita
+
+    push() è chiamata dal thread audio di PortAudio e non blocca mai: se il writer è in
+    stallo (disco lento, macchina carica) i blocchi in eccesso vengono scartati e contati.
+    """
+
+    def __init__(self, max_blocks=CAPTURE_QUEUE_BLOCKS):
+        self.max_blocks = max_blocks
+        self._queue = queue.Queue(max_blocks)
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.high_water = 0
+        self.input_overflows = 0
+
+    def push(self, data, frames, status=0):
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.dropped_frames += frames
+            return False
+        depth = self._queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def get(self, timeout=None):
+        """Prossimo blocco, o None se nessun blocco arriva entro timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """Blocchi rimasti in coda (dopo lo stop dello stream)"""
+        while True:
+            try:
+                yield self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        return {"dropped_blocks": self.dropped_blocks, "dropped_frames": self.dropped_frames,
+                "queue_high_water": self.high_water, "queue_capacity": self.max_blocks,
+                "input_overflows": self.input_overflows}
+
+
+class AudioRecorder(QThread):
+    """Thread per registrazione audio - Fixed: resource leaks, memory leak, race condition"""
+    finished = pyqtSignal(str)
+    buffer_ready = pyqtSignal(object)
+    error = pyqtSignal(str)
+    live_stopped = pyqtSignal(str)  # trascrizione live abbandonata perché non tiene il passo
+
+    def __init__(self, device_index, sample_rate=16000, chunk_queue=None, vad=False, in_memory=False,
+                 audio_format=RECORDING_FORMAT, capture_rate=CAPTURE_RATE, recording_dir=RECORDINGS_DIR,
+                 segment_seconds=RECORDING_SEGMENT_SECONDS):
+        super().__init__()
+        self.device_index = device_index
+        # sample_rate è il rate di uscita (file, VAD, chunk); capture_rate quello del device
+        self.sample_rate = sample_rate
+        self.capture_rate = capture_rate
+        self.resampler = None
+        # WAV o encoding compresso in streaming (FLAC/Opus)
+        self.audio_format = resolve_recording_format(audio_format)
+        # Registrazione su disco: segmenti di segment_seconds in una sottodirectory di recording_dir
+        self.recording_dir = recording_dir
+        self.segment_seconds = segment_seconds
+        # FIX #4: Thread-safe stop event invece di bool
+        self.stop_event = threading.Event()
+        # Trascrizione live: i chunk audio vengono accodati per StreamingTranscriber
+        self.chunk_queue = chunk_queue
+        self.chunker = AudioChunker(sample_rate) if chunk_queue is not None else None
+        self.live_stop_event = threading.Event()
+        # VAD: i silenzi lunghi non vengono scritti né trascritti
+        self.vad_gate = VoiceActivityGate(sample_rate) if vad else None
+        # Registrazione in memoria: nessun WAV, l'array va direttamente a Whisper
+        self.audio_buffer = AudioBuffer(sample_rate) if in_memory else None
+        if self.vad_gate is not None:
+            # Timestamp riportati al wall clock anche in memoria e nella trascrizione live
+            for target in (self.audio_buffer, self.chunker):
+                if target is not None:
+                    target.time_map = self.vad_gate.time_map
+        # Callback mode: PortAudio accoda i blocchi, questo thread li scrive
+        self.capture = CaptureQueue()
+        self.write_seconds = 0.0
+
+    def run(self):
+        p = None
+        stream = None
+        temp_path = None
+
+        try:
+            logger.info(f"Avvio registrazione, device {self.device_index}, sample_rate {self.sample_rate}")
+
+            p = pyaudio.PyAudio()
+
+            # Verifica che il device sia valido
+            try:
+                device_info = p.get_device_info_by_index(self.device_index)
+                if device_info['maxInputChannels'] == 0:
+                    raise ValueError(f"Device {self.device_index} non ha canali di input")
+            except (ValueError, OSError) as e:
+                raise ValueError(f"Device audio non valido: {e}")
+
+            # Cattura al rate nativo: niente errori di apertura né resampling del driver
+            capture_rate = self.capture_rate or native_capture_rate(device_info, self.sample_rate)
+            if capture_rate != self.sample_rate:
+                self.resampler = StreamResampler(capture_rate, self.sample_rate)
+                logger.info(f"Cattura a {capture_rate} Hz, ricampionamento a {self.sample_rate} Hz")
+
+            stream = p.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=capture_rate,
+                input=True,
+                input_device_index=self.device_index,
+                frames_per_buffer=CAPTURE_BLOCK_FRAMES * capture_rate // self.sample_rate,
+                stream_callback=self._on_audio
+            )
+
+            with contextlib.ExitStack() as stack:
+                wf = None
+                if self.audio_buffer is None:
+                    # FIX #3: Scrivi direttamente su file invece di accumulare in memoria
+                    # Segmenti WAV/FLAC/Opus con manifest: non vengono rimossi all'uscita e
+                    # sopravvivono a un crash (recuperati dalla coda al riavvio)
+                    wf = stack.enter_context(SegmentedRecording.create(self.recording_dir, self.sample_rate,
+                                                                       self.audio_format, self.segment_seconds))
+                    temp_path = str(wf.path)
+                    if self.vad_gate is not None:
+                        # Mappa tempi accanto ai segmenti per riportare i timestamp al wall clock
+                        wf.time_map = self.vad_gate.time_map
+                    logger.info(f"Registrazione a segmenti in: {temp_path}")
+
+                # FIX #4: Usa stop_event invece di bool
+                # FIX #3: Scrivi direttamente, nessun accumulo in memoria
+                frames_written = 0
+                started = time.perf_counter()
+                while not self.stop_event.is_set():
+                    data = self.capture.get(timeout=0.1)
+                    if data is not None:
+                        frames_written += self._write_timed(wf, data)
+                    elif not stream.is_active():
+                        raise IOError("Stream audio interrotto dal dispositivo")
+
+                # Ferma la callback e scrivi i blocchi ancora in coda
+                stream.stop_stream()
+                for data in self.capture.drain():
+                    frames_written += self._write_timed(wf, data)
+                if self.resampler is not None:
+                    frames_written += self._write_block(wf, _float_to_pcm16(self.resampler.flush()))
+
+            if self.chunker is not None and not self.live_stop_event.is_set():
+                last_chunk = self.chunker.flush()
+                if last_chunk is not None:
+                    self._queue_chunk(last_chunk, block=True)
+
+            if self.vad_gate is not None:
+                logger.info(f"VAD: rimossi {self.vad_gate.dropped_seconds:.1f}s di silenzio "
+                            f"su {self.vad_gate.input_samples / self.sample_rate:.1f}s")
+
+            logger.info(f"Registrazione completata, {frames_written} frame scritti")
+            capture_stats = self.capture.stats()
+            if capture_stats["dropped_frames"]:
+                logger.warning(f"Coda di cattura piena: persi {capture_stats['dropped_frames']} frame "
+                               f"({capture_stats['dropped_frames'] / self.sample_rate:.1f}s)")
+            metrics.emit("span", "record", seconds=round(time.perf_counter() - started, 4),
+                         audio_seconds=round(frames_written / self.sample_rate, 2),
+                         write_seconds=round(self.write_seconds, 4), **capture_stats,
+                         vad_dropped_seconds=round(self.vad_gate.dropped_seconds, 2) if self.vad_gate else 0.0)
+            if self.audio_buffer is not None:
+                self.buffer_ready.emit(self.audio_buffer)
+            else:
+                self.finished.emit(temp_path)
+
+        except ValueError as e:
+            # Errori di validazione (device non valido, etc.)
+            logger.error(f"Errore validazione: {e}")
+            self.error.emit(f"Errore: {str(e)}")
+        except (IOError, OSError) as e:
+            # Errori I/O (file, audio device)
+            logger.error(f"Errore I/O registrazione: {e}", exc_info=True)
+            self.error.emit(f"Errore I/O: {str(e)}")
+        except Exception as e:
+            # Altri errori inaspettati
+            logger.exception(f"Errore inaspettato durante registrazione")
+            self.error.emit(f"Errore registrazione: {str(e)}")
+        finally:
+            # FIX #1: Sempre chiudi risorse in finally
+            if stream is not None:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                    logger.debug("Stream audio chiuso")
+                except:
+                    pass
+
+            if p is not None:
+                try:
+                    p.terminate()
+                    logger.debug("PyAudio terminato")
+                except:
+                    pass
+
+            # Segnala fine flusso al consumer della trascrizione live
+            self._queue_chunk(None, block=True)
+
+    def _on_audio(self, in_data, frame_count, time_info, status_flags):
+        """Callback PortAudio: solo accodamento, nessun I/O"""
+        self.capture.push(in_data, frame_count, status_flags)
+        return (None, pyaudio.paContinue)
+
+    def _write_timed(self, wf, data):
+        start = time.perf_counter()
+        if self.resampler is not None:
+            data = _float_to_pcm16(self.resampler.process(_pcm16_to_float(data)))
+            if not data:
+                return 0
+        frames = self._write_block(wf, data)
+        self.write_seconds += time.perf_counter() - start
+        return frames
+
+    def _write_block(self, wf, data):
+        """Scrive un blocco (dopo il gate VAD) e lo inoltra alla trascrizione live"""
+        blocks = self.vad_gate.process(data) if self.vad_gate is not None else [data]
+        frames = 0
+        for block in blocks:
+            if wf is not None:
+                wf.writeframes(block)
+            else:
+                self.audio_buffer.append(block)
+            frames += len(block) // 2
+            if self.chunker is not None:
+                self._feed_chunks(block)
+        return frames
+
+    def _feed_chunks(self, data):
+        if self.live_stop_event.is_set():
+            return
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+        for chunk in self.chunker.push(samples):
+            self._queue_chunk(chunk)
+
+    def _queue_chunk(self, chunk, block=False):
+        """Accoda un chunk per la trascrizione live senza mai bloccare la scrittura dell'audio
+
+        Con la coda piena la live viene abbandonata; a fine registrazione (block=True) si
+        attende il consumer finché la live non viene fermata con stop_live().
+        """
+        while self.chunk_queue is not None and not self.live_stop_event.is_set():
+            try:
+                self.chunk_queue.put(chunk, block=block, timeout=0.1)
+                return True
+            except queue.Full:
+                if not block:
+                    logger.warning(f"Trascrizione live in ritardo di {self.chunk_queue.qsize()} chunk, abbandonata")
+                    self.stop_live()
+                    self.live_stopped.emit("Trascrizione live troppo lenta")
+        return False
+
+    def stop_live(self):
+        """Smette di inoltrare chunk alla trascrizione live (fallita, in ritardo o fermata)"""
+        self.live_stop_event.set()
+
+    def stop(self):
+        """Ferma la registrazione in modo thread-safe"""
+        logger.info("Richiesta stop registrazione")
+        self.stop_event.set()
+
+
+class TrackAligner:
+    """Allinea più tracce mono su un clock comune e le interlaccia in frame multi-canale
+
+    Ogni traccia riceve in testa il silenzio corrispondente al ritardo del suo primo
+    blocco rispetto a started_at; una traccia che resta indietro di oltre max_lag_seconds
+    (dispositivo fermo, deriva del clock) viene riempita di silenzio per non bloccare le altre.
+    I campioni arrivati in ritardo per il tratto già riempito vengono scartati in base a
+    captured_at, così la traccia torna sul clock comune.
+    """
+
+    def __init__(self, channels, sample_rate, started_at, max_lag_seconds=TRACK_MAX_LAG_SECONDS):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.started_at = started_at
+        self.max_lag = int(max_lag_seconds * sample_rate)
+        self._pending = [[] for _ in range(channels)]
+        self._pending_len = [0] * channels
+        self.offsets = [None] * channels
+        self.gap_samples = [0] * channels
+        self.trimmed_samples = [0] * channels
+        # Campioni accodati per traccia dall'inizio (silenzio compreso) e silenzio non ancora compensato
+        self._position = [0] * channels
+        self._unmatched_gap = [0] * channels
+
+    def _append(self, track, samples):
+        self._pending[track].append(samples)
+        self._pending_len[track] += len(samples)
+        self._position[track] += len(samples)
+
+    def push(self, track, samples, captured_at):
+        """Accoda un blocco int16; captured_at è l'istante (clock comune) di fine blocco"""
+        start = int(round((captured_at - self.started_at) * self.sample_rate)) - len(samples)
+        if self.offsets[track] is None:
+            self.offsets[track] = max(0, start)
+            if self.offsets[track]:
+                self._append(track, np.zeros(self.offsets[track], dtype=np.int16))
+        elif self._unmatched_gap[track]:
+            # Blocco che cade nel silenzio inserito: il tratto già coperto viene scartato
+            overlap = min(self._position[track] - start, self._unmatched_gap[track], len(samples))
+            if overlap > 0:
+                samples = samples[overlap:]
+                self._unmatched_gap[track] -= overlap
+                self.trimmed_samples[track] += overlap
+            else:
+                self._unmatched_gap[track] = 0  # di nuovo in pari col clock comune
+        self._append(track, samples)
+
+    def _take(self, track, n):
+        buf = np.concatenate(self._pending[track]) if len(self._pending[track]) > 1 else self._pending[track][0]
+        rest = buf[n:]
+        self._pending[track] = [rest] if len(rest) else []
+        self._pending_len[track] = len(rest)
+        return buf[:n]
+
+    def pop_frames(self):
+        """Frame (n, channels) disponibili su tutte le tracce, o None"""
+        longest = max(self._pending_len)
+        for track in range(self.channels):
+            lag = longest - self._pending_len[track]
+            if lag > self.max_lag:
+                # Traccia in ritardo: silenzio fino a max_lag dietro la più lunga
+                fill = lag - self.max_lag
+                self._append(track, np.zeros(fill, dtype=np.int16))
+                self.gap_samples[track] += fill
+                self._unmatched_gap[track] += fill
+        n = min(self._pending_len)
+        if n == 0:
+            return None
+        frames = np.empty((n, self.channels), dtype=np.int16)
+        for track in range(self.channels):
+            frames[:, track] = self._take(track, n)
+        return frames
+
+    def flush(self):
+        """Completa le tracce più corte con silenzio e ritorna i frame rimanenti"""
+        longest = max(self._pending_len)
+        for track in range(self.channels):
+            if self._pending_len[track] < longest:
+                self._append(track, np.zeros(longest - self._pending_len[track], dtype=np.int16))
+        return self.pop_frames() if longest else None
+
+
+class MultiTrackRecorder(QThread):
+    """Registrazione simultanea da più dispositivi: una traccia allineata per canale"""
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, device_indices, labels=None, sample_rate=16000, audio_format=RECORDING_FORMAT,
+                 capture_rate=CAPTURE_RATE):
+        super().__init__()
+        self.device_indices = list(device_indices)
+        # Ogni dispositivo cattura al proprio rate nativo ed è ricampionato a sample_rate
+        self.capture_rate = capture_rate
+        self.resamplers = [None] * len(self.device_indices)
+        self.labels = list(labels) if labels else [f"Traccia {i + 1}" for i in range(len(self.device_indices))]
+        self.sample_rate = sample_rate
+        self.audio_format = resolve_recording_format(audio_format)
+        self.stop_event = threading.Event()
+        # Una coda per dispositivo: ogni callback PortAudio vive nel proprio thread
+        self.captures = [CaptureQueue() for _ in self.device_indices]
+        self.aligner = None
+
+    def run(self):
+        global _temp_files
+        p = None
+        streams = []
+        temp_path = None
+
+        try:
+            logger.info(f"Avvio registrazione multi-traccia, device {self.device_indices}")
+            p = pyaudio.PyAudio()
+
+            capture_rates = []
+            for track, index in enumerate(self.device_indices):
+                try:
+                    device_info = p.get_device_info_by_index(index)
+                    if device_info['maxInputChannels'] == 0:
+                        raise ValueError(f"Device {index} non ha canali di input")
+                except (ValueError, OSError) as e:
+                    raise ValueError(f"Device audio non valido: {e}")
+                rate = self.capture_rate or native_capture_rate(device_info, self.sample_rate)
+                capture_rates.append(rate)
+                if rate != self.sample_rate:
+                    self.resamplers[track] = StreamResampler(rate, self.sample_rate)
+
+            channels = len(self.device_indices)
+            self.aligner = TrackAligner(channels, self.sample_rate, time.monotonic())
+            for track, index in enumerate(self.device_indices):
+                streams.append(p.open(
+                    format=pyaudio.paInt16,
+                    channels=1,
+                    rate=capture_rates[track],
+                    input=True,
+                    input_device_index=index,
+                    frames_per_buffer=CAPTURE_BLOCK_FRAMES * capture_rates[track] // self.sample_rate,
+                    stream_callback=self._callback_for(track)
+                ))
+
+            suffix = RECORDING_FORMATS[self.audio_format][2]
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+            temp_path = temp_file.name
+            temp_file.close()
+            _temp_files.append(temp_path)
+            logger.info(f"File temporaneo multi-traccia creato: {temp_path}")
+
+            with contextlib.ExitStack() as stack:
+                if self.audio_format == "wav":
+                    wf = stack.enter_context(wave.open(temp_path, 'wb'))
+                    wf.setnchannels(channels)
+                    wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
+                    wf.setframerate(self.sample_rate)
+                else:
+                    wf = stack.enter_context(SoundFileWriter(temp_path, self.sample_rate, self.audio_format, channels))
+
+                frames_written = 0
+                started = time.perf_counter()
+                while not self.stop_event.is_set():
+                    if not self._collect():
+                        if not all(stream.is_active() for stream in streams):
+                            raise IOError("Stream audio interrotto dal dispositivo")
+                        self.stop_event.wait(0.02)
+                        continue
+                    frames_written += self._write_frames(wf, self.aligner.pop_frames())
+
+                for stream in streams:
+                    stream.stop_stream()
+                self._collect()
+                for track, resampler in enumerate(self.resamplers):
+                    if resampler is not None:
+                        tail = np.frombuffer(_float_to_pcm16(resampler.flush()), dtype=np.int16)
+                        self.aligner.push(track, tail, time.monotonic())
+                frames_written += self._write_frames(wf, self.aligner.pop_frames())
+                frames_written += self._write_frames(wf, self.aligner.flush())
+
+            # Etichette e allineamento accanto al file, per la trascrizione per traccia
+            tracks_path = temp_path + ".tracks.json"
+            with open(tracks_path, 'w', encoding='utf-8') as f:
+                json.dump(self.track_info(), f, ensure_ascii=False, indent=2)
+            _temp_files.append(tracks_path)
+
+            logger.info(f"Registrazione multi-traccia completata, {frames_written} frame x {channels} tracce")
+            metrics.emit("span", "record_multitrack", seconds=round(time.perf_counter() - started, 4),
+                         audio_seconds=round(frames_written / self.sample_rate, 2), tracks=channels,
+                         dropped_frames=[c.dropped_frames for c in self.captures],
+                         gap_seconds=[round(g / self.sample_rate, 2) for g in self.aligner.gap_samples],
+                         trimmed_seconds=[round(t / self.sample_rate, 2) for t in self.aligner.trimmed_samples])
+            self.finished.emit(temp_path)
+
+        except ValueError as e:
+            logger.error(f"Errore validazione: {e}")
+            self.error.emit(f"Errore: {str(e)}")
+        except (IOError, OSError) as e:
+            logger.error(f"Errore I/O registrazione multi-traccia: {e}", exc_info=True)
+            self.error.emit(f"Errore I/O: {str(e)}")
+        except Exception as e:
+            logger.exception("Errore inaspettato durante registrazione multi-traccia")
+            self.error.emit(f"Errore registrazione: {str(e)}")
+        finally:
+            for stream in streams:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                except:
+                    pass
+            if p is not None:
+                try:
+                    p.terminate()
+                except:
+                    pass
+
+    def _callback_for(self, track):
+        capture = self.captures[track]
+
+        def callback(in_data, frame_count, time_info, status_flags):
+            # Timestamp sul clock comune del processo: i clock PortAudio sono per stream
+            capture.push((time.monotonic(), in_data), frame_count, status_flags)
+            return (None, pyaudio.paContinue)
+        return callback
+
+    def _collect(self):
+        """Sposta i blocchi catturati nell'allineatore; ritorna True se ne ha trovati"""
+        found = False
+        for track, capture in enumerate(self.captures):
+            resampler = self.resamplers[track]
+            for captured_at, data in capture.drain():
+                samples = np.frombuffer(data, dtype=np.int16)
+                if resampler is not None:
+                    samples = np.frombuffer(_float_to_pcm16(resampler.process(_pcm16_to_float(data))), dtype=np.int16)
+                self.aligner.push(track, samples, captured_at)
+                found = True
+        return found
+
+    @staticmethod
+    def _write_frames(wf, frames):
+        if frames is None:
+            return 0
+        wf.writeframes(frames.tobytes())
+        return len(frames)
+
+    def track_info(self):
+        return {
+            "labels": self.labels,
+            "devices": self.device_indices,
+            "sample_rate": self.sample_rate,
+            "offsets_seconds": [round((o or 0) / self.sample_rate, 3) for o in self.aligner.offsets],
+            "gap_seconds": [round(g / self.sample_rate, 3) for g in self.aligner.gap_samples],
+            "trimmed_seconds": [round(t / self.sample_rate, 3) for t in self.aligner.trimmed_samples]
+        }
+
+    def stop(self):
+        """Ferma la registrazione in modo thread-safe"""
+        logger.info("Richiesta stop registrazione multi-traccia")
+        self.stop_event.set()
+
+
+class TranscriptionWorker(QThread):
+    """Thread per trascrizione con Whisper - Fixed: exception handling, configurable language"""
+    segments_ready = pyqtSignal(list)  # liste di Segment, in ordine, man mano che vengono decodificate
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+
+    def __init__(self, audio_file, model_size="base", language="it", multitrack=False, decode_batch=1,
+                 backend=None, instance=0):
+        super().__init__()
+        self.audio_file = audio_file  # path o AudioBuffer (registrazione in memoria)
+        self.model_size = model_size
+        self.language = language  # FIX #12: Lingua configurabile
+        # File multi-traccia: ogni canale trascritto in parallelo ed etichettato
+        self.multitrack = multitrack
+        # > 1: finestre da 30 s decodificate a batch invece che in sequenza
+        self.decode_batch = decode_batch
+        self.backend = backend  # nome in TRANSCRIPTION_BACKENDS, None = TRANSCRIPTION_BACKEND
+        # Istanza Whisper propria: trascrizioni concorrenti non condividono lo stesso modello
+        self.instance = instance
+
+    def run(self):
+        try:
+            logger.info(f"Avvio trascrizione: file={self.audio_file}, model={self.model_size}, lang={self.language}, "
+                        f"backend={self.backend or TRANSCRIPTION_BACKEND}, istanza={self.instance}")
+
+            audio = self.audio_file
+            to_recording = lambda items: items
+            if isinstance(audio, AudioBuffer):
+                # Con il VAD i tempi tornano a quelli della registrazione, come in transcribe_segmented
+                if audio.time_map is not None:
+                    to_recording = audio.time_map.map_segments
+                # Passaggio diretto a Whisper, senza WAV né ffmpeg
+                audio = _to_whisper_rate(audio.view(), audio.sample_rate)
+
+            if self.multitrack:
+                # Le tracce vanno unite in ordine temporale: segmenti disponibili solo alla fine
+                result = transcribe_tracks(audio, self.model_size, self.language, progress=self.progress.emit,
+                                           cache=result_cache, decode_batch=self.decode_batch, backend=self.backend,
+                                           instance=self.instance)
+                self._emit_segments(to_recording(result["segments"]))
+            else:
+                result = transcribe_audio(audio, self.model_size, self.language, progress=self.progress.emit,
+                                          instance=self.instance, cache=result_cache, decode_batch=self.decode_batch,
+                                          backend=self.backend,
+                                          on_segments=lambda items: self._emit_segments(to_recording(items)))
+
+            transcript = result["text"].strip()
+            logger.info(f"Trascrizione completata, {len(transcript)} caratteri")
+
+            self.finished.emit(transcript)
+
+        except FileNotFoundError as e:
+            logger.error(f"File non trovato: {e}")
+            self.error.emit(f"File non trovato: {str(e)}")
+        except (IOError, OSError) as e:
+            logger.error(f"Errore I/O durante trascrizione: {e}", exc_info=True)
+            self.error.emit(f"Errore lettura file: {str(e)}")
+        except RuntimeError as e:
+            # Errori Whisper (CUDA, modello corrotto, etc.)
+            logger.error(f"Errore Whisper runtime: {e}", exc_info=True)
+            self.error.emit(f"Errore Whisper: {str(e)}")
+        except Exception as e:
+            logger.exception("Errore inaspettato durante trascrizione")
+            self.error.emit(f"Errore trascrizione: {str(e)}")
+
+    def _emit_segments(self, segments):
+        if segments:
+            self.segments_ready.emit(list(SegmentStore(segments)))
+
+
+class StreamingTranscriber(QThread):
+    """Thread consumer che trascrive i chunk audio mentre la registrazione è in corso"""
+    segments_ready = pyqtSignal(list)  # Segment con tempi dall'inizio della registrazione
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+
+    def __init__(self, chunk_queue, model_size="base", language="it", backend=None):
+        super().__init__()
+        self.chunk_queue = chunk_queue
+        self.model_size = model_size
+        self.language = language
+        self.backend = resolve_backend(backend)
+        self.stop_event = threading.Event()
+        self.texts = []
+
+    def run(self):
+        try:
+            logger.info(f"Avvio trascrizione live: model={self.model_size}, lang={self.language}")
+            # Caricato subito: il primo chunk non aspetta il modello
+            self.backend.get_model(self.model_size, instance=STREAM_WHISPER_INSTANCE)
+            key = self.backend.model_key(self.model_size, STREAM_WHISPER_INSTANCE)
+
+            while not self.stop_event.is_set():
+                chunk = self.chunk_queue.get()
+                if chunk is None:
+                    break
+                # Non sfrattabile durante la decodifica del chunk; ricaricato se sfrattato tra due chunk
+                with _whisper_cache.in_use(key):
+                    model = self.backend.get_model(self.model_size, instance=STREAM_WHISPER_INSTANCE)
+                    segments = self._chunk_segments(model, chunk)
+                text = " ".join(segment.text for segment in segments if segment.text)
+                if text:
+                    self.texts.append(text)
+                if segments:
+                    self.segments_ready.emit(segments)
+
+            transcript = " ".join(self.texts)
+            logger.info(f"Trascrizione live completata, {len(transcript)} caratteri")
+            self.finished.emit(transcript)
+
+        except RuntimeError as e:
+            logger.error(f"Errore Whisper runtime (live): {e}", exc_info=True)
+            self.error.emit(f"Errore Whisper: {str(e)}")
+        except Exception as e:
+            logger.exception("Errore inaspettato durante trascrizione live")
+            self.error.emit(f"Errore trascrizione: {str(e)}")
+
+    def _chunk_segments(self, model, chunk):
+        audio = _to_whisper_rate(chunk.audio, chunk.sample_rate)
+        if len(audio) < WHISPER_SAMPLE_RATE // 10:
+            return []
+        with metrics.span("whisper.transcribe_chunk", backend=self.backend.name, model=self.model_size,
+                          offset=round(chunk.offset, 2), audio_seconds=round(len(audio) / WHISPER_SAMPLE_RATE, 2)):
+            result = self.backend.transcribe(model, audio, self.language)
+        # Tieni solo i segmenti il cui centro cade nella finestra del chunk:
+        # la sovrapposizione viene trascritta una volta sola
+        kept = SegmentStore()
+        for segment in result.get("segments", []):
+            middle = (segment["start"] + segment["end"]) / 2
+            if chunk.keep_from <= middle < chunk.keep_to:
+                absolute = {**segment, "start": chunk.offset + segment["start"], "end": chunk.offset + segment["end"]}
+                kept.extend(chunk.time_map.map_segments([absolute]) if chunk.time_map is not None else [absolute])
+        logger.debug(f"Chunk @{chunk.offset:.0f}s trascritto, {len(kept)} segmenti")
+        return list(kept)
+
+    def stop(self):
+        """Interrompe il consumo dei chunk (es. dopo un errore di registrazione)"""
+        self.stop_event.set()
+        try:
+            self.chunk_queue.put_nowait(None)
+        except queue.Full:
+            pass  # il thread vede stop_event dopo il chunk in corso
+
+
+class ModelPreloader(QThread):
+    """Thread per precaricare in background il modello Whisper nella cache"""
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, model_size, backend=None):
+        super().__init__()
+        self.model_size = model_size
+        self.backend = backend
+
+    def run(self):
+        try:
+            resolve_backend(self.backend).get_model(self.model_size)
+            self.finished.emit(self.model_size)
+        except Exception as e:
+            # Non bloccante: la trascrizione ritenterà il caricamento
+            logger.warning(f"Preload modello Whisper '{self.model_size}' fallito: {e}")
+            self.error.emit(str(e))
+
+
+NO_KEY_POINTS = "Nessun punto chiave identificato"
+
+# Schema della risposta JSON del summary: campo -> tipo (le liste contengono stringhe)
+SUMMARY_SCHEMA = {"summary": str, "key_points": list, "action_items": list}
+
+
+def parse_summary_response(text):
+    """Estrae summary, key points e action items dalla risposta - FIX #7: JSON parsing"""
+    with metrics.span("summary.parse", chars=len(text)):
+        return _parse_summary_response(text)
+
+
+def _parse_summary_response(text):
+    # Prova prima a parsare come JSON
+    try:
+        # Trova il JSON nella risposta (potrebbe avere testo prima/dopo)
+        text = text.strip()
+
+        # Cerca il primo { e l'ultimo }
+        start = text.find('{')
+        end = text.rfind('}')
+
+        if start != -1 and end != -1:
+            json_str = text[start:end+1]
+            data = json.loads(json_str)
+
+            # Valida che contenga i campi richiesti
+            if "summary" in data and "key_points" in data and "action_items" in data:
+                logger.info("Parsing JSON riuscito")
+                return _normalize_summary_fields(data)
+
+    except json.JSONDecodeError as e:
+        logger.warning(f"JSON parsing fallito: {e}, uso fallback")
+    except Exception as e:
+        logger.warning(f"Errore durante parsing JSON: {e}, uso fallback")
+
+    # Fallback: parsing testuale tradizionale
+    logger.info("Uso fallback parsing testuale")
+    metrics.count("summary.parse_fallback")
+    return _parse_summary_fallback(text)
+
+def _normalize_summary_fields(data):
+    """Valori di default per i campi vuoti della risposta JSON (solo i campi presenti)"""
+    defaults = {
+        "summary": lambda value: value.strip() if value else "Analisi non disponibile",
+        "key_points": lambda value: value if value else [NO_KEY_POINTS],
+        "action_items": lambda value: value if value else []
+    }
+    return {field: normalize(data[field]) for field, normalize in defaults.items() if field in data}
+
+
+class SummaryStreamParser:
+    """Acceptor incrementale della risposta JSON del summary, validato sullo schema
+
+    Ogni campo di primo livello viene decodificato e validato appena la virgola o la graffa che lo
+    segue arriva; done diventa True alla graffa che chiude l'oggetto. rejected diventa True se prima
+    del JSON arriva troppo testo o un campo non è JSON valido: in entrambi i casi la generazione
+    può fermarsi. I campi con il tipo sbagliato finiscono in failed.
+    """
+
+    def __init__(self, max_preamble=SUMMARY_MAX_PREAMBLE_CHARS):
+        self.text = ""
+        self.fields = {}
+        self.raw = {}
+        self.failed = []
+        self.done = False
+        self.rejected = False
+        self.max_preamble = max_preamble
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    @property
+    def stopped(self):
+        """True quando i token successivi non possono più cambiare il risultato"""
+        return self.done or self.rejected
+
+    def missing(self):
+        """Campi dello schema non ancora accettati, in ordine"""
+        return [field for field in SUMMARY_SCHEMA if field not in self.fields]
+
+    def feed(self, token):
+        """Aggiunge un token; ritorna i nomi dei campi accettati grazie a questo token"""
+        completed = []
+        offset = len(self.text)
+        self.text += token
+        for position in range(offset, len(self.text)):
+            if self.stopped:
+                break
+            char = self.text[position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = position + 1
+                elif position >= self.max_preamble:
+                    self._reject("testo prima del JSON")
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed += self._close_member(position)
+                    self.done = not self.rejected
+            elif char == "," and self._depth == 1:
+                completed += self._close_member(position)
+        return completed
+
+    def _reject(self, reason):
+        logger.warning(f"Risposta del summary scartata: {reason}")
+        self.rejected = True
+
+    def _close_member(self, end):
+        member = self.text[self._member_start:end]
+        self._member_start = end + 1
+        if not member.strip():
+            return []  # oggetto vuoto
+        try:
+            data = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            self._reject(f"campo non valido: {member.strip()[:60]}")
+            return []
+        accepted = {}
+        for field, value in data.items():
+            if field not in SUMMARY_SCHEMA:
+                continue  # chiavi extra: ignorate
+            if _valid_summary_field(field, value):
+                accepted[field] = value
+            else:
+                self.failed.append(field)
+        self.raw.update(accepted)
+        fields = _normalize_summary_fields(accepted)
+        self.fields.update(fields)
+        return list(fields)
+
+    def partial(self):
+        """Campi accettati finora, con gli stessi default di parse_summary_response()"""
+        return dict(self.fields)
+
+
+def _valid_summary_field(field, value):
+    """summary è una stringa, key_points e action_items liste di stringhe"""
+    if SUMMARY_SCHEMA[field] is str:
+        return isinstance(value, str)
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _parse_summary_fallback(text):
+    """Fallback parsing testuale se JSON non funziona"""
+    lines = text.strip().split('\n')
+
+    summary = ""
+    key_points = []
+    action_items = []
+
+    current_section = None
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Identifica sezioni - più keyword per robustezza
+        line_upper = line.upper()
+        if any(keyword in line_upper for keyword in ["SUMMARY", "RIASSUNTO", "SINTESI", "RIEPILOGO"]):
+            current_section = "summary"
+            # Se la linea contiene già testo dopo il marker, estrailo
+            for keyword in ["SUMMARY:", "RIASSUNTO:", "SINTESI:", "RIEPILOGO:"]:
+                if keyword in line_upper:
+                    idx = line_upper.index(keyword) + len(keyword)
+                    remaining = line[idx:].strip()
+                    if remaining:
+                        summary += remaining + " "
+            continue
+        elif any(keyword in line_upper for keyword in ["KEY POINT", "PUNTI CHIAVE", "PUNTI PRINCIPALI"]):
+            current_section = "key_points"
+            continue
+        elif any(keyword in line_upper for keyword in ["ACTION", "TASK", "TO-DO", "TODO", "AZIONI"]):
+            current_section = "action_items"
+            continue
+
+        # Rimuovi bullet points e numerazione
+        clean_line = line.lstrip('•-*123456789.() \t')
+
+        if current_section == "summary" and clean_line:
+            summary += clean_line + " "
+        elif current_section == "key_points" and clean_line:
+            # Ignora linee che sono solo keyword
+            if clean_line.upper() not in ["KEY POINTS", "PUNTI CHIAVE"]:
+                key_points.append(clean_line)
+        elif current_section == "action_items" and clean_line:
+            # Ignora "nessuno", "none", etc.
+            if not any(skip in clean_line.lower() for skip in ["nessun", "none", "n/a", "non applicabile"]):
+                action_items.append(clean_line)
+
+    # Fallback finale: se parsing non ha funzionato, metti tutto nel summary
+    if not summary and not key_points:
+        logger.warning("Fallback totale: tutto in summary")
+        summary = text
+
+    return {
+        "summary": summary.strip() or "Analisi non disponibile",
+        "key_points": key_points if key_points else [NO_KEY_POINTS],
+        "action_items": action_items if action_items else []
+    }
+
+
+_SUMMARY_FORMAT = """Formato richiesto:
+{
+    "summary": "Riassunto completo in 3-5 frasi",
+    "key_points": ["punto chiave 1", "punto chiave 2", "punto chiave 3"],
+    "action_items": ["task 1", "task 2"]
+}
+
+Se non ci sono action items, usa array vuoto: "action_items": []"""
+
+# Parti fisse iniziali dei prompt: tutto ciò che varia (trascrizione, numero della parte) viene dopo,
+# così LLMHost può riusarne lo stato KV tra una chiamata e l'altra
+# FIX #7: Richiedi formato JSON strutturato per parsing più robusto
+SUMMARY_PROMPT_PREFIX = f"""Analizza questa trascrizione e rispondi SOLO con un oggetto JSON valido.
+Non aggiungere testo prima o dopo il JSON.
+
+{_SUMMARY_FORMAT}
+
+TRASCRIZIONE DA ANALIZZARE:
+"""
+
+CHUNK_PROMPT_PREFIX = f"""Analizza la parte di trascrizione indicata in fondo e rispondi SOLO con un oggetto JSON valido.
+Non aggiungere testo prima o dopo il JSON. Il summary deve riassumere solo questa parte in 2-3 frasi.
+
+{_SUMMARY_FORMAT}
+
+"""
+
+REDUCE_PROMPT_PREFIX = f"""Queste sono le analisi parziali, in ordine, delle parti di una stessa trascrizione.
+Combinale in un'unica analisi e rispondi SOLO con un oggetto JSON valido.
+Unisci i punti chiave simili ed elimina gli action items duplicati.
+
+{_SUMMARY_FORMAT}
+
+ANALISI PARZIALI:
+"""
+
+
+def build_summary_prompt(transcript):
+    """Prompt per l'analisi in un'unica passata"""
+    return f"""{SUMMARY_PROMPT_PREFIX}{transcript}
+
+Rispondi SOLO con il JSON, in italiano:"""
+
+
+def build_chunk_prompt(chunk, index, total):
+    """Prompt della fase map: analisi di una parte della trascrizione"""
+    return f"""{CHUNK_PROMPT_PREFIX}PARTE {index} DI {total}:
+{chunk}
+
+Rispondi SOLO con il JSON, in italiano:"""
+
+
+def _format_partial(index, partial):
+    lines = [f"PARTE {index}: {partial['summary']}"]
+    key_points = [p for p in partial["key_points"] if p != NO_KEY_POINTS]
+    if key_points:
+        lines.append("Punti chiave: " + "; ".join(key_points))
+    if partial["action_items"]:
+        lines.append("Action items: " + "; ".join(partial["action_items"]))
+    return "\n".join(lines)
+
+
+def build_reduce_prompt(partials):
+    """Prompt della fase reduce: combina le analisi parziali in ordine"""
+    parts = "\n\n".join(_format_partial(i, p) for i, p in enumerate(partials, 1))
+    return f"""{REDUCE_PROMPT_PREFIX}{parts}
+
+Rispondi SOLO con il JSON, in italiano:"""
+
+
+def estimate_tokens(text):
+    """Stima approssimativa del numero di token (senza caricare il tokenizer)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_words(text, max_chars):
+    pieces = []
+    current = ""
+    for word in text.split():
+        # Parola più lunga del budget: taglio netto
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_transcript(text, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Divide la trascrizione in chunk entro max_tokens, preferendo i confini di frase"""
+    return _pack_chunks(re.split(r'(?<=[.!?])\s+', text.strip()), max_tokens * CHARS_PER_TOKEN)
+
+
+def split_segments(segments, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """Divide i segmenti della trascrizione in chunk entro max_tokens, chiudendoli ai confini di segmento"""
+    return _pack_chunks((segment.text for segment in segments), max_tokens * CHARS_PER_TOKEN)
+
+
+def _pack_chunks(texts, max_chars):
+    """Raggruppa i testi in chunk entro max_chars senza spezzarli, salvo quelli oltre il budget"""
+    chunks = []
+    current = []
+    current_len = 0
+    for text in texts:
+        if not text:
+            continue
+        # Testi oltre il budget (es. trascrizioni senza punteggiatura): taglia sulle parole
+        pieces = [text] if len(text) <= max_chars else _split_words(text, max_chars)
+        for piece in pieces:
+            if current and current_len + 1 + len(piece) > max_chars:
+                chunks.append(" ".join(current))
+                current = []
+                current_len = 0
+            current.append(piece)
+            current_len += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _dedupe(items):
+    seen = set()
+    result = []
+    for item in items:
+        key = item.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            result.append(item.strip())
+    return result
+
+
+def merge_partial_summaries(partials):
+    """Unione deterministica delle analisi parziali (fallback se il reduce non produce JSON)"""
+    key_points = _dedupe(p for partial in partials for p in partial["key_points"] if p != NO_KEY_POINTS)
+    return {
+        "summary": " ".join(p["summary"] for p in partials if p["summary"]),
+        "key_points": key_points or [NO_KEY_POINTS],
+        "action_items": _dedupe(a for partial in partials for a in partial["action_items"])
+    }
+
+
+def _group_partials(partials, max_tokens):
+    """Raggruppa le analisi parziali in blocchi che stanno nel budget (almeno 2 per blocco)"""
+    groups = []
+    current = []
+    current_tokens = 0
+    for index, partial in enumerate(partials, 1):
+        tokens = estimate_tokens(_format_partial(index, partial))
+        if len(current) >= 2 and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(partial)
+        current_tokens += tokens
+    if len(current) == 1 and groups:
+        groups[-1].append(current[0])
+    elif current:
+        groups.append(current)
+    return groups
+
+
+def summarize_transcript(transcript, model_name=DEFAULT_LLM_MODEL, map_workers=SUMMARY_MAP_WORKERS,
+                         progress=None, hosts=None, cache=None, segments=None, on_token=None, on_partial=None):
+    """Genera summary/key_points/action_items; map-reduce se la trascrizione supera il contesto
+
+    Con segments (SegmentStore) i chunk del map-reduce seguono i confini dei segmenti.
+    on_token riceve i token della risposta finale e on_partial i campi già completi.
+    """
+    progress = progress or (lambda message: None)
+    stream = (on_token, on_partial)
+    if cache is None or not cache.enabled:
+        return _summarize(transcript, model_name, map_workers, progress, hosts, segments, stream)
+
+    # La chiave include i prompt: cambiandoli il summary viene rigenerato
+    key_parts = [transcript, model_name, build_summary_prompt(""), build_chunk_prompt("", 0, 0),
+                 build_reduce_prompt([]), SUMMARY_CHUNK_TOKENS]
+    if segments:
+        key_parts.append("segments")
+    cache_key = ResultCache.key(*key_parts)
+    cached = cache.get("summaries", cache_key)
+    if cached is not None:
+        progress("Analisi trovata in cache")
+        return cached
+    degraded = []
+    parsed = _summarize(transcript, model_name, map_workers, progress, hosts, segments, stream, degraded)
+    if degraded:
+        # Campi ricavati dal parsing di ripiego: al prossimo tentativo il modello può fare meglio
+        logger.info(f"Analisi non salvata in cache, campi di ripiego: {', '.join(sorted(set(degraded)))}")
+    else:
+        cache.put("summaries", cache_key, parsed)
+    return parsed
+
+
+def _summarize(transcript, model_name, map_workers, progress, hosts, segments=None, stream=(None, None),
+               degraded=None):
+    with metrics.span("summary", model=model_name, transcript_tokens=estimate_tokens(transcript)):
+        return _summarize_passes(transcript, model_name, map_workers, progress, hosts, segments, stream, degraded)
+
+
+def _generate_summary(host, prompt, prefix, max_tokens, on_token=None, on_partial=None, degraded=None):
+    """Genera e valida una risposta; i campi non validi vengono rigenerati singolarmente
+
+    La generazione si ferma alla graffa che chiude il JSON o appena la risposta viene scartata.
+    I campi ricavati dal parsing di ripiego vengono aggiunti a degraded.
+    """
+    parser = SummaryStreamParser()
+
+    def feed(token):
+        completed = parser.feed(token)
+        # on_token può chiedere lo stop ritornando True, come per LLMHost.generate
+        stop = on_token is not None and on_token(token)
+        if completed and on_partial is not None:
+            on_partial(parser.partial())
+        return parser.stopped or bool(stop)
+
+    response = host.generate(prompt, max_tokens=max_tokens, temp=0.7, on_token=feed, prefix=prefix)
+    if not parser.text:
+        feed(response)  # host senza streaming
+    if parser.done:
+        metrics.count("summary.stopped_at_brace")
+    if parser.rejected:
+        metrics.count("summary.rejected")
+    for field in parser.missing():
+        for _ in range(SUMMARY_FIELD_RETRIES):
+            if _retry_summary_field(host, prompt, prefix, parser.raw, field, max_tokens, parser):
+                if on_partial is not None:
+                    on_partial(parser.partial())
+                break
+    if not parser.missing():
+        return parser.partial()
+    # Campi ancora mancanti: parsing tradizionale della risposta completa, se del tipo giusto
+    if degraded is not None:
+        degraded.extend(parser.missing())
+    fallback = parse_summary_response(response)
+    for field in parser.missing():
+        value = fallback.get(field)
+        parser.fields.update(_normalize_summary_fields(
+            {field: value if value is not None and _valid_summary_field(field, value) else None}))
+    return parser.partial()
+
+
+def _retry_summary_field(host, prompt, prefix, accepted, field, max_tokens, target):
+    """Rigenera un solo campo continuando il JSON dai campi già accettati; ritorna True se valido"""
+    metrics.count("summary.field_retry")
+    logger.info(f"Rigenerazione del campo '{field}' del summary")
+    members = [f"{json.dumps(name)}: {json.dumps(value, ensure_ascii=False)}" for name, value in accepted.items()]
+    forced = "{" + "".join(member + ", " for member in members) + f"{json.dumps(field)}: "
+    parser = SummaryStreamParser()
+    parser.feed(forced)
+
+    def feed(token):
+        parser.feed(token)
+        return parser.stopped or field in parser.fields or field in parser.failed
+
+    response = host.generate(prompt + "\n" + forced, max_tokens=max_tokens, temp=0.7, on_token=feed, prefix=prefix)
+    if parser.text == forced:
+        feed(response)
+    if field not in parser.fields and not parser.stopped and field not in parser.failed:
+        # Generazione finita senza virgola/graffa dopo il valore: prova a chiudere l'oggetto
+        parser.feed("}")
+    if field not in parser.fields:
+        return False
+    target.raw[field] = parser.raw[field]
+    target.fields[field] = parser.fields[field]
+    return True
+
+
+def _summarize_passes(transcript, model_name, map_workers, progress, hosts, segments=None, stream=(None, None),
+                      degraded=None):
+    if hosts is None:
+        hosts = [get_llm_host(model_name, slot) for slot in range(map_workers)]
+
+    single_pass_tokens = SUMMARY_CONTEXT_TOKENS - SUMMARY_MAX_TOKENS - SUMMARY_PROMPT_OVERHEAD_TOKENS
+    if estimate_tokens(transcript) <= single_pass_tokens:
+        return _generate_summary(hosts[0], build_summary_prompt(transcript), SUMMARY_PROMPT_PREFIX,
+                                 SUMMARY_MAX_TOKENS, *stream, degraded=degraded)
+
+    # Map: analisi indipendente di ogni chunk
+    chunks = split_segments(segments) if segments else split_transcript(transcript)
+    total = len(chunks)
+    logger.info(f"Summary map-reduce: {total} chunk, {len(hosts)} worker")
+    if len(hosts) > 1:
+        # Il primo caricamento (ed eventuale download) non va ripetuto in parallelo
+        hosts[0].load()
+
+    def map_chunk(item):
+        index, chunk = item
+        progress(f"Analisi parte {index}/{total}...")
+        host = hosts[(index - 1) % len(hosts)]
+        return _generate_summary(host, build_chunk_prompt(chunk, index, total), CHUNK_PROMPT_PREFIX,
+                                 SUMMARY_MAP_MAX_TOKENS, degraded=degraded)
+
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        partials = list(executor.map(map_chunk, enumerate(chunks, 1)))
+
+    # Reduce gerarchico: combina finché le analisi parziali stanno in un solo prompt
+    while len(partials) > 1 and estimate_tokens(build_reduce_prompt(partials)) > SUMMARY_CONTEXT_TOKENS - SUMMARY_MAX_TOKENS:
+        groups = _group_partials(partials, SUMMARY_CHUNK_TOKENS)
+        progress(f"Combinazione di {len(partials)} analisi parziali...")
+        partials = [_reduce(hosts[0], group, SUMMARY_MAP_MAX_TOKENS, degraded=degraded) for group in groups]
+
+    progress("Generazione analisi finale...")
+    return _reduce(hosts[0], partials, SUMMARY_MAX_TOKENS, stream, degraded)
+
+
+def _reduce(host, partials, max_tokens, stream=(None, None), degraded=None):
+    if len(partials) == 1:
+        return partials[0]
+    reduced = _generate_summary(host, build_reduce_prompt(partials), REDUCE_PROMPT_PREFIX, max_tokens, *stream,
+                                degraded=degraded)
+    if reduced["key_points"] == [NO_KEY_POINTS]:
+        # Reduce non strutturato: recupera i punti dalle analisi parziali
+        merged = merge_partial_summaries(partials)
+        reduced["key_points"] = merged["key_points"]
+        reduced["action_items"] = reduced["action_items"] or merged["action_items"]
+    return reduced
+
+
+class SummaryWorker(QThread):
+    """Thread per generazione summary con GPT4All - Fixed: JSON parsing, exception handling"""
+    token = pyqtSignal(str)  # token della risposta finale, appena generati
+    partial = pyqtSignal(dict)  # campi del JSON già completi (summary, key_points, action_items)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+
+    def __init__(self, transcript, model_name=DEFAULT_LLM_MODEL, segments=None):
+        super().__init__()
+        self.transcript = transcript
+        self.segments = segments  # SegmentStore opzionale: chunk sui confini dei segmenti
+        self.model_name = model_name
+        self.model_path = MODEL_CACHE_DIR / model_name
+        self.hosts = [get_llm_host(model_name, slot) for slot in range(SUMMARY_MAP_WORKERS)]
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """Stop cooperativo: la generazione si ferma al prossimo token, senza terminate()"""
+        self.stop_event.set()
+        for host in self.hosts:
+            host.cancel()
+
+    def _on_token(self, token):
+        self.token.emit(token)
+        return self.stop_event.is_set()
+
+    def run(self):
+        try:
+            logger.info(f"Avvio generazione summary, modello={self.model_name}, transcript_len={len(self.transcript)}")
+
+            # Modello persistente condiviso tra le esecuzioni
+            gpt = self.hosts[0]
+
+            # Download modello se non esiste
+            if gpt.is_loaded():
+                logger.info("Modello GPT4All già in memoria")
+            elif not self.model_path.exists():
+                self.progress.emit(f"Download modello {self.model_name} (prima volta, ~4 GB)...")
+                self.progress.emit("Questo richiederà alcuni minuti...")
+                logger.info(f"Download modello {self.model_name} in corso...")
+            else:
+                self.progress.emit("Caricamento modello GPT4All...")
+                logger.info("Modello GPT4All già presente in cache")
+
+            self.progress.emit("Generazione summary...")
+            parsed = summarize_transcript(self.transcript, self.model_name, progress=self.progress.emit,
+                                          hosts=self.hosts, cache=result_cache, segments=self.segments,
+                                          on_token=self._on_token, on_partial=self.partial.emit)
+            logger.info("Summary generato con successo")
+            self.finished.emit(parsed)
+
+        except GenerationCancelled:
+            # Chiusura dell'applicazione: il job resta in coda e riparte al prossimo avvio
+            logger.info("Generazione summary interrotta")
+        except (IOError, OSError) as e:
+            logger.error(f"Errore I/O durante download/caricamento modello: {e}", exc_info=True)
+            self.error.emit(f"Errore caricamento modello: {str(e)}")
+        except RuntimeError as e:
+            logger.error(f"Errore runtime GPT4All: {e}", exc_info=True)
+            self.error.emit(f"Errore GPT4All: {str(e)}")
+        except Exception as e:
+            logger.exception("Errore inaspettato durante generazione summary")
+            self.error.emit(f"Errore generazione summary: {str(e)}")
+
+    def _parse_response(self, text):
+        """Estrae summary, key points e action items dalla risposta"""
+        return parse_summary_response(text)
+
+    def _parse_response_fallback(self, text):
+        """Fallback parsing testuale se JSON non funziona"""
+        return _parse_summary_fallback(text)
+
+
+def format_analysis(results):
+    """Formatta summary, key points e action items per la visualizzazione"""
+    output = "📝 SUMMARY\n"
+    output += "=" * 80 + "\n"
+    output += results.get("summary", "N/A") + "\n\n"
+
+    output += "🔑 KEY POINTS\n"
+    output += "=" * 80 + "\n"
+    for point in results.get("key_points", []):
+        output += f"• {point}\n"
+    output += "\n"
+
+    output += "✅ ACTION ITEMS\n"
+    output += "=" * 80 + "\n"
+    action_items = results.get("action_items", [])
+    if action_items:
+        for item in action_items:
+            output += f"☐ {item}\n"
+    else:
+        output += "Nessun action item identificato\n"
+    return output
+
+
+def format_report(transcript, analysis_text, segments=None):
+    """Report testuale completo (trascrizione + analisi, più i segmenti con timestamp) come salvato su file"""
+    report = "=" * 80 + "\n"
+    report += "AUDIO RECORDER & TRANSCRIBER - ANALISI\n"
+    report += f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
+    report += "=" * 80 + "\n\n"
+
+    report += "TRASCRIZIONE\n"
+    report += "=" * 80 + "\n"
+    report += transcript
+    report += "\n\n"
+    report += analysis_text
+    if segments:
+        report += "\n\nSEGMENTI\n"
+        report += "=" * 80 + "\n"
+        report += segments.timestamped_text() + "\n"
+    return report
+
+
+class JobQueue:
+    """Coda persistente su SQLite: ogni registrazione è un job che attraversa gli stadi di JOB_STAGES
+
+    I job vengono presi per priorità decrescente e poi in ordine di arrivo. Le registrazioni temporanee
+    vengono spostate in directory, così un riavvio (anche dopo un crash) riprende i job rimasti a metà;
+    le registrazioni a segmenti vengono scritte direttamente in recordings_dir.
+    """
+
+    def __init__(self, directory=JOBS_DIR):
+        self.directory = Path(directory)
+        self.recordings_dir = self.directory / "recordings"
+        self.recordings_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.directory / "jobs.sqlite3"), check_same_thread=False,
+                                   isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            audio_file TEXT,
+            owns_audio INTEGER NOT NULL DEFAULT 0,
+            options TEXT NOT NULL DEFAULT '{}',
+            stage TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            priority INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            transcript TEXT,
+            segments TEXT,
+            results TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, stage, priority DESC, id)")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def submit(self, audio_file, name=None, priority=0, stage=JOB_STAGES[0], transcript=None, segments=None,
+               **options):
+        """Accoda una registrazione (None = solo in memoria) e ritorna l'id del job"""
+        now = datetime.now().isoformat(timespec="seconds")
+        if name is None:
+            name = datetime.now().strftime("Registrazione %d/%m %H:%M:%S")
+        with self._lock:
+            job_id = self._db.execute(
+                "INSERT INTO jobs (name, options, stage, priority, transcript, segments, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, json.dumps(options), stage, priority, transcript,
+                 json.dumps(segments) if segments is not None else None, now, now)).lastrowid
+            if audio_file is not None:
+                path, owned = self._adopt(audio_file, job_id)
+                self._db.execute("UPDATE jobs SET audio_file = ?, owns_audio = ? WHERE id = ?",
+                                 (path, int(owned), job_id))
+        logger.info(f"Job #{job_id} accodato ({stage}, priorità {priority}): {audio_file}")
+        return job_id
+
+    def _adopt(self, audio_file, job_id):
+        """Sposta una registrazione temporanea nella directory dei job, sottraendola alla pulizia all'uscita"""
+        audio_file = str(audio_file)
+        if SegmentedRecording.is_recording(audio_file):
+            # Già nella directory dei job se l'ha scritta l'app
+            return audio_file, Path(audio_file).resolve().parent == self.recordings_dir.resolve()
+        if audio_file not in _temp_files:
+            return audio_file, False  # file dell'utente: resta dov'è
+        target = str(self.directory / f"{job_id}{Path(audio_file).suffix}")
+        for suffix in ("",) + RECORDING_SIDECARS:
+            if os.path.exists(audio_file + suffix):
+                shutil.move(audio_file + suffix, target + suffix)
+            if audio_file + suffix in _temp_files:
+                _temp_files.remove(audio_file + suffix)
+        return target, True
+
+    def claim(self, stage):
+        """Prende il prossimo job in attesa per lo stadio e lo segna in esecuzione (None se non ce ne sono)"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND stage = ? ORDER BY priority DESC, id LIMIT 1",
+                    (stage,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? "
+                                     "WHERE id = ?", (datetime.now().isoformat(timespec="seconds"), row["id"]))
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def advance(self, job_id, **fields):
+        """Completa lo stadio corrente salvando i risultati (transcript, segments, results) e passa al successivo"""
+        job = self.get(job_id)
+        index = JOB_STAGES.index(job["stage"])
+        if index + 1 < len(JOB_STAGES):
+            stage, status = JOB_STAGES[index + 1], "queued"
+        else:
+            stage, status = "done", "done"
+        self._update(job_id, stage=stage, status=status, error=None, **fields)
+        if status == "done":
+            self.remove_audio(job_id)
+
+    def fail(self, job_id, error):
+        self._update(job_id, status="failed", error=error)
+
+    def retry(self, job_id):
+        """Rimette in coda un job fallito dallo stadio in cui si era fermato"""
+        self._update(job_id, status="queued", error=None)
+
+    def set_priority(self, job_id, priority):
+        self._update(job_id, priority=priority)
+
+    def max_priority(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(priority), 0) FROM jobs").fetchone()[0]
+
+    def recover(self):
+        """Rimette in coda i job rimasti in esecuzione (app chiusa o crash) e le registrazioni senza job
+
+        Ritorna quanti job sono stati ripresi o creati.
+        """
+        with self._lock:
+            count = self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+        if count:
+            logger.info(f"Coda: {count} job interrotti rimessi in attesa")
+        return count + self.recover_recordings()
+
+    def recover_recordings(self):
+        """Accoda le registrazioni a segmenti rimaste senza job (crash o chiusura durante la registrazione)"""
+        with self._lock:
+            rows = self._db.execute("SELECT audio_file FROM jobs WHERE audio_file IS NOT NULL").fetchall()
+        known = {os.path.realpath(row[0]) for row in rows}
+        count = 0
+        for path in sorted(self.recordings_dir.iterdir()):
+            if not SegmentedRecording.is_recording(path) or os.path.realpath(path) in known:
+                continue
+            try:
+                recording = SegmentedRecording(path)
+                if not recording.complete:
+                    recording.recover()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Registrazione non recuperabile {path}: {e}")
+                continue
+            if not recording.segments:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            started = datetime.fromisoformat(recording.manifest["created_at"])
+            self.submit(str(path), name=started.strftime("Registrazione %d/%m %H:%M:%S (recuperata)"))
+            logger.info(f"Registrazione recuperata: {path} ({recording.duration:.1f}s)")
+            count += 1
+        return count
+
+    def remove_audio(self, job_id):
+        """Elimina la registrazione di un job concluso, se appartiene alla coda"""
+        job = self.get(job_id)
+        if not job["owns_audio"] or not job["audio_file"]:
+            return
+        if os.path.isdir(job["audio_file"]):
+            try:
+                shutil.rmtree(job["audio_file"])
+            except OSError as e:
+                logger.warning(f"Impossibile rimuovere {job['audio_file']}: {e}")
+            return
+        for suffix in ("",) + RECORDING_SIDECARS:
+            try:
+                os.remove(job["audio_file"] + suffix)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Impossibile rimuovere {job['audio_file'] + suffix}: {e}")
+
+    def _update(self, job_id, **fields):
+        for key in ("segments", "results"):
+            if fields.get(key) is not None:
+                fields[key] = json.dumps(fields[key], ensure_ascii=False)
+        fields["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    @staticmethod
+    def _decode(row):
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        for key in ("segments", "results"):
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row is not None else None
+
+    def jobs(self, limit=50):
+        """Job più recenti, per la lista nella GUI"""
+        with self._lock:
+            rows = self._db.execute("SELECT id, name, stage, status, priority, error FROM jobs "
+                                    "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self):
+        """Numero di job per (stadio, stato)"""
+        with self._lock:
+            rows = self._db.execute("SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status").fetchall()
+        return {(stage, status): count for stage, status, count in rows}
+
+
+class JobRunner(QObject):
+    """Esegue i job della JobQueue con concorrenza limitata per stadio, con i worker QThread esistenti
+
+    Una registrazione può iniziare mentre le precedenti sono ancora in trascrizione o in analisi:
+    i segnali riportano l'id del job, la GUI mostra solo quello selezionato.
+    """
+    job_changed = pyqtSignal(int)
+    segments_ready = pyqtSignal(int, list)
+    transcribed = pyqtSignal(int, str)
+    token = pyqtSignal(int, str)
+    partial = pyqtSignal(int, dict)
+    finished = pyqtSignal(int, dict)
+    failed = pyqtSignal(int, str)
+    progress = pyqtSignal(int, str)
+
+    def __init__(self, job_queue, concurrency=None, parent=None):
+        super().__init__(parent)
+        self.queue = job_queue
+        self.concurrency = dict(concurrency or JOB_CONCURRENCY)
+        self.workers = {}  # job id -> (stadio, worker in esecuzione)
+        self._stores = {}  # job id -> SegmentStore della trascrizione in corso
+        # Istanze Whisper libere, una per trascrizione concorrente (come gli slot di TranscriptionServer)
+        self._free_slots = list(range(self.concurrency.get("transcribe", 1)))
+        self._slots = {}  # job id -> istanza Whisper in uso
+        # Registrazioni in memoria: non sopravvivono a un riavvio
+        self._buffers = {}
+        self.queue.recover()
+
+    def submit(self, audio, priority=0, **options):
+        """Accoda una registrazione (path o AudioBuffer) e avvia gli stadi liberi"""
+        buffer = audio if isinstance(audio, AudioBuffer) else None
+        job_id = self.queue.submit(None if buffer is not None else audio, priority=priority, **options)
+        if buffer is not None:
+            self._buffers[job_id] = buffer
+        self.job_changed.emit(job_id)
+        self.pump()
+        return job_id
+
+    def running(self, stage):
+        return sum(1 for job_stage, _ in self.workers.values() if job_stage == stage)
+
+    def active(self):
+        """True se ci sono job in esecuzione o in attesa"""
+        return bool(self.workers) or any(status == "queued" for _, status in self.queue.counts())
+
+    def segments(self, job_id):
+        """Segmenti già decodificati di un job in trascrizione (None se non è in corso)"""
+        return self._stores.get(job_id)
+
+    def pump(self):
+        """Avvia i job in attesa finché ogni stadio ha posti liberi"""
+        for stage in JOB_STAGES:
+            while self.running(stage) < self.concurrency.get(stage, 1):
+                job = self.queue.claim(stage)
+                if job is None:
+                    break
+                self._start(job)
+
+    def _start(self, job):
+        job_id = job["id"]
+        options = job["options"]
+        if job["stage"] == "transcribe":
+            audio = job["audio_file"] or self._buffers.get(job_id)
+            if audio is None:
+                self._failed(job_id, "Registrazione in memoria persa alla chiusura dell'app")
+                return
+            self._stores[job_id] = SegmentStore()
+            self._slots[job_id] = self._free_slots.pop(0)
+            worker = TranscriptionWorker(audio, options.get("model_size", "base"), options.get("language", "it"),
+                                         multitrack=options.get("multitrack", False),
+                                         decode_batch=options.get("decode_batch", 1), backend=options.get("backend"),
+                                         instance=self._slots[job_id])
+            worker.segments_ready.connect(partial(self._on_segments, job_id))
+            worker.finished.connect(partial(self._transcribed, job_id))
+        else:
+            segments = SegmentStore(Segment(**segment) for segment in job["segments"] or [])
+            worker = SummaryWorker(job["transcript"] or "", options.get("model_name", DEFAULT_LLM_MODEL),
+                                   segments=segments or None)
+            worker.token.connect(partial(self.token.emit, job_id))
+            worker.partial.connect(partial(self.partial.emit, job_id))
+            worker.finished.connect(partial(self._summarized, job_id))
+        worker.error.connect(partial(self._failed, job_id))
+        worker.progress.connect(partial(self.progress.emit, job_id))
+        self.workers[job_id] = (job["stage"], worker)
+        logger.info(f"Job #{job_id}: avvio {job['stage']}")
+        worker.start()
+        self.job_changed.emit(job_id)
+
+    def _on_segments(self, job_id, segments):
+        self._stores[job_id].extend(segments)
+        self.segments_ready.emit(job_id, segments)
 
-        except FileNotFoundError as e:
-            logger.error(f"File non trovato: {e}")
-            self.error.emit(f"File non trovato: {str(e)}")
-        except (IOError, OSError) as e:
-            logger.error(f"Errore I/O durante trascrizione: {e}", exc_info=True)
-            self.error.emit(f"Errore lettura file: {str(e)}")
-        except RuntimeError as e:
-            # Errori Whisper (CUDA, modello corrotto, etc.)
-            logger.error(f"Errore Whisper runtime: {e}", exc_info=True)
-            self.error.emit(f"Errore Whisper: {str(e)}")
-        except Exception as e:
-            logger.exception("Errore inaspettato durante trascrizione")
-            self.error.emit(f"Errore trascrizione: {str(e)}")
+    def _transcribed(self, job_id, transcript):
+        store = self._stores.pop(job_id, SegmentStore())
+        self.queue.advance(job_id, transcript=transcript, segments=store.to_dicts())
+        buffer = self._buffers.pop(job_id, None)
+        if buffer is not None:
+            buffer.close()
+        self._stage_done(job_id)
+        self.transcribed.emit(job_id, transcript)
 
+    def _summarized(self, job_id, results):
+        self.queue.advance(job_id, results=results)
+        self._stage_done(job_id)
+        self.finished.emit(job_id, results)
 
-class SummaryWorker(QThread):
-    """Thread per generazione summary con GPT4All - Fixed: JSON parsing, exception handling"""
-    finished = pyqtSignal(dict)
-    error = pyqtSignal(str)
-    progress = pyqtSignal(str)
+    def _failed(self, job_id, error):
+        self.queue.fail(job_id, error)
+        self._stores.pop(job_id, None)
+        buffer = self._buffers.pop(job_id, None)
+        if buffer is not None:
+            buffer.close()
+        self._stage_done(job_id)
+        self.failed.emit(job_id, error)
 
-    def __init__(self, transcript, model_name="Mistral-7B-Instruct-v0.2.Q4_0.gguf"):
-        super().__init__()
-        self.transcript = transcript
-        self.model_name = model_name
-        self.model_path = MODEL_CACHE_DIR / model_name
+    def _stage_done(self, job_id):
+        stage_worker = self.workers.pop(job_id, None)
+        if stage_worker is not None:
+            stage_worker[1].wait()  # run() ritorna subito dopo l'ultimo segnale
+        slot = self._slots.pop(job_id, None)
+        if slot is not None:
+            self._free_slots.append(slot)
+            self._free_slots.sort()
+        self.job_changed.emit(job_id)
+        self.pump()
 
-    def run(self):
-        try:
-            logger.info(f"Avvio generazione summary, modello={self.model_name}, transcript_len={len(self.transcript)}")
+    def retry(self, job_id):
+        self.queue.retry(job_id)
+        self.job_changed.emit(job_id)
+        self.pump()
 
-            # Download modello se non esiste
-            if not self.model_path.exists():
-                self.progress.emit(f"Download modello {self.model_name} (prima volta, ~4 GB)...")
-                self.progress.emit("Questo richiederà alcuni minuti...")
-                logger.info(f"Download modello {self.model_name} in corso...")
-            else:
-                self.progress.emit("Caricamento modello GPT4All...")
-                logger.info("Modello GPT4All già presente in cache")
+    def raise_priority(self, job_id):
+        """Porta un job in attesa davanti a tutti gli altri"""
+        self.queue.set_priority(job_id, self.queue.max_priority() + 1)
+        self.job_changed.emit(job_id)
 
-            # Inizializza GPT4All
-            gpt = GPT4All(
-                model_name=self.model_name,
-                model_path=str(MODEL_CACHE_DIR),
-                allow_download=True
-            )
-            logger.info("Modello GPT4All inizializzato")
 
-            self.progress.emit("Generazione summary...")
+class TextAppender(QObject):
+    """Accoda testo in fondo a un editor a blocchi limitati, coalescendo le append con un timer
 
-            # FIX #7: Richiedi formato JSON strutturato per parsing più robusto
-            prompt = f"""Analizza questa trascrizione e rispondi SOLO con un oggetto JSON valido.
-Non aggiungere testo prima o dopo il JSON.
+    Un setText() da diversi MB blocca l'event loop per secondi: qui ogni passo del timer
+    inserisce al massimo chunk_chars caratteri e la finestra resta reattiva.
+    """
 
-Formato richiesto:
-{{
-    "summary": "Riassunto completo in 3-5 frasi",
-    "key_points": ["punto chiave 1", "punto chiave 2", "punto chiave 3"],
-    "action_items": ["task 1", "task 2"]
-}}
+    def __init__(self, widget, interval_ms=RENDER_INTERVAL_MS, chunk_chars=RENDER_CHUNK_CHARS,
+                 line_chars=RENDER_LINE_CHARS):
+        super().__init__(widget)
+        self.widget = widget
+        self.chunk_chars = chunk_chars
+        self.line_chars = line_chars
+        self._pending = deque()
+        self._length = 0  # caratteri accodati, inseriti o no
+        self._line_length = 0  # caratteri dell'ultima riga
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._render_step)
+        # Niente copia del testo nello stack di undo di un editor in sola lettura
+        widget.setUndoRedoEnabled(False)
 
-Se non ci sono action items, usa array vuoto: "action_items": []
+    @property
+    def pending_chars(self):
+        return sum(len(text) for text in self._pending)
 
-TRASCRIZIONE DA ANALIZZARE:
-{self.transcript}
+    def append(self, text, separator=" "):
+        if not text:
+            return
+        if self._length:
+            text = ("\n" if self._line_length >= self.line_chars else separator) + text
+        text = self._wrap(text)
+        newline = text.rfind("\n")
+        self._line_length = len(text) - newline - 1 if newline >= 0 else self._line_length + len(text)
+        self._pending.append(text)
+        self._length += len(text)
+        if not self._timer.isActive():
+            self._timer.start()
 
-Rispondi SOLO con il JSON, in italiano:"""
+    def _wrap(self, text):
+        """Manda a capo al primo spazio dopo line_chars caratteri"""
+        if len(text) + self._line_length <= self.line_chars:
+            return text
+        lines = []
+        for index, line in enumerate(text.split("\n")):
+            start = 0
+            limit = self.line_chars - (self._line_length if index == 0 else 0)
+            while len(line) - start > limit:
+                cut = line.find(" ", start + max(limit, 0))
+                if cut == -1:
+                    break
+                lines.append(line[start:cut])
+                start = cut + 1
+                limit = self.line_chars
+            lines.append(line[start:])
+        return "\n".join(lines)
 
-            response = gpt.generate(
-                prompt,
-                max_tokens=1000,
-                temp=0.7
-            )
+    def set_text(self, text):
+        self.clear()
+        self.append(text)
 
-            logger.debug(f"Risposta GPT4All ricevuta: {response[:200]}...")
+    def clear(self):
+        self._pending.clear()
+        self._length = 0
+        self._line_length = 0
+        self._timer.stop()
+        self.widget.clear()
 
-            # Parse risposta con fallback
-            parsed = self._parse_response(response)
-            logger.info("Summary generato con successo")
-            self.finished.emit(parsed)
+    def flush(self):
+        """Inserisce subito tutto il testo in attesa"""
+        while self._pending:
+            self._render_step()
 
-        except (IOError, OSError) as e:
-            logger.error(f"Errore I/O durante download/caricamento modello: {e}", exc_info=True)
-            self.error.emit(f"Errore caricamento modello: {str(e)}")
-        except RuntimeError as e:
-            logger.error(f"Errore runtime GPT4All: {e}", exc_info=True)
-            self.error.emit(f"Errore GPT4All: {str(e)}")
-        except Exception as e:
-            logger.exception("Errore inaspettato durante generazione summary")
-            self.error.emit(f"Errore generazione summary: {str(e)}")
+    def _render_step(self):
+        parts = []
+        size = 0
+        while self._pending and size < self.chunk_chars:
+            text = self._pending.popleft()
+            if size + len(text) > self.chunk_chars:
+                # Il resto del blocco al prossimo passo
+                self._pending.appendleft(text[self.chunk_chars - size:])
+                text = text[:self.chunk_chars - size]
+            parts.append(text)
+            size += len(text)
+        if not self._pending:
+            self._timer.stop()
+        if not parts:
+            return
 
-    def _parse_response(self, text):
-        """Estrae summary, key points e action items dalla risposta - FIX #7: JSON parsing"""
-        # Prova prima a parsare come JSON
-        try:
-            # Trova il JSON nella risposta (potrebbe avere testo prima/dopo)
-            text = text.strip()
-
-            # Cerca il primo { e l'ultimo }
-            start = text.find('{')
-            end = text.rfind('}')
-
-            if start != -1 and end != -1:
-                json_str = text[start:end+1]
-                data = json.loads(json_str)
-
-                # Valida che contenga i campi richiesti
-                if "summary" in data and "key_points" in data and "action_items" in data:
-                    logger.info("Parsing JSON riuscito")
-                    return {
-                        "summary": data["summary"].strip() if data["summary"] else "Analisi non disponibile",
-                        "key_points": data["key_points"] if data["key_points"] else ["Nessun punto chiave identificato"],
-                        "action_items": data["action_items"] if data["action_items"] else []
-                    }
-
-        except json.JSONDecodeError as e:
-            logger.warning(f"JSON parsing fallito: {e}, uso fallback")
-        except Exception as e:
-            logger.warning(f"Errore durante parsing JSON: {e}, uso fallback")
+        scrollbar = self.widget.verticalScrollBar()
+        follow = scrollbar.value() == scrollbar.maximum()
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText("".join(parts))
+        # Segue il testo solo se l'utente non sta leggendo più in alto
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
 
-        # Fallback: parsing testuale tradizionale
-        logger.info("Uso fallback parsing testuale")
-        return self._parse_response_fallback(text)
 
-    def _parse_response_fallback(self, text):
-        """Fallback parsing testuale se JSON non funziona"""
-        lines = text.strip().split('\n')
+class SegmentListModel(QAbstractListModel):
+    """Trascrizione come lista di segmenti: le righe vengono create a blocchi durante lo scroll"""
 
-        summary = ""
-        key_points = []
-        action_items = []
+    def __init__(self, store, fetch_rows=LAZY_VIEW_FETCH_ROWS, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.fetch_rows = fetch_rows
+        self._loaded = 0
 
-        current_section = None
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
 
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        segment = self.store[index.row()]
+        if role == Qt.DisplayRole:
+            return f"[{_format_timestamp(segment.start)}] {segment.text}"
+        if role == Qt.ToolTipRole:
+            return (f"{_format_timestamp(segment.start)} - {_format_timestamp(segment.end)}, "
+                    f"logprob {segment.avg_logprob:.2f}, no speech {segment.no_speech_prob:.2f}")
+        return None
 
-            # Identifica sezioni - più keyword per robustezza
-            line_upper = line.upper()
-            if any(keyword in line_upper for keyword in ["SUMMARY", "RIASSUNTO", "SINTESI", "RIEPILOGO"]):
-                current_section = "summary"
-                # Se la linea contiene già testo dopo il marker, estrailo
-                for keyword in ["SUMMARY:", "RIASSUNTO:", "SINTESI:", "RIEPILOGO:"]:
-                    if keyword in line_upper:
-                        idx = line_upper.index(keyword) + len(keyword)
-                        remaining = line[idx:].strip()
-                        if remaining:
-                            summary += remaining + " "
-                continue
-            elif any(keyword in line_upper for keyword in ["KEY POINT", "PUNTI CHIAVE", "PUNTI PRINCIPALI"]):
-                current_section = "key_points"
-                continue
-            elif any(keyword in line_upper for keyword in ["ACTION", "TASK", "TO-DO", "TODO", "AZIONI"]):
-                current_section = "action_items"
-                continue
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self.store)
 
-            # Rimuovi bullet points e numerazione
-            clean_line = line.lstrip('•-*123456789.() \t')
-
-            if current_section == "summary" and clean_line:
-                summary += clean_line + " "
-            elif current_section == "key_points" and clean_line:
-                # Ignora linee che sono solo keyword
-                if clean_line.upper() not in ["KEY POINTS", "PUNTI CHIAVE"]:
-                    key_points.append(clean_line)
-            elif current_section == "action_items" and clean_line:
-                # Ignora "nessuno", "none", etc.
-                if not any(skip in clean_line.lower() for skip in ["nessun", "none", "n/a", "non applicabile"]):
-                    action_items.append(clean_line)
-
-        # Fallback finale: se parsing non ha funzionato, metti tutto nel summary
-        if not summary and not key_points:
-            logger.warning("Fallback totale: tutto in summary")
-            summary = text
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.fetch_rows, len(self.store) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
 
-        return {
-            "summary": summary.strip() or "Analisi non disponibile",
-            "key_points": key_points if key_points else ["Nessun punto chiave identificato"],
-            "action_items": action_items if action_items else []
-        }
+    def segments_added(self, view_at_end=True):
+        """Nuovi segmenti nello store: caricati subito solo se la vista è già in fondo"""
+        if view_at_end and self.canFetchMore():
+            self.fetchMore()
 
 
 class RecorderApp(QMainWindow):
@@ -400,15 +3860,56 @@ class RecorderApp(QMainWindow):
         ("Русский", "ru")
     ]
 
+    # Modelli Whisper nell'ordine di model_combo
+    MODEL_SIZES = ["tiny", "base", "small", "medium"]
+
+    # Stato dei job nella lista della coda, per (stadio, stato)
+    JOB_LABELS = {
+        ("transcribe", "queued"): "⏳ in attesa di trascrizione",
+        ("transcribe", "running"): "📝 trascrizione in corso",
+        ("summarize", "queued"): "⏳ in attesa di analisi",
+        ("summarize", "running"): "🔍 analisi in corso",
+        ("done", "done"): "✅ completato",
+    }
+
     def __init__(self):
         super().__init__()
         logger.info("Inizializzazione RecorderApp")
         self.recorder_thread = None
-        self.transcription_worker = None
-        self.summary_worker = None
+        self.model_preloader = None
+        self.stream_transcriber = None
+        # Registrazione in attesa della fine della trascrizione live
         self.current_audio_file = None
+        # Live fallita o in ritardo: la registrazione viene trascritta per intero alla fine
+        self.live_fallback = False
+        # Modalità della registrazione in corso; self.multitrack segue invece il job mostrato nei pannelli
+        self.recording_multitrack = False
+        self.multitrack = False
+        # Coda delle elaborazioni: trascrizione e analisi proseguono mentre si registra la riunione successiva
+        self.job_queue = JobQueue()
+        self.jobs = JobRunner(self.job_queue, parent=self)
+        self.current_job = None  # job mostrato nei pannelli
+        # Segmenti con timestamp della trascrizione corrente, aggiunti man mano che arrivano
+        self.segments = SegmentStore()
+        self.transcript = ""
+        # Le metriche mostrate nello stato sono solo quelle dell'esecuzione corrente
+        self.run_started = None
         self.init_ui()
+        self.jobs.job_changed.connect(self.on_job_changed)
+        self.jobs.segments_ready.connect(self.on_job_segments)
+        self.jobs.transcribed.connect(self.on_job_transcribed)
+        self.jobs.token.connect(self.on_job_token)
+        self.jobs.partial.connect(self.on_job_partial)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.failed.connect(self.on_job_failed)
+        self.jobs.progress.connect(self.on_job_progress)
+        self.refresh_jobs()
+        self.jobs.pump()  # riprende i job rimasti in coda alla chiusura precedente
         self.load_audio_devices()
+        if PRELOAD_WHISPER_MODEL:
+            self.preload_selected_model()
+            self.model_combo.currentIndexChanged.connect(self.preload_selected_model)
+            self.backend_combo.currentIndexChanged.connect(self.preload_selected_model)
         logger.info("RecorderApp inizializzata")
         
     def init_ui(self):
@@ -428,6 +3929,15 @@ class RecorderApp(QMainWindow):
         device_layout.addWidget(self.device_combo)
         layout.addLayout(device_layout)
 
+        # Secondo dispositivo registrato in parallelo (es. loopback VB-CABLE), traccia separata
+        device2_layout = QHBoxLayout()
+        device2_label = QLabel("Secondo Dispositivo:")
+        self.device2_combo = QComboBox()
+        self.device2_combo.addItem("Nessuno", None)
+        device2_layout.addWidget(device2_label)
+        device2_layout.addWidget(self.device2_combo)
+        layout.addLayout(device2_layout)
+
         # FIX #12: Selezione lingua trascrizione
         language_layout = QHBoxLayout()
         language_label = QLabel("Lingua Trascrizione:")
@@ -453,6 +3963,48 @@ class RecorderApp(QMainWindow):
         model_layout.addWidget(model_label)
         model_layout.addWidget(self.model_combo)
         layout.addLayout(model_layout)
+
+        # Motore di trascrizione: solo quelli installati, default il più veloce
+        backend_layout = QHBoxLayout()
+        backend_label = QLabel("Motore Trascrizione:")
+        self.backend_combo = QComboBox()
+        for name in available_backends():
+            self.backend_combo.addItem(TRANSCRIPTION_BACKENDS[name].label, name)
+        self.backend_combo.setCurrentIndex(max(self.backend_combo.findData(resolve_backend().name), 0))
+        backend_layout.addWidget(backend_label)
+        backend_layout.addWidget(self.backend_combo)
+        layout.addLayout(backend_layout)
+
+        # Trascrizione live durante la registrazione
+        self.live_checkbox = QCheckBox("Trascrizione live durante la registrazione")
+        layout.addWidget(self.live_checkbox)
+
+        # Rimozione silenzi lunghi (VAD)
+        self.vad_checkbox = QCheckBox("Rimuovi silenzi lunghi (VAD)")
+        layout.addWidget(self.vad_checkbox)
+
+        # Registrazione in memoria (nessun file temporaneo, niente ffmpeg)
+        self.memory_checkbox = QCheckBox("Registra in memoria (senza file temporaneo)")
+        layout.addWidget(self.memory_checkbox)
+
+        # Decodifica a batch delle finestre da 30 s (più veloce su CPU multi-core)
+        self.batch_checkbox = QCheckBox("Decodifica a batch (più veloce su GPU e CPU multi-core)")
+        layout.addWidget(self.batch_checkbox)
+
+        # Formato del file di registrazione (compressi solo con soundfile installato)
+        format_layout = QHBoxLayout()
+        format_label = QLabel("Formato Registrazione:")
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("WAV (non compresso)", "wav")
+        if soundfile is not None:
+            self.format_combo.addItem("FLAC (lossless, ~2x più piccolo)", "flac")
+            self.format_combo.addItem("Opus (~10x più piccolo)", "opus")
+        index = self.format_combo.findData(resolve_recording_format(RECORDING_FORMAT))
+        self.format_combo.setCurrentIndex(max(index, 0))
+        self.memory_checkbox.toggled.connect(lambda checked: self.format_combo.setEnabled(not checked))
+        format_layout.addWidget(format_label)
+        format_layout.addWidget(self.format_combo)
+        layout.addLayout(format_layout)
         
         # Pulsanti controllo
         btn_layout = QHBoxLayout()
@@ -483,10 +4035,18 @@ class RecorderApp(QMainWindow):
         transcript_label.setFont(QFont("Arial", 10, QFont.Bold))
         layout.addWidget(transcript_label)
         
-        self.transcript_text = QTextEdit()
+        # QPlainTextEdit per testi lunghi; oltre LAZY_VIEW_SEGMENTS una vista per segmento
+        self.transcript_text = QPlainTextEdit()
         self.transcript_text.setReadOnly(True)
         self.transcript_text.setPlaceholderText("La trascrizione apparirà qui...")
-        layout.addWidget(self.transcript_text)
+        self.transcript_appender = TextAppender(self.transcript_text)
+        self.transcript_view = QListView()
+        self.transcript_view.setUniformItemSizes(True)
+        self.transcript_model = None
+        self.transcript_stack = QStackedWidget()
+        self.transcript_stack.addWidget(self.transcript_text)
+        self.transcript_stack.addWidget(self.transcript_view)
+        layout.addWidget(self.transcript_stack)
         
         # Area risultati
         results_label = QLabel("🔍 ANALISI:")
@@ -496,6 +4056,7 @@ class RecorderApp(QMainWindow):
         self.results_text = QTextEdit()
         self.results_text.setReadOnly(True)
         self.results_text.setPlaceholderText("Summary, key points e action items appariranno qui...")
+        self.results_appender = TextAppender(self.results_text)
         layout.addWidget(self.results_text)
         
         # Pulsante salvataggio
@@ -504,7 +4065,24 @@ class RecorderApp(QMainWindow):
         self.btn_save.clicked.connect(self.save_results)
         self.btn_save.setEnabled(False)
         layout.addWidget(self.btn_save)
-        
+
+        # Coda delle elaborazioni: un clic mostra trascrizione e analisi del job
+        jobs_label = QLabel("📋 CODA ELABORAZIONI:")
+        jobs_label.setFont(QFont("Arial", 10, QFont.Bold))
+        layout.addWidget(jobs_label)
+        self.jobs_list = QListWidget()
+        self.jobs_list.setMaximumHeight(110)
+        self.jobs_list.itemClicked.connect(self.show_job)
+        layout.addWidget(self.jobs_list)
+        jobs_btn_layout = QHBoxLayout()
+        self.btn_job_priority = QPushButton("⬆ Elabora per primo")
+        self.btn_job_priority.clicked.connect(self.raise_job_priority)
+        self.btn_job_retry = QPushButton("↻ Riprova")
+        self.btn_job_retry.clicked.connect(self.retry_job)
+        jobs_btn_layout.addWidget(self.btn_job_priority)
+        jobs_btn_layout.addWidget(self.btn_job_retry)
+        layout.addLayout(jobs_btn_layout)
+
     def load_audio_devices(self):
         """Carica lista dispositivi audio disponibili - Fixed: better error handling"""
         p = None
@@ -518,6 +4096,7 @@ class RecorderApp(QMainWindow):
                     if info['maxInputChannels'] > 0:
                         device_name = info.get('name', f'Device {i}')
                         self.device_combo.addItem(device_name, i)
+                        self.device2_combo.addItem(device_name, i)
                         device_count += 1
                         logger.debug(f"Device trovato: {device_name} (index {i})")
                 except (OSError, ValueError) as e:
@@ -547,6 +4126,22 @@ class RecorderApp(QMainWindow):
                 except:
                     pass
         
+    def selected_model_size(self):
+        index = self.model_combo.currentIndex()
+        if 0 <= index < len(self.MODEL_SIZES):
+            return self.MODEL_SIZES[index]
+        return "base"
+
+    def preload_selected_model(self):
+        """Carica in background il modello selezionato così la trascrizione parte subito"""
+        if self.model_preloader and self.model_preloader.isRunning():
+            return
+        model_size = self.selected_model_size()
+        backend = self.backend_combo.currentData()
+        logger.info(f"Preload modello Whisper '{model_size}' ({backend})")
+        self.model_preloader = ModelPreloader(model_size, backend)
+        self.model_preloader.start()
+
     def toggle_recording(self):
         if self.recorder_thread is None or not self.recorder_thread.isRunning():
             self.start_recording()
@@ -586,9 +4181,50 @@ class RecorderApp(QMainWindow):
                 except:
                     pass
 
+        # Multi-traccia: secondo dispositivo diverso dal primo
+        second_device = self.device2_combo.currentData()
+        if second_device == device_index:
+            second_device = None
+        self.recording_multitrack = second_device is not None
+        self.multitrack = self.recording_multitrack
+
+        # Precarica GPT4All mentre si registra (solo se già scaricato)
+        llm_host = get_llm_host(DEFAULT_LLM_MODEL)
+        if llm_host.model_path.exists():
+            llm_host.warmup()
+
+        self.run_started = datetime.now().isoformat(timespec="milliseconds")
+
+        # Trascrizione live: il recorder accoda i chunk per lo StreamingTranscriber
+        chunk_queue = None
+        self.stream_transcriber = None
+        self.live_fallback = False
+        if self.live_checkbox.isChecked() and not self.recording_multitrack:
+            chunk_queue = queue.Queue(STREAM_QUEUE_CHUNKS)
+            self.stream_transcriber = StreamingTranscriber(
+                chunk_queue, self.selected_model_size(), self.language_combo.currentData(),
+                backend=self.backend_combo.currentData()
+            )
+            self.stream_transcriber.segments_ready.connect(self.on_segments)
+            self.stream_transcriber.finished.connect(self.on_transcription_finished)
+            self.stream_transcriber.error.connect(self.on_live_error)
+            self.stream_transcriber.start()
+
         # Avvia registrazione
         logger.info("Avvio thread di registrazione")
-        self.recorder_thread = AudioRecorder(device_index)
+        if self.recording_multitrack:
+            # Live, VAD e memoria non si applicano: le tracce devono restare allineate su file
+            labels = [self.device_combo.currentText(), self.device2_combo.currentText()]
+            self.recorder_thread = MultiTrackRecorder([device_index, second_device], labels,
+                                                      audio_format=self.format_combo.currentData())
+        else:
+            self.recorder_thread = AudioRecorder(device_index, chunk_queue=chunk_queue,
+                                                 vad=self.vad_checkbox.isChecked(),
+                                                 in_memory=self.memory_checkbox.isChecked(),
+                                                 audio_format=self.format_combo.currentData(),
+                                                 recording_dir=self.job_queue.recordings_dir)
+            self.recorder_thread.buffer_ready.connect(self.on_recording_finished)
+            self.recorder_thread.live_stopped.connect(self.on_live_error)
         self.recorder_thread.finished.connect(self.on_recording_finished)
         self.recorder_thread.error.connect(self.on_error)
         self.recorder_thread.start()
@@ -597,8 +4233,9 @@ class RecorderApp(QMainWindow):
         self.btn_stop.setEnabled(True)
         self.status_label.setText("🔴 Registrazione in corso...")
         self.status_label.setStyleSheet("font-size: 12px; padding: 5px; color: red; font-weight: bold;")
-        self.transcript_text.clear()
-        self.results_text.clear()
+        self.current_job = None  # i pannelli ora seguono la nuova registrazione
+        self.reset_transcript()
+        self.results_appender.clear()
         self.btn_save.setEnabled(False)
         
     def stop_recording(self):
@@ -609,86 +4246,256 @@ class RecorderApp(QMainWindow):
             self.status_label.setStyleSheet("font-size: 12px; padding: 5px;")
             
     def on_recording_finished(self, audio_file):
-        """Callback registrazione completata - avvia trascrizione con lingua selezionata"""
-        self.current_audio_file = audio_file
-        self.btn_record.setEnabled(True)
-        self.status_label.setText("✅ Registrazione salvata. Avvio trascrizione...")
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)  # Indeterminato
-
+        """Callback registrazione completata - accoda la trascrizione con lingua selezionata"""
         logger.info(f"Registrazione completata: {audio_file}")
 
-        # Avvia trascrizione
-        model_mapping = {
-            0: "tiny",
-            1: "base",
-            2: "small",
-            3: "medium"
-        }
-        model_size = model_mapping.get(self.model_combo.currentIndex(), "base")
+        # Trascrizione live: manca solo l'ultimo chunk, il job partirà dall'analisi
+        if self.stream_transcriber is not None and not self.live_fallback:
+            self.current_audio_file = audio_file
+            self.status_label.setText("✅ Registrazione salvata. Completamento trascrizione live...")
+            return
+
+        model_size = self.selected_model_size()
 
         # FIX #12: Passa la lingua selezionata
         language_code = self.language_combo.currentData()
-        logger.info(f"Avvio trascrizione con model={model_size}, language={language_code}")
+        logger.info(f"Accodamento trascrizione con model={model_size}, language={language_code}")
+
+        decode_batch = DECODE_BATCH_SIZE if self.batch_checkbox.isChecked() else 1
+        self.current_job = self.jobs.submit(audio_file, model_size=model_size, language=language_code,
+                                            multitrack=self.recording_multitrack, decode_batch=decode_batch,
+                                            backend=self.backend_combo.currentData())
+        # I pannelli tornano alla nuova registrazione anche se nel frattempo si è consultato un altro job
+        self.multitrack = self.recording_multitrack
+        self.reset_transcript()
+        self.results_appender.clear()
+        # La prossima riunione si può registrare subito
+        self.btn_record.setEnabled(True)
+        self.status_label.setText("✅ Registrazione salvata. In coda per la trascrizione...")
+
+    def reset_transcript(self):
+        self.segments = SegmentStore()
+        self.transcript = ""
+        self.transcript_appender.clear()
+        self.transcript_model = None
+        self.transcript_view.setModel(None)
+        self.transcript_stack.setCurrentWidget(self.transcript_text)
+
+    def append_transcript(self, text):
+        """Aggiunge testo in coda alla trascrizione senza ridisegnarla"""
+        self.transcript_appender.append(text)
+
+    def on_segments(self, segments):
+        """Aggiunge i nuovi segmenti in coda, senza ridisegnare l'intera trascrizione"""
+        added = self.segments.extend(segments)
+        if self.multitrack:
+            return
+        if self.transcript_model is not None:
+            scrollbar = self.transcript_view.verticalScrollBar()
+            self.transcript_model.segments_added(scrollbar.value() == scrollbar.maximum())
+        elif len(self.segments) > LAZY_VIEW_SEGMENTS:
+            self.show_segment_view()
+        else:
+            text = " ".join(segment.text for segment in added if segment.text)
+            if text:
+                self.append_transcript(text)
+
+    def show_segment_view(self):
+        """Passa alla vista per segmento: il testo resta solo nello store, Qt disegna le righe visibili"""
+        logger.info(f"Trascrizione lunga ({len(self.segments)} segmenti): vista per segmento")
+        self.transcript_appender.clear()
+        self.transcript_model = SegmentListModel(self.segments, parent=self)
+        self.transcript_model.fetchMore()
+        self.transcript_view.setModel(self.transcript_model)
+        self.transcript_stack.setCurrentWidget(self.transcript_view)
 
-        self.transcription_worker = TranscriptionWorker(audio_file, model_size, language_code)
-        self.transcription_worker.finished.connect(self.on_transcription_finished)
-        self.transcription_worker.error.connect(self.on_error)
-        self.transcription_worker.progress.connect(self.update_status)
-        self.transcription_worker.start()
-        
     def on_transcription_finished(self, transcript):
-        self.transcript_text.setText(transcript)
-        self.update_status("✅ Trascrizione completata. Generazione analisi...")
-        
-        # Avvia summary
-        self.summary_worker = SummaryWorker(transcript)
-        self.summary_worker.finished.connect(self.on_summary_finished)
-        self.summary_worker.error.connect(self.on_error)
-        self.summary_worker.progress.connect(self.update_status)
-        self.summary_worker.start()
-        
+        """Fine della trascrizione live: l'analisi passa dalla coda come per le altre registrazioni"""
+        audio_file = self.current_audio_file
+        self.current_audio_file = None
+        if isinstance(audio_file, AudioBuffer):
+            audio_file.close()  # trascrizione già fatta: l'audio non serve più
+            audio_file = None
+        self.current_job = self.jobs.submit(audio_file, stage="summarize", transcript=transcript,
+                                            segments=self.segments.to_dicts())
+        self.btn_record.setEnabled(True)
+        self.show_transcript(transcript)
+
+    def show_transcript(self, transcript):
+        self.transcript = transcript
+        # Multi-traccia: una riga per intervento, scritta una volta sola a fine trascrizione
+        if self.multitrack or not self.segments:
+            self.transcript_appender.set_text(transcript)
+        self.results_appender.clear()
+        self.update_status(self.with_stage_stats("✅ Trascrizione completata. In coda per l'analisi..."))
+
+    def on_summary_token(self, token):
+        # Token grezzi in coda: mostrano il campo in corso di generazione
+        self.results_appender.append(token, separator="")
+
+    def on_summary_partial(self, fields):
+        # Campi completi formattati, quelli ancora in generazione come segnaposto
+        placeholders = {"summary": "…", "key_points": ["…"], "action_items": ["…"]}
+        self.results_appender.set_text(format_analysis({**placeholders, **fields}) + "\n")
+
     def on_summary_finished(self, results):
         # Formatta risultati
-        output = "📝 SUMMARY\n"
-        output += "=" * 80 + "\n"
-        output += results.get("summary", "N/A") + "\n\n"
-        
-        output += "🔑 KEY POINTS\n"
-        output += "=" * 80 + "\n"
-        for point in results.get("key_points", []):
-            output += f"• {point}\n"
-        output += "\n"
-        
-        output += "✅ ACTION ITEMS\n"
-        output += "=" * 80 + "\n"
-        action_items = results.get("action_items", [])
-        if action_items:
-            for item in action_items:
-                output += f"☐ {item}\n"
-        else:
-            output += "Nessun action item identificato\n"
-        
-        self.results_text.setText(output)
-        self.progress_bar.setVisible(False)
-        self.update_status("✅ Completato! - Tutti i dati rimangono sul tuo PC")
+        output = format_analysis(results)
+
+        self.results_appender.set_text(output)
+        self.update_status(self.with_stage_stats("✅ Completato! - Tutti i dati rimangono sul tuo PC"))
         self.btn_save.setEnabled(True)
-        
-        # Pulizia file temporaneo
-        if self.current_audio_file and os.path.exists(self.current_audio_file):
+
+    def refresh_jobs(self):
+        """Ridisegna la lista della coda mantenendo selezionato il job mostrato"""
+        self.jobs_list.clear()
+        for job in self.job_queue.jobs():
+            label = self.JOB_LABELS.get((job["stage"], job["status"]), "❌ errore")
+            item = QListWidgetItem(f"#{job['id']} {job['name']} — {label}")
+            item.setData(Qt.UserRole, job["id"])
+            if job["error"]:
+                item.setToolTip(job["error"])
+            self.jobs_list.addItem(item)
+            if job["id"] == self.current_job:
+                self.jobs_list.setCurrentItem(item)
+
+    def selected_job(self):
+        item = self.jobs_list.currentItem()
+        return item.data(Qt.UserRole) if item is not None else None
+
+    def show_job(self, item):
+        """Mostra trascrizione e analisi (anche parziali) di un job della coda"""
+        if self.stream_transcriber is not None and self.stream_transcriber.isRunning():
+            self.update_status("⏳ Trascrizione live in corso: attendi la fine per cambiare job")
+            return
+        job = self.job_queue.get(item.data(Qt.UserRole))
+        self.current_job = job["id"]
+        self.multitrack = job["options"].get("multitrack", False)
+        self.reset_transcript()
+        self.results_appender.clear()
+        store = self.jobs.segments(job["id"])
+        if store is None:
+            store = SegmentStore(Segment(**segment) for segment in job["segments"] or [])
+        self.on_segments(list(store))
+        if job["transcript"] is not None:
+            self.transcript = job["transcript"]
+            if self.multitrack or not self.segments:
+                self.transcript_appender.set_text(job["transcript"])
+        if job["results"]:
+            self.results_appender.set_text(format_analysis(job["results"]))
+        self.btn_save.setEnabled(job["status"] == "done")
+        label = self.JOB_LABELS.get((job["stage"], job["status"]), f"❌ {job['error']}")
+        self.update_status(f"Job #{job['id']}: {label}")
+
+    def raise_job_priority(self):
+        job_id = self.selected_job()
+        if job_id is not None:
+            self.jobs.raise_priority(job_id)
+
+    def retry_job(self):
+        job_id = self.selected_job()
+        if job_id is not None and self.job_queue.get(job_id)["status"] == "failed":
+            self.jobs.retry(job_id)
+
+    def on_job_changed(self, job_id):
+        self.refresh_jobs()
+        active = self.jobs.active()
+        self.progress_bar.setVisible(active)
+        if active:
+            self.progress_bar.setRange(0, 0)  # Indeterminato
+
+    def on_job_segments(self, job_id, segments):
+        if job_id == self.current_job:
+            self.on_segments(segments)
+
+    def on_job_transcribed(self, job_id, transcript):
+        if job_id == self.current_job:
+            self.show_transcript(transcript)
+
+    def on_job_token(self, job_id, token):
+        if job_id == self.current_job:
+            self.on_summary_token(token)
+
+    def on_job_partial(self, job_id, fields):
+        if job_id == self.current_job:
+            self.on_summary_partial(fields)
+
+    def on_job_finished(self, job_id, results):
+        if job_id == self.current_job:
+            self.on_summary_finished(results)
+        else:
+            self.update_status(f"✅ Job #{job_id} completato")
+
+    def on_job_progress(self, job_id, message):
+        if job_id == self.current_job:
+            self.update_status(message)
+
+    def on_job_failed(self, job_id, error_msg):
+        if job_id != self.current_job:
+            # Job in background: l'errore resta nella lista della coda
+            self.update_status(f"❌ Job #{job_id} fallito: {error_msg}")
+            return
+        self.status_label.setText("❌ Errore")
+        self.status_label.setStyleSheet("font-size: 12px; padding: 5px; color: red;")
+        QMessageBox.critical(self, "Errore", error_msg)
+
+    def stop_live_transcription(self):
+        """Ferma la trascrizione live e l'invio dei chunk da parte del recorder"""
+        if isinstance(self.recorder_thread, AudioRecorder):
+            self.recorder_thread.stop_live()
+        if self.stream_transcriber is not None and self.stream_transcriber.isRunning():
             try:
-                os.remove(self.current_audio_file)
-            except:
-                pass
-                
+                self.stream_transcriber.finished.disconnect(self.on_transcription_finished)
+            except TypeError:
+                pass  # già disconnesso
+            self.stream_transcriber.stop()
+
+    def on_live_error(self, error_msg):
+        """Trascrizione live fallita o in ritardo: la registrazione prosegue e viene trascritta per intero"""
+        if self.live_fallback:
+            return
+        logger.warning(f"Trascrizione live interrotta ({error_msg}), trascrizione a fine registrazione")
+        self.live_fallback = True
+        self.stop_live_transcription()
+        self.update_status(f"⚠️ {error_msg}: la registrazione verrà trascritta al termine")
+        if self.current_audio_file is not None:
+            # Registrazione già conclusa in attesa dell'ultimo chunk live
+            audio_file, self.current_audio_file = self.current_audio_file, None
+            self.on_recording_finished(audio_file)
+
     def on_error(self, error_msg):
-        self.progress_bar.setVisible(False)
+        # Una registrazione fallita non deve proseguire con trascrizione live e summary
+        self.stop_live_transcription()
+        self.progress_bar.setVisible(self.jobs.active())
         self.status_label.setText("❌ Errore")
         self.status_label.setStyleSheet("font-size: 12px; padding: 5px; color: red;")
         QMessageBox.critical(self, "Errore", error_msg)
         self.btn_record.setEnabled(True)
         self.btn_stop.setEnabled(False)
         
+    def stage_stats(self):
+        """Real-time factor della trascrizione e token/s del summary per l'esecuzione corrente"""
+        def current(name):
+            record = metrics.last(name)
+            if record is None or self.run_started is None or record["ts"] < self.run_started:
+                return None
+            return record
+
+        parts = []
+        transcribe = current("whisper.transcribe") or current("whisper.transcribe_chunk")
+        if transcribe and transcribe.get("rtf") is not None:
+            parts.append(f"RTF {transcribe['rtf']:.2f}")
+        generate = current("llm.generate")
+        if generate and generate.get("tokens_per_second"):
+            parts.append(f"{generate['tokens_per_second']:.1f} tok/s")
+        if generate and generate.get("prefix_tokens_saved"):
+            parts.append(f"prefisso in cache: {generate['prefix_tokens_saved']} tok")
+        return " · ".join(parts)
+
+    def with_stage_stats(self, message):
+        stats = self.stage_stats()
+        return f"{message} ({stats})" if stats else message
+
     def update_status(self, message):
         self.status_label.setText(message)
         self.status_label.setStyleSheet("font-size: 12px; padding: 5px;")
@@ -725,16 +4532,10 @@ class RecorderApp(QMainWindow):
                 logger.info(f"Salvataggio risultati in: {file_path}")
 
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("=" * 80 + "\n")
-                    f.write("AUDIO RECORDER & TRANSCRIBER - ANALISI\n")
-                    f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                    f.write("=" * 80 + "\n\n")
-
-                    f.write("TRASCRIZIONE\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(self.transcript_text.toPlainText())
-                    f.write("\n\n")
-                    f.write(self.results_text.toPlainText())
+                    # Dal testo completo: l'editor può essere ancora in rendering o sostituito dalla vista
+                    self.results_appender.flush()
+                    f.write(format_report(self.transcript or self.segments.text,
+                                          self.results_text.toPlainText(), self.segments))
 
                 logger.info("Risultati salvati con successo")
                 QMessageBox.information(self, "Successo", f"Risultati salvati in:\n{file_path}")
@@ -758,23 +4559,31 @@ class RecorderApp(QMainWindow):
         # Ferma thread di registrazione
         if self.recorder_thread and self.recorder_thread.isRunning():
             logger.info("Fermando thread di registrazione...")
+            if isinstance(self.recorder_thread, AudioRecorder):
+                self.recorder_thread.stop_live()  # non attendere il consumer della live
             threads_to_stop.append(("Registrazione", self.recorder_thread, True))
 
-        # Ferma thread di trascrizione
-        if self.transcription_worker and self.transcription_worker.isRunning():
-            logger.info("Fermando thread di trascrizione...")
-            threads_to_stop.append(("Trascrizione", self.transcription_worker, False))
+        # Ferma i job in corso: restano nella coda e ripartono al prossimo avvio
+        for job_id, (stage, worker) in self.jobs.workers.items():
+            if worker.isRunning():
+                logger.info(f"Fermando job #{job_id} ({stage})...")
+                # Il summary si ferma al prossimo token: terminate() lascerebbe il lock di GPT4All acquisito
+                threads_to_stop.append((f"Job #{job_id}", worker, isinstance(worker, SummaryWorker)))
 
-        # Ferma thread di summary
-        if self.summary_worker and self.summary_worker.isRunning():
-            logger.info("Fermando thread di summary...")
-            threads_to_stop.append(("Summary", self.summary_worker, False))
+        # Ferma trascrizione live
+        if self.stream_transcriber and self.stream_transcriber.isRunning():
+            logger.info("Fermando trascrizione live...")
+            threads_to_stop.append(("Trascrizione live", self.stream_transcriber, False))
+
+        # Ferma preload modello
+        if self.model_preloader and self.model_preloader.isRunning():
+            threads_to_stop.append(("Preload", self.model_preloader, False))
 
         # Ferma tutti i thread
         for name, thread, use_stop in threads_to_stop:
             try:
                 if use_stop:
-                    # Per AudioRecorder usa il metodo stop()
+                    # Per AudioRecorder e SummaryWorker usa il metodo stop()
                     thread.stop()
                 else:
                     # Per altri thread usa terminate()
@@ -783,19 +4592,755 @@ class RecorderApp(QMainWindow):
                 # Aspetta max 3 secondi
                 if not thread.wait(3000):
                     logger.warning(f"Thread {name} non si è fermato entro 3 secondi")
-                    thread.terminate()  # Force terminate
+                    # Niente terminate per il summary: shutdown_llm_hosts() salta l'host se resta occupato
+                    if not isinstance(thread, SummaryWorker):
+                        thread.terminate()  # Force terminate
                 else:
                     logger.info(f"Thread {name} fermato correttamente")
             except Exception as e:
                 logger.error(f"Errore fermando thread {name}: {e}")
 
-        # Cleanup file temporanei
+        # Cleanup file temporanei e modelli residenti (dopo l'attesa dei worker)
         cleanup_temp_files()
+        shutdown_llm_hosts()
+        self.job_queue.close()
 
         logger.info("Applicazione chiusa")
         event.accept()
 
 
+def collect_audio_files(paths, recursive=False):
+    """Espande file e directory nella lista dei file audio da elaborare"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            files.extend(sorted(f for f in path.glob(pattern)
+                                if f.is_file() and f.suffix.lower() in AUDIO_EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            logger.warning(f"Percorso ignorato, non trovato: {path}")
+    # Rimuovi duplicati mantenendo l'ordine
+    return list(dict.fromkeys(f.resolve() for f in files))
+
+
+def audio_duration(audio_file):
+    """Durata in secondi dall'header (None per formati che richiedono decodifica)"""
+    try:
+        with wave.open(str(audio_file), 'rb') as wf:
+            return wf.getnframes() / wf.getframerate()
+    except (wave.Error, EOFError, OSError):
+        pass
+    if soundfile is not None:
+        try:
+            return soundfile.info(str(audio_file)).duration
+        except (RuntimeError, OSError):
+            pass
+    return None
+
+
+def output_paths(audio_file):
+    """Percorsi del report testuale e JSON scritti accanto al file audio"""
+    audio_file = Path(audio_file)
+    base = audio_file.stem + ANALYSIS_SUFFIX
+    return audio_file.with_name(base + ".txt"), audio_file.with_name(base + ".json")
+
+
+def process_audio_file(audio_file, model_size="base", language="it", summarize=True,
+                       llm_model=DEFAULT_LLM_MODEL, instance=0, decode_batch=1, backend=None, llm_per_worker=False):
+    """Trascrive (e analizza) un file e scrive i risultati accanto all'originale
+
+    Di default tutti i worker condividono un solo host GPT4All (~4 GB) e le analisi si mettono in coda
+    sul suo lock; con llm_per_worker ogni worker carica il proprio modello (memoria x worker).
+    """
+    start = time.monotonic()
+    result = transcribe_audio(str(audio_file), model_size, language, instance=instance, cache=result_cache,
+                              decode_batch=decode_batch, backend=backend)
+    transcript = result["text"].strip()
+    segments = SegmentStore(result.get("segments", []))
+
+    analysis = None
+    if summarize and transcript:
+        host = get_llm_host(llm_model, instance if llm_per_worker else 0)
+        analysis = summarize_transcript(transcript, llm_model, hosts=[host], cache=result_cache, segments=segments)
+
+    txt_path, json_path = output_paths(audio_file)
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write(format_report(transcript, format_analysis(analysis) if analysis else "", segments))
+    # Il JSON viene scritto per ultimo: la sua presenza indica un file completato
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "audio_file": str(audio_file),
+            "model": model_size,
+            "backend": resolve_backend(backend).name,
+            "language": language,
+            "transcript": transcript,
+            "segments": segments.to_dicts(),
+            "analysis": analysis
+        }, f, ensure_ascii=False, indent=2)
+
+    duration = audio_duration(audio_file)
+    if duration is None and segments:
+        duration = segments.duration
+
+    return {
+        "file": str(audio_file),
+        "chars": len(transcript),
+        "elapsed": time.monotonic() - start,
+        "duration": duration or 0.0
+    }
+
+
+def run_batch(files, workers=1, **options):
+    """Elabora i file con un pool di worker; ritorna il numero di file falliti"""
+    # Ogni worker usa la propria istanza Whisper (non thread-safe); GPT4All è condiviso salvo llm_per_worker
+    instances = queue.Queue()
+    for instance in range(workers):
+        instances.put(instance)
+
+    def job(audio_file):
+        instance = instances.get()
+        try:
+            return process_audio_file(audio_file, instance=instance, **options)
+        finally:
+            instances.put(instance)
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(job, f): f for f in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            audio_file = futures[future]
+            try:
+                info = future.result()
+                logger.info(f"[{done}/{len(files)}] {audio_file} completato in {info['elapsed']:.1f}s")
+            except Exception as e:
+                failures += 1
+                logger.error(f"[{done}/{len(files)}] {audio_file} fallito: {e}", exc_info=True)
+    return failures
+
+
+def _init_batch_process(core_queue, threads, model_size, backend=None):
+    """Initializer dei processi batch: pinning dei core, thread torch e modello residente"""
+    cores = core_queue.get()
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    TranscriptionBackend.cpu_threads = threads
+    try:
+        resolve_backend(backend).get_model(model_size)
+    except Exception as e:
+        # Il job ritenterà il caricamento e riporterà l'errore sul file
+        logger.error(f"Preload Whisper fallito nel processo {os.getpid()}: {e}")
+    logger.info(f"Processo batch {os.getpid()} pronto: {threads} thread, core {cores or 'non vincolati'}")
+
+
+def _run_batch_job(audio_file, options):
+    return process_audio_file(audio_file, **options)
+
+
+def aggregate_batch_report(results, failures, wall_seconds):
+    """Statistiche aggregate con due real-time factor (< 1 = più veloce del tempo reale)
+
+    wall_rtf = tempo reale trascorso / durata audio: il throughput del batch, cala con più processi.
+    compute_rtf = somma dei tempi dei singoli file / durata audio: il costo per file, indipendente dal parallelismo.
+    """
+    audio_seconds = sum(r["duration"] for r in results)
+    compute_seconds = sum(r["elapsed"] for r in results)
+    return {
+        "files": len(results),
+        "failures": failures,
+        "audio_seconds": audio_seconds,
+        "wall_seconds": wall_seconds,
+        "compute_seconds": compute_seconds,
+        "wall_rtf": wall_seconds / audio_seconds if audio_seconds else None,
+        "compute_rtf": compute_seconds / audio_seconds if audio_seconds else None,
+        "per_file_rtf": {r["file"]: r["elapsed"] / r["duration"] for r in results if r["duration"]}
+    }
+
+
+class BatchScheduler:
+    """Scheduler multi-processo: ogni processo ha il proprio modello residente e i propri core"""
+
+    def __init__(self, processes=None, threads_per_worker=BATCH_THREADS_PER_WORKER, pin_cores=True):
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.processes = processes or max(1, len(self.available_cores()) // self.threads_per_worker)
+        self.pin_cores = pin_cores
+
+    @staticmethod
+    def available_cores():
+        if hasattr(os, "sched_getaffinity"):
+            return sorted(os.sched_getaffinity(0))
+        return list(range(os.cpu_count() or 1))
+
+    def core_sets(self):
+        """Core assegnati a ciascun processo (None = nessun pinning)"""
+        cores = self.available_cores()
+        sets = []
+        for i in range(self.processes):
+            assigned = cores[i * self.threads_per_worker:(i + 1) * self.threads_per_worker]
+            # Più processi che core disponibili: lascia decidere lo scheduler del SO
+            sets.append(assigned if self.pin_cores and len(assigned) == self.threads_per_worker else None)
+        return sets
+
+    @staticmethod
+    def order_longest_first(files):
+        """Ordina per durata decrescente: i file lunghi non restano in coda alla fine"""
+        def weight(audio_file):
+            duration = audio_duration(audio_file)
+            if duration is None:
+                duration = os.path.getsize(audio_file) / COMPRESSED_BYTES_PER_SECOND
+            return duration
+        return sorted(files, key=weight, reverse=True)
+
+    def run(self, files, **options):
+        """Elabora i file sul pool di processi e ritorna il report aggregato"""
+        files = self.order_longest_first(files)
+        model_size = options.get("model_size", "base")
+
+        # spawn anche su Linux: niente fork di thread torch/Qt già avviati
+        ctx = multiprocessing.get_context("spawn")
+        core_queue = ctx.Queue()
+        for cores in self.core_sets():
+            core_queue.put(cores)
+
+        logger.info(f"Scheduler batch: {len(files)} file, {self.processes} processi x {self.threads_per_worker} thread")
+        start = time.monotonic()
+        results = []
+        failures = 0
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=ctx, initializer=_init_batch_process,
+                                 initargs=(core_queue, self.threads_per_worker, model_size,
+                                           options.get("backend"))) as executor:
+            futures = {executor.submit(_run_batch_job, f, options): f for f in files}
+            for done, future in enumerate(as_completed(futures), 1):
+                audio_file = futures[future]
+                try:
+                    info = future.result()
+                    results.append(info)
+                    logger.info(f"[{done}/{len(files)}] {audio_file} completato in {info['elapsed']:.1f}s")
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"[{done}/{len(files)}] {audio_file} fallito: {e}")
+
+        report = aggregate_batch_report(results, failures, time.monotonic() - start)
+        if report["wall_rtf"] is not None:
+            logger.info(f"Audio {report['audio_seconds'] / 60:.1f} min in {report['wall_seconds'] / 60:.1f} min, "
+                        f"RTF aggregato {report['wall_rtf']:.3f} (calcolo {report['compute_rtf']:.3f})")
+        return report
+
+
+class RequestError(Exception):
+    """Errore da restituire al client HTTP con il relativo status"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class TranscriptionServer:
+    """Servizio HTTP locale su asyncio: riceve audio, li accoda nella JobQueue e li elabora con modelli residenti
+
+    Endpoint (JSON):
+      POST /jobs?name=riunione.m4a&model=base&language=it&summary=1  corpo = audio (Content-Length o chunked)
+           -> 202 {"id": ...}; con wait=1 risponde a elaborazione conclusa con il job completo
+      GET  /jobs, GET /jobs/<id>, POST /jobs/<id>/retry, GET /health
+
+    Ogni stadio ha concurrency[stadio] worker, ognuno con la propria istanza Whisper/GPT4All (slot).
+    Con max_pending job tra upload, coda ed esecuzione le nuove richieste ricevono 503 con Retry-After.
+    Le chiamate alla JobQueue (SQLite, bloccanti) passano da un thread dedicato, mai dal loop asyncio.
+    """
+
+    def __init__(self, job_queue, concurrency=None, max_pending=SERVER_MAX_PENDING,
+                 max_upload_bytes=SERVER_MAX_UPLOAD_BYTES, model_size="base", language="it", backend=None,
+                 decode_batch=1, model_name=DEFAULT_LLM_MODEL, preload=True):
+        self.queue = job_queue
+        self.concurrency = dict(concurrency or JOB_CONCURRENCY)
+        self.max_pending = max_pending
+        self.max_upload_bytes = max_upload_bytes
+        self.defaults = {"model_size": model_size, "language": language, "backend": backend,
+                         "decode_batch": decode_batch, "model_name": model_name}
+        self.preload = preload
+        self.executor = ThreadPoolExecutor(max_workers=sum(self.concurrency.values()),
+                                           thread_name_prefix="server-worker")
+        # Un solo thread: le chiamate alla coda restano serializzate come sul loop
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-db")
+        self._uploading = 0
+        self._work = {}  # stadio -> asyncio.Event, segnalato quando ci sono job in attesa
+        self._done = {}  # job id -> asyncio.Event per le richieste con wait=1
+        self._tasks = []
+        self._server = None
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        """Avvia worker e socket in ascolto; ritorna (host, porta) effettivi"""
+        await self._db(self.queue.recover)
+        if self.preload:
+            self._preload_models()
+        for stage in JOB_STAGES:
+            self._work[stage] = asyncio.Event()
+            self._work[stage].set()
+            for slot in range(self.concurrency.get(stage, 1)):
+                self._tasks.append(asyncio.create_task(self._stage_worker(stage, slot)))
+        self._server = await asyncio.start_server(self.handle, host, port)
+        address = self._server.sockets[0].getsockname()[:2]
+        logger.info(f"Servizio in ascolto su http://{address[0]}:{address[1]}, worker {self.concurrency}, "
+                    f"max {self.max_pending} job in attesa")
+        return address
+
+    async def stop(self):
+        """Chiude il socket e ferma i worker: i job in esecuzione ripartono al prossimo avvio"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.executor.shutdown(wait=False)
+        # Attende la chiamata alla coda in corso: chi chiude la JobQueue dopo stop() non la interrompe
+        self._db_executor.shutdown(wait=True)
+
+    async def _db(self, method, *args, **kwargs):
+        """Esegue una chiamata alla JobQueue nel thread dedicato"""
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor,
+                                                                partial(method, *args, **kwargs))
+
+    def _preload_models(self):
+        """Carica in background un modello Whisper per slot e tiene residenti gli host GPT4All"""
+        backend = resolve_backend(self.defaults["backend"])
+        for slot in range(self.concurrency.get("transcribe", 1)):
+            # Fissato nella cache: l'istanza di uno slot non viene sfrattata dal caricamento di un altro
+            self.executor.submit(backend.get_model, self.defaults["model_size"], instance=slot, pin=True,
+                                 concurrent=self.concurrency.get("transcribe", 1))
+        for slot in range(self.concurrency.get("summarize", 1)):
+            host = get_llm_host(self.defaults["model_name"], slot)
+            host.idle_timeout = 0  # residente finché il servizio è attivo
+            if host.model_path.exists():
+                host.warmup()
+
+    async def pending(self, counts=None):
+        """Job in upload, in coda o in esecuzione"""
+        if counts is None:
+            counts = await self._db(self.queue.counts)
+        active = sum(count for (_, status), count in counts.items() if status in ("queued", "running"))
+        return self._uploading + active
+
+    async def health(self):
+        counts = await self._db(self.queue.counts)
+        return {
+            "status": "ok",
+            "pending": await self.pending(counts),
+            "max_pending": self.max_pending,
+            "workers": self.concurrency,
+            "queued": {stage: counts.get((stage, "queued"), 0) for stage in JOB_STAGES},
+            "running": {stage: counts.get((stage, "running"), 0) for stage in JOB_STAGES}
+        }
+
+    async def _stage_worker(self, stage, slot):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Azzerato prima di claim: un job accodato durante la chiamata lo segnala di nuovo
+            self._work[stage].clear()
+            job = await self._db(self.queue.claim, stage)
+            if job is None:
+                await self._work[stage].wait()
+                continue
+            job_id = job["id"]
+            logger.info(f"Job #{job_id}: avvio {stage} (slot {slot})")
+            try:
+                fields = await loop.run_in_executor(self.executor, self._run_stage, job, slot)
+            except FileNotFoundError as e:
+                await self._failed(job_id, f"File non trovato: {e}")
+            except (IOError, OSError) as e:
+                logger.error(f"Job #{job_id}: errore I/O: {e}", exc_info=True)
+                await self._failed(job_id, f"Errore I/O: {e}")
+            except RuntimeError as e:
+                logger.error(f"Job #{job_id}: errore runtime: {e}", exc_info=True)
+                await self._failed(job_id, f"Errore {stage}: {e}")
+            except Exception as e:
+                logger.exception(f"Job #{job_id}: errore inaspettato")
+                await self._failed(job_id, f"Errore inaspettato: {e}")
+            else:
+                await self._db(self.queue.advance, job_id, **fields)
+                index = JOB_STAGES.index(stage)
+                if index + 1 < len(JOB_STAGES):
+                    self._work[JOB_STAGES[index + 1]].set()
+                else:
+                    self._finished(job_id)
+
+    def _run_stage(self, job, slot):
+        """Esegue uno stadio nel pool di thread; ritorna i campi per JobQueue.advance()"""
+        options = {**self.defaults, **job["options"]}
+        if job["stage"] == "transcribe":
+            result = transcribe_audio(job["audio_file"], options["model_size"], options["language"], instance=slot,
+                                      cache=result_cache, decode_batch=options["decode_batch"],
+                                      backend=options["backend"], concurrent=self.concurrency.get("transcribe", 1))
+            return {"transcript": result["text"].strip(),
+                    "segments": SegmentStore(result.get("segments", [])).to_dicts()}
+        if not options.get("summary", True):
+            return {"results": None}
+        segments = SegmentStore(Segment(**segment) for segment in job["segments"] or [])
+        results = summarize_transcript(job["transcript"] or "", options["model_name"],
+                                       hosts=[get_llm_host(options["model_name"], slot)], cache=result_cache,
+                                       segments=segments or None)
+        return {"results": results}
+
+    async def _failed(self, job_id, error):
+        await self._db(self.queue.fail, job_id, error)
+        self._finished(job_id)
+
+    def _finished(self, job_id):
+        event = self._done.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def handle(self, reader, writer):
+        """Una richiesta per connessione"""
+        headers = {}
+        try:
+            method, path, query, request_headers = await self._read_head(reader)
+            status, body = await self._route(method, path, query, request_headers, reader, writer)
+        except RequestError as e:
+            status, body, headers = e.status, {"error": e.message}, e.headers
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning(f"Connessione interrotta dal client: {e}")
+            writer.close()
+            return
+        except ValueError as e:
+            status, body = 400, {"error": f"Richiesta non valida: {e}"}
+        try:
+            await self._respond(writer, status, body, headers)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader):
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        method, target, _ = line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), headers
+
+    async def _route(self, method, path, query, headers, reader, writer):
+        parts = path.strip("/").split("/")
+        if method == "GET" and path == "/health":
+            return 200, await self.health()
+        if parts[0] != "jobs":
+            raise RequestError(404, f"Percorso non trovato: {path}")
+        if len(parts) == 1:
+            if method == "POST":
+                return await self._upload(query, headers, reader, writer)
+            if method == "GET":
+                return 200, {"jobs": await self._db(self.queue.jobs)}
+            raise RequestError(405, f"Metodo non consentito: {method}")
+        job = await self._db(self.queue.get, int(parts[1])) if parts[1].isdigit() else None
+        if job is None:
+            raise RequestError(404, f"Job non trovato: {parts[1]}")
+        if len(parts) == 2 and method == "GET":
+            return 200, self._job_body(job)
+        if parts[2:] == ["retry"] and method == "POST":
+            if job["status"] != "failed":
+                raise RequestError(409, f"Il job #{job['id']} non è fallito")
+            await self._db(self.queue.retry, job["id"])
+            self._work[job["stage"]].set()
+            return 202, self._job_body(await self._db(self.queue.get, job["id"]))
+        raise RequestError(404, f"Percorso non trovato: {path}")
+
+    async def _upload(self, query, headers, reader, writer):
+        """Salva l'audio inviato in un file temporaneo e lo accoda (backpressure prima di leggere il corpo)"""
+        if await self.pending() >= self.max_pending:
+            raise RequestError(503, "Troppi job in attesa, riprovare più tardi",
+                               {"Retry-After": str(SERVER_RETRY_AFTER_SECONDS)})
+        chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        if not chunked and "content-length" not in headers:
+            raise RequestError(411, "Serve Content-Length o Transfer-Encoding: chunked")
+        if not chunked and int(headers["content-length"]) > self.max_upload_bytes:
+            raise RequestError(413, f"Audio oltre {self.max_upload_bytes // 1024 // 1024} MB")
+        options = {"summary": query.get("summary", "1") != "0"}
+        for option, key in (("model", "model_size"), ("language", "language"), ("llm", "model_name")):
+            if option in query:
+                options[key] = query[option]
+        if options.get("model_size", self.defaults["model_size"]) not in RecorderApp.MODEL_SIZES:
+            raise RequestError(400, f"Modello Whisper non valido: {options['model_size']}")
+
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        # Come le registrazioni: file temporaneo adottato dalla coda (nella sua directory: solo un rename)
+        suffix = Path(query.get("name", "")).suffix.lower()
+        upload = tempfile.NamedTemporaryFile(delete=False, dir=str(self.queue.directory),
+                                             suffix=suffix if suffix in AUDIO_EXTENSIONS else "")
+        _temp_files.append(upload.name)
+        self._uploading += 1
+        try:
+            with upload:
+                size = await self._receive_body(reader, headers, upload, chunked)
+            if not size:
+                raise RequestError(400, "Corpo della richiesta vuoto")
+        except BaseException:
+            _temp_files.remove(upload.name)
+            os.remove(upload.name)
+            raise
+        finally:
+            self._uploading -= 1
+
+        job_id = await self._db(self.queue.submit, upload.name, name=query.get("name"), **options)
+        logger.info(f"Job #{job_id}: ricevuti {size / 1024 / 1024:.1f} MB")
+        self._work[JOB_STAGES[0]].set()
+        if query.get("wait") != "1":
+            return 202, {"id": job_id, "status": "queued", "url": f"/jobs/{job_id}"}
+        event = self._done.setdefault(job_id, asyncio.Event())
+        await event.wait()
+        return 200, self._job_body(await self._db(self.queue.get, job_id))
+
+    async def _receive_body(self, reader, headers, f, chunked):
+        """Copia il corpo su file a blocchi (Content-Length o chunked) con limite di dimensione"""
+        received = 0
+
+        async def copy(length):
+            nonlocal received
+            received += length
+            if received > self.max_upload_bytes:
+                raise RequestError(413, f"Audio oltre {self.max_upload_bytes // 1024 // 1024} MB")
+            while length:
+                data = await reader.readexactly(min(length, SERVER_READ_BYTES))
+                f.write(data)
+                length -= len(data)
+
+        if not chunked:
+            await copy(int(headers["content-length"]))
+            return received
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailer
+                return received
+            await copy(size)
+            await reader.readexactly(2)  # CRLF dopo il chunk
+
+    @staticmethod
+    def _job_body(job):
+        return {key: job[key] for key in ("id", "name", "stage", "status", "priority", "attempts", "error",
+                                          "transcript", "segments", "results", "created_at", "updated_at")}
+
+    @staticmethod
+    async def _respond(writer, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                "Content-Type: application/json; charset=utf-8",
+                f"Content-Length: {len(payload)}",
+                "Connection: close"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+
+def cli_transcribe(argv):
+    """Comando headless: recorder_app.py transcribe <file o directory>..."""
+    parser = argparse.ArgumentParser(
+        prog="recorder_app.py transcribe",
+        description="Trascrive e analizza file audio esistenti senza interfaccia grafica"
+    )
+    parser.add_argument("paths", nargs="+", help="File audio o directory da elaborare")
+    parser.add_argument("--model", default="base", choices=RecorderApp.MODEL_SIZES, help="Modello Whisper")
+    parser.add_argument("--language", default="it", help="Lingua della trascrizione (es. it, en)")
+    parser.add_argument("--workers", type=int, default=1, help="File elaborati in parallelo (thread)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Processi paralleli, ognuno con il proprio modello (0 = automatico dai core)")
+    parser.add_argument("--threads-per-worker", type=int, default=BATCH_THREADS_PER_WORKER,
+                        help="Thread torch per processo")
+    parser.add_argument("--backend", default=TRANSCRIPTION_BACKEND, choices=["auto", *TRANSCRIPTION_BACKENDS],
+                        help="Motore di trascrizione (auto = il più veloce installato)")
+    parser.add_argument("--decode-batch", type=int, default=1,
+                        help=f"Finestre da 30 s decodificate insieme (1 = sequenziale, es. {DECODE_BATCH_SIZE})")
+    parser.add_argument("--no-summary", action="store_true", help="Solo trascrizione, senza GPT4All")
+    parser.add_argument("--llm-per-worker", action="store_true",
+                        help="Un modello GPT4All per worker invece di uno condiviso (~4 GB di RAM in più per worker)")
+    parser.add_argument("--recursive", action="store_true", help="Cerca file audio anche nelle sottodirectory")
+    parser.add_argument("--overwrite", action="store_true", help="Rielabora file con risultati già presenti")
+    args = parser.parse_args(argv)
+
+    files = collect_audio_files(args.paths, recursive=args.recursive)
+    if not args.overwrite:
+        files = [f for f in files if not output_paths(f)[1].exists()]
+    if not files:
+        print("Nessun file audio da elaborare")
+        return 0
+
+    options = {"model_size": args.model, "language": args.language, "summarize": not args.no_summary,
+               "decode_batch": max(1, args.decode_batch), "backend": args.backend,
+               "llm_per_worker": args.llm_per_worker}
+    if args.processes is not None:
+        scheduler = BatchScheduler(args.processes or None, args.threads_per_worker)
+        report = scheduler.run(files, **options)
+        failures = report["failures"]
+        if report["wall_rtf"] is not None:
+            print(f"RTF aggregato: {report['wall_rtf']:.3f} ({report['audio_seconds'] / 60:.1f} min audio "
+                  f"in {report['wall_seconds'] / 60:.1f} min), RTF di calcolo {report['compute_rtf']:.3f}")
+    else:
+        logger.info(f"Batch: {len(files)} file, {args.workers} worker, model={args.model}, lang={args.language}, "
+                    f"backend={resolve_backend(args.backend).name}")
+        failures = run_batch(files, workers=max(1, args.workers), **options)
+    print(f"Completati {len(files) - failures}/{len(files)} file")
+    return 1 if failures else 0
+
+
+def cli_serve(argv):
+    """Comando headless: recorder_app.py serve, servizio HTTP locale di trascrizione e analisi"""
+    parser = argparse.ArgumentParser(
+        prog="recorder_app.py serve",
+        description="Servizio HTTP che riceve file audio, li trascrive e li analizza con modelli residenti"
+    )
+    parser.add_argument("--host", default=SERVER_HOST, help="Indirizzo di ascolto (0.0.0.0 per la rete locale)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Porta di ascolto")
+    parser.add_argument("--model", default="base", choices=RecorderApp.MODEL_SIZES, help="Modello Whisper di default")
+    parser.add_argument("--language", default="it", help="Lingua di default della trascrizione")
+    parser.add_argument("--backend", default=TRANSCRIPTION_BACKEND, choices=["auto", *TRANSCRIPTION_BACKENDS],
+                        help="Motore di trascrizione (auto = il più veloce installato)")
+    parser.add_argument("--decode-batch", type=int, default=1,
+                        help=f"Finestre da 30 s decodificate insieme (1 = sequenziale, es. {DECODE_BATCH_SIZE})")
+    parser.add_argument("--transcribe-jobs", type=int, default=JOB_CONCURRENCY["transcribe"],
+                        help="Trascrizioni in parallelo (un modello Whisper ciascuna)")
+    parser.add_argument("--summary-jobs", type=int, default=JOB_CONCURRENCY["summarize"],
+                        help="Analisi in parallelo (un modello GPT4All ciascuna)")
+    parser.add_argument("--max-pending", type=int, default=SERVER_MAX_PENDING,
+                        help="Job in coda o in esecuzione oltre i quali le richieste ricevono 503")
+    parser.add_argument("--jobs-dir", default=str(SERVER_JOBS_DIR), help="Directory della coda del servizio")
+    parser.add_argument("--no-preload", action="store_true", help="Carica i modelli al primo job")
+    args = parser.parse_args(argv)
+
+    job_queue = JobQueue(args.jobs_dir)
+    server = TranscriptionServer(job_queue, {"transcribe": max(1, args.transcribe_jobs),
+                                             "summarize": max(1, args.summary_jobs)},
+                                 max_pending=max(1, args.max_pending), model_size=args.model, language=args.language,
+                                 backend=args.backend, decode_batch=max(1, args.decode_batch),
+                                 preload=not args.no_preload)
+
+    async def serve():
+        host, port = await server.start(args.host, args.port)
+        print(f"In ascolto su http://{host}:{port} (Ctrl+C per terminare)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Servizio terminato")
+    finally:
+        job_queue.close()
+        shutdown_llm_hosts()
+    return 0
+
+
+def word_agreement(reference, text):
+    """Frazione di parole in comune con la trascrizione di riferimento (1.0 = identiche)"""
+    reference_words, words = reference.lower().split(), text.lower().split()
+    if not reference_words and not words:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference_words, words, autojunk=False).ratio()
+
+
+def benchmark_backends(audio, backends, model_size="base", language="it", repeat=1, progress=None):
+    """Confronta i motori sullo stesso audio: caricamento, RTF e concordanza con openai-whisper"""
+    if not len(audio):
+        raise ValueError("Audio vuoto: nessun RTF da misurare")
+    progress = progress or (lambda message: None)
+    audio_seconds = len(audio) / WHISPER_SAMPLE_RATE
+    rows = []
+    for name in backends:
+        backend = TRANSCRIPTION_BACKENDS[name]
+        progress(f"{name}: caricamento modello '{model_size}'...")
+        start = time.perf_counter()
+        model = backend.get_model(model_size)
+        load_seconds = time.perf_counter() - start
+
+        # Il tempo migliore su più ripetizioni: esclude warmup e rumore di sistema
+        timings = []
+        for run in range(max(1, repeat)):
+            progress(f"{name}: trascrizione {run + 1}/{max(1, repeat)}...")
+            start = time.perf_counter()
+            result = backend.transcribe(model, audio, language)
+            timings.append(time.perf_counter() - start)
+        rows.append({
+            "backend": name,
+            "model": model_size,
+            "compute_type": backend.cache_options().get("compute_type"),
+            "load_seconds": round(load_seconds, 3),
+            "transcribe_seconds": round(min(timings), 3),
+            "rtf": round(min(timings) / audio_seconds, 4),
+            "text": result["text"].strip()
+        })
+
+    reference = next((row for row in rows if row["backend"] == "openai-whisper"), rows[0] if rows else None)
+    for row in rows:
+        row["word_agreement"] = round(word_agreement(reference["text"], row["text"]), 3)
+    return rows
+
+
+def cli_benchmark_backends(argv):
+    """Comando headless: recorder_app.py benchmark-backends <file>"""
+    parser = argparse.ArgumentParser(
+        prog="recorder_app.py benchmark-backends",
+        description="Confronta velocità e concordanza dei motori di trascrizione installati su un file audio"
+    )
+    parser.add_argument("audio_file", help="File audio di prova")
+    parser.add_argument("--model", default="base", choices=RecorderApp.MODEL_SIZES, help="Modello Whisper")
+    parser.add_argument("--language", default="it", help="Lingua della trascrizione (es. it, en)")
+    parser.add_argument("--backends", default=None,
+                        help=f"Motori separati da virgola (default: tutti gli installati tra "
+                             f"{', '.join(TRANSCRIPTION_BACKENDS)})")
+    parser.add_argument("--repeat", type=int, default=1, help="Ripetizioni per motore, vale la più veloce")
+    parser.add_argument("--output", default=None, help="Scrive il report JSON in questo file")
+    args = parser.parse_args(argv)
+
+    installed = available_backends()
+    names = args.backends.split(",") if args.backends else installed
+    unknown = [name for name in names if name not in TRANSCRIPTION_BACKENDS]
+    if unknown:
+        parser.error(f"motori sconosciuti: {', '.join(unknown)}")
+    for name in names:
+        if name not in installed:
+            print(f"{name}: non installato, saltato")
+    names = [name for name in names if name in installed]
+    if not os.path.exists(args.audio_file):
+        print(f"File audio non trovato: {args.audio_file}")
+        return 1
+
+    audio = load_audio_file(args.audio_file)
+    if not len(audio):
+        print(f"File audio vuoto: {args.audio_file}")
+        return 1
+    rows = benchmark_backends(audio, names, args.model, args.language, args.repeat, progress=logger.info)
+
+    print(f"Audio: {len(audio) / WHISPER_SAMPLE_RATE:.1f} s, modello {args.model}")
+    print(f"{'motore':<16}{'quant.':>8}{'caric. s':>10}{'trascr. s':>11}{'RTF':>8}{'concord.':>10}")
+    for row in rows:
+        print(f"{row['backend']:<16}{row['compute_type'] or '-':>8}{row['load_seconds']:>10.2f}"
+              f"{row['transcribe_seconds']:>11.2f}{row['rtf']:>8.3f}{row['word_agreement']:>10.2f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+    return 0
+
+
 def main():
     # FIX #6: Supporto --version per build_exe.bat
     if len(sys.argv) > 1 and sys.argv[1] in ["--version", "-v"]:
@@ -803,6 +5348,14 @@ def main():
         print("100% Standalone - Local AI Transcription")
         sys.exit(0)
 
+    # Modalità headless: nessuna QApplication
+    if len(sys.argv) > 1 and sys.argv[1] == "transcribe":
+        sys.exit(cli_transcribe(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark-backends":
+        sys.exit(cli_benchmark_backends(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        sys.exit(cli_serve(sys.argv[2:]))
+
     logger.info("=== Avvio Audio Recorder & Transcriber v2.0 ===")
 
     app = QApplication(sys.argv)
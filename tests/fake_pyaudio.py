@@ -0,0 +1,89 @@
+"""
+Sostituto di pyaudio.PyAudio condiviso dai test e dal benchmark: pilota AudioRecorder e
+MultiTrackRecorder in callback mode senza hardware
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class FakeCallbackStream:
+    """Stream in callback mode: un thread consegna i blocchi int16 mono alla callback, come PortAudio
+
+    Finiti i blocchi attende gli altri stream dello stesso FakePyAudio (barrier) e ferma il recorder.
+    Con throttle i blocchi vengono consegnati alla massima velocità, aspettando solo quando la
+    coda di cattura del recorder è piena (nessun blocco perso).
+    """
+
+    def __init__(self, recorder, callback, blocks, barrier, throttle=False):
+        self.recorder = recorder
+        self.callback = callback
+        self.blocks = blocks
+        self.barrier = barrier
+        self.throttle = throttle
+        self.active = True
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+
+    def _feed(self):
+        capture = self.recorder.capture if self.throttle else None
+        for block in self.blocks:
+            while capture is not None and self.active and len(capture) >= capture.max_blocks:
+                time.sleep(0.0005)
+            if not self.active:
+                return
+            data = block.tobytes() if isinstance(block, np.ndarray) else block
+            self.callback(data, len(data) // 2, {}, 0)
+        try:
+            self.barrier.wait(1)
+        except threading.BrokenBarrierError:
+            pass
+        self.recorder.stop_event.set()
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+        self.thread.join()
+
+    def close(self):
+        pass
+
+
+class FakePyAudio:
+    """pyaudio.PyAudio con dispositivi finti
+
+    blocks è la sequenza di blocchi (bytes o ndarray int16) consegnata da ogni stream, oppure una
+    funzione che la costruisce dagli argomenti di open() (rate, frames_per_buffer, input_device_index...).
+    rate imposta il defaultSampleRate del dispositivo, device_info aggiunge o sostituisce campi;
+    streams è il numero di stream aperti insieme che finiscono prima di fermare il recorder.
+    Gli argomenti di ogni open() restano in opened.
+    """
+
+    def __init__(self, recorder, blocks, device_info=None, rate=None, streams=1, throttle=False):
+        self.recorder = recorder
+        self.blocks = blocks
+        self.device_info = {"maxInputChannels": 1}
+        if rate is not None:
+            self.device_info["defaultSampleRate"] = float(rate)
+        self.device_info.update(device_info or {})
+        self.barrier = threading.Barrier(streams)
+        self.throttle = throttle
+        self.opened = []
+
+    def get_device_info_by_index(self, index):
+        return dict(self.device_info)
+
+    def get_sample_size(self, fmt):
+        return 2
+
+    def open(self, stream_callback=None, **kwargs):
+        self.opened.append(kwargs)
+        blocks = self.blocks(**kwargs) if callable(self.blocks) else self.blocks
+        return FakeCallbackStream(self.recorder, stream_callback, blocks, self.barrier, self.throttle)
+
+    def terminate(self):
+        pass
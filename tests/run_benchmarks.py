@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Benchmark della pipeline registrazione → trascrizione → summary
+
+Genera audio sintetico (parlato simulato + silenzi), esegue ogni stadio con
+backend stub (sempre disponibili) o reali (Whisper/GPT4All, se installati) e
+salva tempo, memoria di picco e real-time factor in un report JSON
+confrontabile tra commit.
+
+Esempi:
+    python tests/run_benchmarks.py --seconds 120 --output bench.json
+    python tests/run_benchmarks.py --backend both --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import AudioRecorder, transcribe_audio, summarize_transcript
+from tests.fake_pyaudio import FakePyAudio
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_RATE = 16000
+
+
+def generate_audio(seconds, speech_ratio=0.5, sample_rate=SAMPLE_RATE, seed=0):
+    """Audio int16 sintetico: "frasi" armoniche modulate a ritmo sillabico alternate a silenzi"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    audio = rng.normal(0, 30, total)  # rumore di fondo
+    pos = 0
+    while pos < total:
+        speech_len = int(rng.uniform(1.5, 6.0) * sample_rate)
+        silence_len = int(speech_len * (1 - speech_ratio) / max(speech_ratio, 1e-3))
+        end = min(pos + speech_len, total)
+        t = np.arange(end - pos) / sample_rate
+        f0 = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * t))
+        audio[pos:end] += 6000 * voiced * syllables
+        pos = end + silence_len
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+class StubWhisperModel:
+    """Whisper stub: costo CPU proporzionale alla durata (STFT per frame), segmenti ogni 5 s"""
+
+    def transcribe(self, audio, language=None, **kwargs):
+        frames = len(audio) // 400
+        if frames:
+            np.abs(np.fft.rfft(audio[:frames * 400].reshape(frames, 400), axis=1))
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + 5.0, duration)
+            segments.append({"start": start, "end": end, "text": f" Frase sintetica da {start:.0f} secondi."})
+            start = end
+        return {"text": "".join(s["text"] for s in segments), "segments": segments}
+
+
+def read_wav(path):
+    """Decodifica WAV senza ffmpeg (sostituisce load_audio_file se soundfile manca)"""
+    with wave.open(str(path), 'rb') as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class StubLLMHost:
+    """Host GPT4All stub: latenza per token simulata"""
+
+    def __init__(self, token_delay=0.0005):
+        self.token_delay = token_delay
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, max_tokens=200, **kwargs):
+        time.sleep(min(max_tokens, 200) * self.token_delay)
+        return json.dumps({"summary": "Riassunto sintetico.", "key_points": ["Punto"], "action_items": []})
+
+
+class StageMeter:
+    """Misura tempo, allocazioni di picco e RSS di picco di uno stadio"""
+
+    def __init__(self, audio_seconds):
+        self.audio_seconds = audio_seconds
+        self.result = {}
+
+    def __enter__(self):
+        tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.result = {
+            "wall_seconds": round(wall, 4),
+            "rtf": round(wall / self.audio_seconds, 6) if self.audio_seconds else None,
+            "peak_alloc_mb": round(peak / 1024 / 1024, 2),
+            "peak_rss_mb": peak_rss_mb()
+        }
+        return False
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(rss / 1024 / (1024 if sys.platform == "darwin" else 1), 2)
+
+
+def bench_record(audio, vad=False, in_memory=False, audio_format="wav", capture_rate=SAMPLE_RATE):
+    """Stadio di registrazione: ricampionamento, scrittura dei segmenti WAV/FLAC/Opus o buffer, VAD"""
+    recorder = AudioRecorder(device_index=0, vad=vad, in_memory=in_memory, audio_format=audio_format,
+                             recording_dir=tempfile.mkdtemp(prefix="bench-recordings-"))
+    outputs = []
+    recorder.finished.connect(outputs.append)
+    recorder.buffer_ready.connect(outputs.append)
+    recorder.error.connect(lambda msg: outputs.append(RuntimeError(msg)))
+    # Blocchi consegnati alla massima velocità: il benchmark misura il costo di scrittura, non la durata reale
+    fake = FakePyAudio(recorder, lambda frames_per_buffer=1024, **kwargs:
+                       (audio[pos:pos + frames_per_buffer] for pos in range(0, len(audio), frames_per_buffer)),
+                       device_info={"name": "benchmark"}, rate=capture_rate, throttle=True)
+    with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: fake):
+        with StageMeter(len(audio) / capture_rate) as meter:
+            recorder.run()
+    if not outputs or isinstance(outputs[0], Exception):
+        raise RuntimeError(f"Registrazione fallita: {outputs}")
+    meter.result.update(recorder.capture.stats())
+    if isinstance(outputs[0], str):
+        size = sum(os.path.getsize(os.path.join(outputs[0], name)) for name in os.listdir(outputs[0]))
+        meter.result["file_mb"] = round(size / 1024 / 1024, 2)
+    return outputs[0], meter.result
+
+
+def bench_transcribe(audio_input, audio_seconds, backend, model_size):
+    """Stadio di trascrizione"""
+    if isinstance(audio_input, recorder_app.AudioBuffer):
+        audio_input = recorder_app._to_whisper_rate(audio_input.view(), audio_input.sample_rate)
+    if backend == "stub":
+        with mock.patch.object(recorder_app, "get_whisper_model", return_value=StubWhisperModel()), \
+                mock.patch.object(recorder_app, "load_audio_file",
+                                  recorder_app.load_audio_file if recorder_app.soundfile else read_wav):
+            with StageMeter(audio_seconds) as meter:
+                result = transcribe_audio(audio_input, model_size)
+    else:
+        recorder_app.get_whisper_model(model_size)  # caricamento escluso dalla misura
+        with StageMeter(audio_seconds) as meter:
+            result = transcribe_audio(audio_input, model_size)
+    return result["text"].strip(), meter.result
+
+
+def bench_summarize(transcript, audio_seconds, backend):
+    """Stadio di summary"""
+    hosts = [StubLLMHost()] if backend == "stub" else None
+    if hosts is None:
+        recorder_app.get_llm_host().load()
+    with StageMeter(audio_seconds) as meter:
+        summarize_transcript(transcript, hosts=hosts)
+    return meter.result
+
+
+def real_backend_available(model_size):
+    try:
+        import whisper  # noqa: F401
+        from gpt4all import GPT4All  # noqa: F401
+    except ImportError:
+        return False
+    return (recorder_app.MODEL_CACHE_DIR / recorder_app.DEFAULT_LLM_MODEL).exists()
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    audio = generate_audio(args.seconds, args.speech_ratio, sample_rate=args.capture_rate)
+    audio_seconds = len(audio) / args.capture_rate
+
+    backends = ["stub", "real"] if args.backend == "both" else [args.backend]
+    if "real" in backends and not real_backend_available(args.model):
+        print("Backend reali non disponibili (Whisper/GPT4All o modello mancanti): solo stub")
+        backends = [b for b in backends if b != "real"] or ["stub"]
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "seconds": args.seconds,
+            "speech_ratio": args.speech_ratio,
+            "model": args.model,
+            "vad": args.vad,
+            "in_memory": args.in_memory,
+            "format": args.format,
+            "capture_rate": args.capture_rate
+        },
+        "stages": {}
+    }
+
+    recorded, report["stages"]["record"] = bench_record(audio, vad=args.vad, in_memory=args.in_memory,
+                                                        audio_format=args.format, capture_rate=args.capture_rate)
+    try:
+        for backend in backends:
+            transcript, report["stages"][f"transcribe_{backend}"] = bench_transcribe(
+                recorded, audio_seconds, backend, args.model)
+            report["stages"][f"summarize_{backend}"] = bench_summarize(transcript, audio_seconds, backend)
+    finally:
+        if isinstance(recorded, recorder_app.AudioBuffer):
+            recorded.close()
+        else:
+            shutil.rmtree(os.path.dirname(recorded), ignore_errors=True)
+    return report
+
+
+def compare_reports(current, baseline, tolerance):
+    """Stampa le differenze di tempo per stadio; ritorna il numero di regressioni"""
+    regressions = 0
+    print(f"Confronto con {baseline.get('commit') or 'baseline'}:")
+    for stage, metrics in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old:
+            print(f"  {stage:22s} nuovo")
+            continue
+        delta = (metrics["wall_seconds"] - old["wall_seconds"]) / old["wall_seconds"] if old["wall_seconds"] else 0.0
+        flag = ""
+        if delta > tolerance:
+            regressions += 1
+            flag = "  ❌ REGRESSIONE"
+        print(f"  {stage:22s} {old['wall_seconds']:.3f}s -> {metrics['wall_seconds']:.3f}s ({delta:+.1%}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline Audio Recorder & Transcriber")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Durata dell'audio sintetico")
+    parser.add_argument("--speech-ratio", type=float, default=0.5, help="Frazione di parlato (0-1)")
+    parser.add_argument("--backend", choices=["stub", "real", "both"], default="stub")
+    parser.add_argument("--model", default="base", help="Modello Whisper per il backend reale")
+    parser.add_argument("--vad", action="store_true", help="Registrazione con gate VAD")
+    parser.add_argument("--in-memory", action="store_true", help="Registrazione in memoria")
+    parser.add_argument("--format", choices=sorted(recorder_app.RECORDING_FORMATS), default="wav",
+                        help="Formato del file di registrazione")
+    parser.add_argument("--capture-rate", type=int, default=SAMPLE_RATE,
+                        help="Sample rate nativo simulato del dispositivo (es. 48000)")
+    parser.add_argument("--output", help="File JSON in cui salvare il report")
+    parser.add_argument("--compare", help="Report JSON di riferimento da confrontare")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Regressione tollerata (0.2 = +20%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare_reports(report, baseline, args.tolerance) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
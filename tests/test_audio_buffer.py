@@ -0,0 +1,106 @@
+"""
+Test suite for AudioBuffer (registrazione in memoria)
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import AudioBuffer, AudioRecorder
+
+
+def int16_block(values):
+    return np.array(values, dtype=np.int16).tobytes()
+
+
+class TestAudioBuffer(unittest.TestCase):
+    """Test buffer preallocato e spill su memmap"""
+
+    def test_int16_converted_to_float32(self):
+        """Test conversione int16 -> float32 normalizzato"""
+        buffer = AudioBuffer(16000, initial_seconds=1)
+        buffer.append(int16_block([0, 16384, -32768]))
+
+        np.testing.assert_allclose(buffer.view(), [0.0, 0.5, -1.0])
+        self.assertEqual(buffer.view().dtype, np.float32)
+
+    def test_float_blocks(self):
+        """Test blocchi già float32"""
+        buffer = AudioBuffer(16000, initial_seconds=1)
+        buffer.append(np.array([0.25, -0.25], dtype=np.float32))
+        np.testing.assert_allclose(buffer.view(), [0.25, -0.25])
+
+    def test_growth_preserves_data(self):
+        """Test crescita oltre la capacità iniziale"""
+        buffer = AudioBuffer(10, initial_seconds=1)
+        for i in range(5):
+            buffer.append(int16_block([i * 1000] * 7))
+
+        self.assertEqual(buffer.length, 35)
+        self.assertGreaterEqual(buffer.capacity, 35)
+        self.assertAlmostEqual(buffer.duration, 3.5)
+        np.testing.assert_allclose(buffer.view()[28:], 4000 / 32768.0)
+        self.assertIsNone(buffer.spill_path)
+
+    def test_view_is_zero_copy(self):
+        """Test che view() non copi i dati"""
+        buffer = AudioBuffer(16000, initial_seconds=1)
+        buffer.append(int16_block([1, 2, 3]))
+        view = buffer.view()
+        view[0] = 0.5
+        self.assertEqual(buffer.view()[0], 0.5)
+
+    def test_spill_to_memmap(self):
+        """Test spill su file oltre la soglia di memoria"""
+        buffer = AudioBuffer(10, initial_seconds=1, max_memory_bytes=16 * 4)
+        expected = []
+        for i in range(10):
+            block = [i * 100] * 5
+            expected.extend(block)
+            buffer.append(int16_block(block))
+
+        self.assertIsNotNone(buffer.spill_path)
+        self.assertTrue(os.path.exists(buffer.spill_path))
+        np.testing.assert_allclose(buffer.view(), np.array(expected) / 32768.0, rtol=1e-6)
+
+        spill_path = buffer.spill_path
+        buffer.close()
+        self.assertFalse(os.path.exists(spill_path))
+        self.assertEqual(buffer.length, 0)
+
+
+class TestAudioRecorderInMemory(unittest.TestCase):
+    """Test configurazione del recorder in memoria"""
+
+    def test_in_memory_recorder(self):
+        """Test che in_memory crei il buffer e il signal buffer_ready"""
+        recorder = AudioRecorder(device_index=0, in_memory=True)
+        self.assertIsInstance(recorder.audio_buffer, AudioBuffer)
+        self.assertTrue(hasattr(recorder, 'buffer_ready'))
+
+    def test_default_writes_file(self):
+        """Test che di default non venga creato un buffer"""
+        self.assertIsNone(AudioRecorder(device_index=0).audio_buffer)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioBuffer))
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioRecorderInMemory))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
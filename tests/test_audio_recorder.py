@@ -5,14 +5,18 @@ Test suite for AudioRecorder class
 import unittest
 import sys
 import os
+import queue
 import threading
 import time
+from unittest import mock
 
 # Aggiungi parent directory al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from recorder_app import AudioRecorder
+import recorder_app
+from recorder_app import AudioRecorder, AudioChunker, CaptureQueue
 from PyQt5.QtCore import QThread
+from tests.fake_pyaudio import FakePyAudio
 
 
 class TestAudioRecorderThreadSafety(unittest.TestCase):
@@ -83,6 +87,77 @@ class TestAudioRecorderSignals(unittest.TestCase):
         self.assertTrue(hasattr(recorder, 'error'))
 
 
+class TestCaptureQueue(unittest.TestCase):
+    """Test coda tra callback audio e thread di scrittura"""
+
+    def test_push_never_blocks_when_full(self):
+        """Test che a coda piena i blocchi vengano scartati e contati"""
+        capture = CaptureQueue(max_blocks=2)
+        self.assertTrue(capture.push(b"a", 1024))
+        self.assertTrue(capture.push(b"b", 1024))
+        self.assertFalse(capture.push(b"c", 1024))
+
+        self.assertEqual(capture.dropped_blocks, 1)
+        self.assertEqual(capture.dropped_frames, 1024)
+        self.assertEqual(capture.high_water, 2)
+
+    def test_order_and_drain(self):
+        """Test ordine FIFO e svuotamento finale"""
+        capture = CaptureQueue(max_blocks=4)
+        for block in (b"1", b"2", b"3"):
+            capture.push(block, 1)
+
+        self.assertEqual(capture.get(timeout=0.1), b"1")
+        self.assertEqual(list(capture.drain()), [b"2", b"3"])
+        self.assertIsNone(capture.get(timeout=0.01))
+
+    def test_input_overflow_flag(self):
+        """Test conteggio degli overflow segnalati da PortAudio"""
+        capture = CaptureQueue()
+        capture.push(b"x", 1, recorder_app.pyaudio.paInputOverflow)
+        self.assertEqual(capture.input_overflows, 1)
+
+
+class TestCallbackCapture(unittest.TestCase):
+    """Test registrazione in callback mode"""
+
+    def test_all_blocks_written(self):
+        """Test che tutti i blocchi accodati finiscano nel buffer, anche dopo lo stop"""
+        recorder = AudioRecorder(device_index=0, in_memory=True)
+        blocks = [bytes([i % 256, 0]) * 1024 for i in range(50)]
+        buffers = []
+        recorder.buffer_ready.connect(buffers.append)
+
+        with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: FakePyAudio(recorder, blocks)):
+            recorder.run()
+
+        self.assertEqual(len(buffers), 1)
+        self.assertEqual(len(buffers[0].view()), 50 * 1024)
+        self.assertEqual(recorder.capture.dropped_frames, 0)
+        buffers[0].close()
+
+    def test_live_abandoned_when_queue_full(self):
+        """Test che la registrazione non si blocchi se la trascrizione live non tiene il passo"""
+        chunks = queue.Queue(1)
+        recorder = AudioRecorder(device_index=0, in_memory=True, chunk_queue=chunks)
+        recorder.chunker = AudioChunker(16000, chunk_seconds=0.5, overlap_seconds=0.1)
+        blocks = [b"\x10\x00" * 1024 for _ in range(50)]
+        buffers = []
+        stopped = []
+        recorder.buffer_ready.connect(buffers.append)
+        recorder.live_stopped.connect(stopped.append)
+
+        with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: FakePyAudio(recorder, blocks)):
+            recorder.run()
+
+        self.assertEqual(len(stopped), 1)
+        self.assertEqual(len(buffers[0].view()), 50 * 1024)
+        # Nessun altro chunk né segnale di fine dopo l'abbandono: il consumer è già stato fermato
+        self.assertEqual(chunks.qsize(), 1)
+        self.assertIsNotNone(chunks.get_nowait())
+        buffers[0].close()
+
+
 def run_tests():
     """Esegue tutti i test"""
     loader = unittest.TestLoader()
@@ -90,6 +165,8 @@ def run_tests():
 
     suite.addTests(loader.loadTestsFromTestCase(TestAudioRecorderThreadSafety))
     suite.addTests(loader.loadTestsFromTestCase(TestAudioRecorderSignals))
+    suite.addTests(loader.loadTestsFromTestCase(TestCaptureQueue))
+    suite.addTests(loader.loadTestsFromTestCase(TestCallbackCapture))
 
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
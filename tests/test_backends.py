@@ -0,0 +1,192 @@
+"""
+Test suite for motori di trascrizione (registry, faster-whisper, whisper.cpp, benchmark)
+"""
+
+import unittest
+import sys
+import os
+from collections import namedtuple
+from types import ModuleType, SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import (ModelCache, TRANSCRIPTION_BACKENDS, TranscriptionBackend, BatchScheduler,
+                          resolve_backend, benchmark_backends, word_agreement, transcribe_audio)
+
+RATE = 16000
+
+FasterSegment = namedtuple("FasterSegment", "id seek start end text tokens temperature avg_logprob "
+                                            "compression_ratio no_speech_prob")
+CppSegment = namedtuple("CppSegment", "t0 t1 text")
+
+
+def installed(*names):
+    """Simula i motori installati"""
+    modules = {TRANSCRIPTION_BACKENDS[name].module for name in names}
+    return mock.patch.object(recorder_app.importlib.util, "find_spec",
+                             side_effect=lambda module: object() if module in modules else None)
+
+
+class TestResolveBackend(unittest.TestCase):
+    """Test scelta del motore"""
+
+    def test_auto_prefers_fastest_installed(self):
+        """Test che auto scelga il primo motore installato nell'ordine di preferenza"""
+        with installed("openai-whisper", "whisper.cpp"):
+            self.assertEqual(resolve_backend("auto").name, "whisper.cpp")
+        with installed("openai-whisper", "whisper.cpp", "faster-whisper"):
+            self.assertEqual(resolve_backend("auto").name, "faster-whisper")
+
+    def test_missing_backend_falls_back(self):
+        """Test che un motore non installato ricada su quello disponibile"""
+        with installed("openai-whisper"):
+            self.assertEqual(resolve_backend("faster-whisper").name, "openai-whisper")
+            self.assertEqual(resolve_backend("openai-whisper").name, "openai-whisper")
+
+
+class TestBackendThreads(unittest.TestCase):
+    """Test thread CPU assegnati alle istanze dei motori"""
+
+    def test_abstract_backend(self):
+        """Test che un motore senza load/transcribe non sia istanziabile"""
+        with self.assertRaises(TypeError):
+            TranscriptionBackend()
+
+    def test_cores_split_between_concurrent_jobs(self):
+        """Test core divisi tra le trascrizioni in parallelo, o thread fissati dal processo batch"""
+        with mock.patch.object(BatchScheduler, "available_cores", return_value=list(range(8))), \
+                mock.patch.dict(recorder_app.JOB_CONCURRENCY, transcribe=3):
+            self.assertEqual(TranscriptionBackend.threads(), 2)
+            # Concorrenza esplicita del servizio, senza toccare JOB_CONCURRENCY
+            self.assertEqual(TranscriptionBackend.threads(concurrent=4), 2)
+            self.assertEqual(TranscriptionBackend.threads(concurrent=1), 8)
+            with mock.patch.object(TranscriptionBackend, "cpu_threads", 4):
+                self.assertEqual(TRANSCRIPTION_BACKENDS["whisper.cpp"].threads(), 4)
+
+
+class FakeFasterModel:
+    def __init__(self):
+        self.options = None
+
+    def transcribe(self, audio, **options):
+        self.options = options
+        segments = (FasterSegment(i, 0, i * 2.0, i * 2.0 + 2.0, f" parte {i}", [i], 0.0, -0.1, 1.1, 0.01)
+                    for i in range(3))
+        return segments, SimpleNamespace(duration=6.0, language="it")
+
+
+class TestFasterWhisperBackend(unittest.TestCase):
+    """Test conversione del risultato faster-whisper"""
+
+    def test_result_format(self):
+        """Test segmenti convertiti nel formato di whisper.transcribe()"""
+        model = FakeFasterModel()
+        messages = []
+        result = TRANSCRIPTION_BACKENDS["faster-whisper"].transcribe(model, np.zeros(RATE), "it",
+                                                                     progress=messages.append)
+
+        self.assertEqual(result["text"], " parte 0 parte 1 parte 2")
+        self.assertEqual(result["segments"][2]["start"], 4.0)
+        self.assertEqual(result["segments"][1]["tokens"], [1])
+        self.assertEqual(model.options["beam_size"], 1)
+        self.assertEqual(len(messages), 3)
+
+    def test_batched_pipeline(self):
+        """Test uso di BatchedInferencePipeline con decode_batch > 1"""
+        pipeline = FakeFasterModel()
+        module = ModuleType("faster_whisper")
+        module.BatchedInferencePipeline = lambda model: pipeline
+        with mock.patch.dict(sys.modules, {"faster_whisper": module}):
+            TRANSCRIPTION_BACKENDS["faster-whisper"].transcribe(FakeFasterModel(), np.zeros(RATE), "it",
+                                                                decode_batch=8)
+        self.assertEqual(pipeline.options["batch_size"], 8)
+
+
+class FakeCppModel:
+    def transcribe(self, audio, language=None):
+        return [CppSegment(0, 150, "Ciao"), CppSegment(150, 420, " mondo ")]
+
+
+class TestWhisperCppBackend(unittest.TestCase):
+    """Test conversione del risultato whisper.cpp"""
+
+    def test_centiseconds_to_seconds(self):
+        """Test tempi in secondi e testo normalizzato"""
+        result = TRANSCRIPTION_BACKENDS["whisper.cpp"].transcribe(FakeCppModel(), np.zeros(RATE), "it")
+        self.assertEqual(result["text"], " Ciao mondo")
+        self.assertEqual((result["segments"][1]["start"], result["segments"][1]["end"]), (1.5, 4.2))
+
+    def test_model_cached_with_estimated_size(self):
+        """Test che il modello passi dalla cache con la dimensione stimata dalla quantizzazione"""
+        cache = ModelCache(10 ** 10)
+        backend = TRANSCRIPTION_BACKENDS["whisper.cpp"]
+        with mock.patch.object(recorder_app, "_whisper_cache", cache), \
+                mock.patch.object(backend, "load", return_value=FakeCppModel()) as load:
+            first = backend.get_model("base")
+            self.assertIs(backend.get_model("base"), first)
+
+        load.assert_called_once()
+        self.assertEqual(cache.total_bytes(), 74_000_000)
+
+    def test_transcribe_audio_with_backend(self):
+        """Test transcribe_audio con un motore esplicito"""
+        backend = TRANSCRIPTION_BACKENDS["whisper.cpp"]
+        with installed("openai-whisper", "whisper.cpp"), \
+                mock.patch.object(backend, "get_model", return_value=FakeCppModel()):
+            result = transcribe_audio(np.zeros(RATE, dtype=np.float32), backend="whisper.cpp")
+        self.assertEqual(result["text"], " Ciao mondo")
+
+
+class TestBenchmarkBackends(unittest.TestCase):
+    """Test confronto tra motori"""
+
+    def test_rows_and_agreement(self):
+        """Test RTF e concordanza rispetto a openai-whisper"""
+        reference = SimpleNamespace(transcribe=lambda audio, language=None: {"text": " ciao a tutti quanti"})
+        cpp = TRANSCRIPTION_BACKENDS["whisper.cpp"]
+        with mock.patch("recorder_app.get_whisper_model", return_value=reference), \
+                mock.patch.object(cpp, "get_model", return_value=FakeCppModel()):
+            rows = benchmark_backends(np.zeros(RATE * 2, dtype=np.float32), ["openai-whisper", "whisper.cpp"])
+
+        self.assertEqual([row["backend"] for row in rows], ["openai-whisper", "whisper.cpp"])
+        self.assertEqual(rows[0]["word_agreement"], 1.0)
+        self.assertLess(rows[1]["word_agreement"], 1.0)
+        self.assertEqual(rows[1]["compute_type"], "int8")
+        self.assertIsNone(rows[0]["compute_type"])
+        self.assertGreaterEqual(rows[1]["rtf"], 0)
+
+    def test_empty_audio_rejected(self):
+        """Test errore esplicito su audio vuoto invece di un RTF nullo"""
+        with self.assertRaises(ValueError):
+            benchmark_backends(np.zeros(0, dtype=np.float32), ["whisper.cpp"])
+
+    def test_word_agreement(self):
+        """Test concordanza delle parole"""
+        self.assertEqual(word_agreement("Ciao a tutti", "ciao a tutti"), 1.0)
+        self.assertAlmostEqual(word_agreement("uno due tre quattro", "uno due"), 2 * 2 / 6)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestResolveBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestBackendThreads))
+    suite.addTests(loader.loadTestsFromTestCase(TestFasterWhisperBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestWhisperCppBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarkBackends))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
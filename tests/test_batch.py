@@ -0,0 +1,216 @@
+"""
+Test suite for modalità batch headless (recorder_app.py transcribe)
+"""
+
+import unittest
+import sys
+import os
+import json
+import wave
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import (collect_audio_files, output_paths, process_audio_file, cli_transcribe,
+                          BatchScheduler, aggregate_batch_report, audio_duration)
+
+
+FAKE_ANALYSIS = {"summary": "Riassunto", "key_points": ["Punto"], "action_items": []}
+
+
+def fake_transcribe(audio_file, model_size="base", language="it", progress=None, instance=0, cache=None,
+                    decode_batch=1, backend=None):
+    return {"text": f" trascrizione di {Path(audio_file).name} "}
+
+
+class TestCollectAudioFiles(unittest.TestCase):
+    """Test selezione dei file audio"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name in ["a.wav", "b.MP3", "note.txt", "sub/c.flac"]:
+            path = self.root / name
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(b"")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_directory_filters_extensions(self):
+        """Test che vengano presi solo i file audio"""
+        names = [f.name for f in collect_audio_files([self.root])]
+        self.assertEqual(names, ["a.wav", "b.MP3"])
+
+    def test_recursive(self):
+        """Test ricerca nelle sottodirectory"""
+        names = sorted(f.name for f in collect_audio_files([self.root], recursive=True))
+        self.assertEqual(names, ["a.wav", "b.MP3", "c.flac"])
+
+    def test_explicit_files_deduplicated(self):
+        """Test file espliciti senza duplicati"""
+        wav = self.root / "a.wav"
+        self.assertEqual(collect_audio_files([wav, self.root / "a.wav"]), [wav.resolve()])
+
+    def test_output_paths(self):
+        """Test percorsi di output accanto al file"""
+        txt, js = output_paths(self.root / "meeting.wav")
+        self.assertEqual(txt.name, "meeting.analisi.txt")
+        self.assertEqual(js.name, "meeting.analisi.json")
+        self.assertEqual(txt.parent, self.root)
+
+
+class TestProcessAudioFile(unittest.TestCase):
+    """Test elaborazione di un singolo file"""
+
+    def test_writes_results(self):
+        """Test scrittura report e JSON"""
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = Path(tmp) / "meeting.wav"
+            audio.write_bytes(b"")
+            with mock.patch.object(recorder_app, "transcribe_audio", fake_transcribe), \
+                    mock.patch.object(recorder_app, "summarize_transcript", return_value=FAKE_ANALYSIS):
+                process_audio_file(audio)
+
+            txt, js = output_paths(audio)
+            data = json.loads(js.read_text(encoding="utf-8"))
+            self.assertEqual(data["transcript"], "trascrizione di meeting.wav")
+            self.assertEqual(data["analysis"], FAKE_ANALYSIS)
+            self.assertIn("Riassunto", txt.read_text(encoding="utf-8"))
+
+    def test_no_summary(self):
+        """Test solo trascrizione"""
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = Path(tmp) / "meeting.wav"
+            audio.write_bytes(b"")
+            with mock.patch.object(recorder_app, "transcribe_audio", fake_transcribe), \
+                    mock.patch.object(recorder_app, "summarize_transcript") as summarize:
+                process_audio_file(audio, summarize=False)
+
+            summarize.assert_not_called()
+            data = json.loads(output_paths(audio)[1].read_text(encoding="utf-8"))
+            self.assertIsNone(data["analysis"])
+
+
+    def test_llm_host_shared_between_workers(self):
+        """Test un solo host GPT4All per tutti i worker, salvo llm_per_worker"""
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = Path(tmp) / "meeting.wav"
+            audio.write_bytes(b"")
+            with mock.patch.object(recorder_app, "transcribe_audio", fake_transcribe), \
+                    mock.patch.object(recorder_app, "summarize_transcript", return_value=FAKE_ANALYSIS), \
+                    mock.patch.object(recorder_app, "get_llm_host") as get_host:
+                process_audio_file(audio, instance=1)
+                process_audio_file(audio, instance=1, llm_per_worker=True)
+
+        self.assertEqual([call.args[1] for call in get_host.call_args_list], [0, 1])
+
+
+class TestCliTranscribe(unittest.TestCase):
+    """Test comando transcribe"""
+
+    def test_batch_skips_completed(self):
+        """Test che i file già elaborati vengano saltati"""
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["a.wav", "b.wav", "c.wav"]:
+                (Path(tmp) / name).write_bytes(b"")
+            output_paths(Path(tmp) / "a.wav")[1].write_text("{}", encoding="utf-8")
+
+            with mock.patch.object(recorder_app, "transcribe_audio", side_effect=fake_transcribe) as transcribe:
+                code = cli_transcribe([tmp, "--no-summary", "--workers", "2"])
+
+            self.assertEqual(code, 0)
+            processed = sorted(Path(c.args[0]).name for c in transcribe.call_args_list)
+            self.assertEqual(processed, ["b.wav", "c.wav"])
+
+    def test_failure_exit_code(self):
+        """Test codice di uscita con file falliti"""
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "a.wav").write_bytes(b"")
+            with mock.patch.object(recorder_app, "transcribe_audio", side_effect=RuntimeError("boom")):
+                code = cli_transcribe([tmp, "--no-summary"])
+
+            self.assertEqual(code, 1)
+
+
+def write_silence(path, seconds, rate=16000):
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\x00\x00" * int(seconds * rate))
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """Test scheduler multi-processo"""
+
+    def test_audio_duration(self):
+        """Test durata dall'header WAV"""
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = Path(tmp) / "a.wav"
+            write_silence(wav, 2.5)
+            other = Path(tmp) / "a.mp3"
+            other.write_bytes(b"ID3")
+
+            self.assertAlmostEqual(audio_duration(wav), 2.5)
+            self.assertIsNone(audio_duration(other))
+
+    def test_longest_first(self):
+        """Test ordinamento per durata decrescente"""
+        with tempfile.TemporaryDirectory() as tmp:
+            files = []
+            for name, seconds in [("short.wav", 1), ("long.wav", 3), ("mid.wav", 2)]:
+                write_silence(Path(tmp) / name, seconds)
+                files.append(Path(tmp) / name)
+
+            ordered = BatchScheduler.order_longest_first(files)
+            self.assertEqual([f.name for f in ordered], ["long.wav", "mid.wav", "short.wav"])
+
+    def test_core_sets(self):
+        """Test assegnazione core disgiunti ai processi"""
+        with mock.patch.object(BatchScheduler, "available_cores", return_value=list(range(8))):
+            scheduler = BatchScheduler(threads_per_worker=4)
+            self.assertEqual(scheduler.processes, 2)
+            self.assertEqual(scheduler.core_sets(), [[0, 1, 2, 3], [4, 5, 6, 7]])
+
+            oversubscribed = BatchScheduler(processes=3, threads_per_worker=4)
+            self.assertEqual(oversubscribed.core_sets()[2], None)
+
+    def test_aggregate_report(self):
+        """Test real-time factor aggregato sul tempo reale e sul tempo di calcolo"""
+        results = [
+            {"file": "a.wav", "elapsed": 30.0, "duration": 600.0},
+            {"file": "b.wav", "elapsed": 10.0, "duration": 200.0},
+        ]
+        # Due processi in parallelo: il tempo reale è metà del calcolo
+        report = aggregate_batch_report(results, failures=1, wall_seconds=20.0)
+
+        self.assertEqual(report["audio_seconds"], 800.0)
+        self.assertAlmostEqual(report["wall_rtf"], 0.025)
+        self.assertAlmostEqual(report["compute_rtf"], 0.05)
+        self.assertAlmostEqual(report["per_file_rtf"]["a.wav"], 0.05)
+        self.assertEqual(report["failures"], 1)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestCollectAudioFiles))
+    suite.addTests(loader.loadTestsFromTestCase(TestProcessAudioFile))
+    suite.addTests(loader.loadTestsFromTestCase(TestCliTranscribe))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchScheduler))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,134 @@
+"""
+Test suite for decodifica a batch (segment_windows, timestamp_segments, transcribe_batched)
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import segment_windows, timestamp_segments, transcribe_batched
+
+RATE = 16000
+TS = 50364   # timestamp_begin del tokenizer multilingue
+EOT = 50257
+
+
+def ts(seconds):
+    return TS + int(round(seconds / 0.02))
+
+
+class TestSegmentWindows(unittest.TestCase):
+    """Test pre-segmentazione in finestre"""
+
+    def test_cut_in_silence(self):
+        """Test che il taglio cada nel silenzio vicino ai 30 s"""
+        audio = np.random.default_rng(0).normal(0, 0.3, RATE * 70).astype(np.float32)
+        audio[int(27.5 * RATE):int(28.0 * RATE)] = 0.0
+
+        bounds = segment_windows(audio)
+        self.assertAlmostEqual(bounds[0][1] / RATE, 27.75, delta=0.3)
+        # Finestre contigue, nessuna oltre i 30 s, copertura completa
+        for (_, end), (start, _) in zip(bounds, bounds[1:]):
+            self.assertEqual(end, start)
+        self.assertTrue(all(e - s <= 30 * RATE for s, e in bounds))
+        self.assertEqual(bounds[-1][1], len(audio))
+
+    def test_short_audio_single_window(self):
+        """Test audio più corto di una finestra"""
+        self.assertEqual(segment_windows(np.zeros(RATE * 5, dtype=np.float32)), [(0, RATE * 5)])
+
+
+class TestTimestampSegments(unittest.TestCase):
+    """Test ricostruzione dei segmenti dai token timestamp"""
+
+    def test_consecutive_timestamps_split(self):
+        """Test segmenti separati da coppie di timestamp"""
+        tokens = [ts(0), 1, 2, ts(2.5), ts(2.5), 3, ts(4.0), EOT]
+        self.assertEqual(timestamp_segments(tokens, TS, EOT, 30.0),
+                         [(0.0, 2.5, [1, 2]), (2.5, 4.0, [3])])
+
+    def test_truncated_tail_kept(self):
+        """Test coda senza timestamp di chiusura estesa a fine finestra"""
+        tokens = [ts(0), 1, ts(3.0), ts(3.0), 2, 3]
+        segments = timestamp_segments(tokens, TS, EOT, 20.0)
+        self.assertEqual(segments[-1], (3.0, 20.0, [2, 3]))
+
+    def test_no_timestamps(self):
+        """Test finestra senza timestamp: un solo segmento"""
+        self.assertEqual(timestamp_segments([5, 6, EOT], TS, EOT, 12.0), [(0.0, 12.0, [5, 6])])
+
+
+def result(tokens, avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=1.2, temperature=0.0):
+    return SimpleNamespace(tokens=tokens, avg_logprob=avg_logprob, no_speech_prob=no_speech_prob,
+                           compression_ratio=compression_ratio, temperature=temperature)
+
+
+class TestTranscribeBatched(unittest.TestCase):
+    """Test decodifica a batch con whisper.decode simulato"""
+
+    def setUp(self):
+        self.model = SimpleNamespace(is_multilingual=True, num_languages=99, device="cpu",
+                                     dims=SimpleNamespace(n_mels=80))
+        self.tokenizer = recorder_app.whisper.tokenizer.get_tokenizer(True, num_languages=99, language="it",
+                                                                      task="transcribe")
+        self.calls = []
+
+    def fake_decode(self, model, mel, options):
+        self.calls.append((mel.shape[0], options.temperature))
+        text = self.tokenizer.encode(" ciao")
+        if options.temperature == 0.0 and mel.shape[0] == 3:
+            # Seconda finestra degenerata al primo tentativo, terza silenziosa
+            return [result([ts(0)] + text + [ts(1.0)]),
+                    result(text * 50, avg_logprob=-2.0, compression_ratio=5.0),
+                    result([], avg_logprob=-1.5, no_speech_prob=0.9)]
+        return [result([ts(0)] + text + [ts(2.0)], temperature=options.temperature) for _ in range(mel.shape[0])]
+
+    def test_batches_fallback_and_offsets(self):
+        """Test batch, nuovo tentativo solo per la finestra degenerata e timestamp assoluti"""
+        audio = np.zeros(RATE * 85, dtype=np.float32)
+        with mock.patch.object(recorder_app.whisper, "decode", self.fake_decode):
+            out = transcribe_batched(self.model, audio, "it", batch_size=3)
+
+        self.assertEqual(self.calls, [(3, 0.0), (1, 0.2)])
+        self.assertEqual(len(out["segments"]), 2)
+        self.assertEqual(out["segments"][0]["start"], 0.0)
+        self.assertEqual(out["segments"][0]["end"], 1.0)
+        self.assertAlmostEqual(out["segments"][1]["start"], out["segments"][1]["seek"] / RATE, places=2)
+        self.assertEqual(out["segments"][1]["temperature"], 0.2)
+        self.assertEqual(out["text"], " ciao ciao")
+
+    def test_transcribe_audio_uses_batches(self):
+        """Test che transcribe_audio usi la decodifica a batch se richiesta"""
+        with mock.patch("recorder_app.get_whisper_model", return_value=self.model), \
+                mock.patch.object(recorder_app, "transcribe_batched", return_value={"text": "x", "segments": []}) as batched:
+            transcribe_audio_result = recorder_app.transcribe_audio(np.zeros(RATE, dtype=np.float32), decode_batch=4)
+
+        self.assertEqual(transcribe_audio_result["text"], "x")
+        self.assertEqual(batched.call_args.args[3], 4)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentWindows))
+    suite.addTests(loader.loadTestsFromTestCase(TestTimestampSegments))
+    suite.addTests(loader.loadTestsFromTestCase(TestTranscribeBatched))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,118 @@
+"""
+Test suite for rendering incrementale della GUI (TextAppender, SegmentListModel)
+"""
+
+import unittest
+import sys
+import os
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QPlainTextEdit, QListView
+
+from recorder_app import TextAppender, SegmentListModel, SegmentStore
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestTextAppender(unittest.TestCase):
+    """Test append a blocchi coalescenti"""
+
+    def setUp(self):
+        self.widget = QPlainTextEdit()
+        self.appender = TextAppender(self.widget, chunk_chars=1000)
+
+    def test_appends_coalesced_with_separator(self):
+        """Test che più append vengano inserite insieme al passo successivo"""
+        self.appender.append("Ciao")
+        self.appender.append("a tutti")
+        self.assertEqual(self.widget.toPlainText(), "")
+
+        self.appender.flush()
+        self.assertEqual(self.widget.toPlainText(), "Ciao a tutti")
+
+    def test_large_text_inserted_in_steps(self):
+        """Test che un testo enorme venga inserito al massimo chunk_chars per passo"""
+        text = "x" * 4500
+        self.appender.set_text(text)
+
+        self.appender._render_step()
+        self.assertEqual(len(self.widget.toPlainText()), 1000)
+        self.assertEqual(self.appender.pending_chars, 3500)
+
+        self.appender.flush()
+        self.assertEqual(self.widget.toPlainText(), text)
+        self.assertFalse(self.appender._timer.isActive())
+
+    def test_long_lines_wrapped(self):
+        """Test che il testo senza a capo venga diviso in righe di circa line_chars"""
+        appender = TextAppender(self.widget, line_chars=100)
+        words = [f"parola{i}" for i in range(500)]
+        appender.append(" ".join(words[:250]))
+        appender.append(" ".join(words[250:]))
+        appender.flush()
+
+        lines = self.widget.toPlainText().split("\n")
+        self.assertGreater(len(lines), 10)
+        self.assertTrue(all(len(line) <= 110 for line in lines))
+        self.assertEqual(" ".join(lines).split(), words)
+
+    def test_set_text_replaces_pending(self):
+        """Test che set_text() scarti il testo non ancora inserito"""
+        self.appender.append("vecchio")
+        self.appender.set_text("nuovo")
+        self.appender.flush()
+        self.assertEqual(self.widget.toPlainText(), "nuovo")
+
+
+class TestSegmentListModel(unittest.TestCase):
+    """Test vista per segmento caricata a richiesta"""
+
+    def setUp(self):
+        self.store = SegmentStore()
+        for i in range(450):
+            self.store.append(i * 2.0, i * 2.0 + 2.0, f"segmento {i}")
+        self.model = SegmentListModel(self.store, fetch_rows=200)
+
+    def test_rows_fetched_in_blocks(self):
+        """Test che le righe vengano create a blocchi di fetch_rows"""
+        self.assertEqual(self.model.rowCount(), 0)
+        self.model.fetchMore()
+        self.assertEqual(self.model.rowCount(), 200)
+        while self.model.canFetchMore():
+            self.model.fetchMore()
+        self.assertEqual(self.model.rowCount(), 450)
+        self.assertEqual(self.model.data(self.model.index(61)), "[02:02] segmento 61")
+
+    def test_new_segments_only_when_at_end(self):
+        """Test che i nuovi segmenti vengano caricati solo se la vista è in fondo"""
+        view = QListView()
+        view.setModel(self.model)
+        while self.model.canFetchMore():
+            self.model.fetchMore()
+        self.store.append(900.0, 901.0, "nuovo")
+
+        self.model.segments_added(view_at_end=False)
+        self.assertEqual(self.model.rowCount(), 450)
+        self.model.segments_added(view_at_end=True)
+        self.assertEqual(self.model.rowCount(), 451)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestTextAppender))
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentListModel))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
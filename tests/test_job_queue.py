@@ -0,0 +1,240 @@
+"""
+Test suite for coda persistente delle elaborazioni (JobQueue, JobRunner)
+"""
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+import recorder_app
+from recorder_app import JobQueue, JobRunner, AudioBuffer, Segment
+
+app = QApplication.instance() or QApplication([])
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test della coda su SQLite"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = JobQueue(Path(self.tmp.name) / "jobs")
+        self.addCleanup(self.queue.close)
+
+    def test_priority_then_arrival_order(self):
+        """Test job presi per priorità e poi in ordine di arrivo"""
+        first = self.queue.submit("a.wav")
+        urgent = self.queue.submit("b.wav", priority=5)
+        third = self.queue.submit("c.wav")
+
+        claimed = [self.queue.claim("transcribe")["id"] for _ in range(3)]
+        self.assertEqual(claimed, [urgent, first, third])
+        self.assertIsNone(self.queue.claim("transcribe"))
+        self.assertEqual(self.queue.get(first)["status"], "running")
+
+    def test_stages_and_results(self):
+        """Test passaggio trascrizione -> analisi -> completato con i risultati salvati"""
+        job_id = self.queue.submit("a.wav", model_size="small")
+        self.queue.claim("transcribe")
+        self.queue.advance(job_id, transcript="ciao", segments=[{"start": 0.0, "end": 1.0, "text": "ciao"}])
+        job = self.queue.claim("summarize")
+        self.assertEqual((job["id"], job["transcript"], job["options"]), (job_id, "ciao", {"model_size": "small"}))
+
+        self.queue.advance(job_id, results={"summary": "ok"})
+        job = self.queue.get(job_id)
+        self.assertEqual((job["stage"], job["status"], job["results"]), ("done", "done", {"summary": "ok"}))
+
+    def test_restart_requeues_running_jobs(self):
+        """Test che dopo un riavvio i job interrotti ripartano dallo stadio in cui erano"""
+        job_id = self.queue.submit("a.wav")
+        self.queue.claim("transcribe")
+        self.queue.advance(job_id, transcript="ciao", segments=[])
+        self.queue.claim("summarize")
+
+        reopened = JobQueue(Path(self.tmp.name) / "jobs")
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.recover(), 1)
+        self.assertEqual(reopened.claim("summarize")["transcript"], "ciao")
+
+    def test_temporary_recording_adopted(self):
+        """Test che la registrazione temporanea venga spostata nella coda e rimossa a fine job"""
+        recording = Path(self.tmp.name) / "rec.wav"
+        recording.write_bytes(b"RIFF")
+        Path(str(recording) + ".tracks.json").write_text("{}", encoding="utf-8")
+        with mock.patch.object(recorder_app, "_temp_files", [str(recording), str(recording) + ".tracks.json"]) as temp:
+            job_id = self.queue.submit(str(recording))
+            self.assertEqual(temp, [])
+
+        adopted = self.queue.get(job_id)["audio_file"]
+        self.assertFalse(recording.exists())
+        self.assertTrue(os.path.exists(adopted + ".tracks.json"))
+        self.queue.claim("transcribe")
+        self.queue.advance(job_id, transcript="", segments=[])
+        self.queue.claim("summarize")
+        self.queue.advance(job_id, results={})
+        self.assertFalse(os.path.exists(adopted))
+        self.assertFalse(os.path.exists(adopted + ".tracks.json"))
+
+    def test_failed_job_retry(self):
+        """Test errore salvato e nuovo tentativo dallo stesso stadio"""
+        job_id = self.queue.submit("a.wav")
+        self.queue.claim("transcribe")
+        self.queue.fail(job_id, "Errore Whisper")
+        self.assertEqual(self.queue.get(job_id)["error"], "Errore Whisper")
+        self.assertIsNone(self.queue.claim("transcribe"))
+
+        self.queue.retry(job_id)
+        self.assertEqual(self.queue.claim("transcribe")["attempts"], 2)
+
+
+class FakeTranscriptionWorker(QThread):
+    segments_ready = pyqtSignal(list)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+    running_count = 0
+    max_running = 0
+    running_instances = set()
+    overlaps = 0  # avvii con l'istanza già usata da un'altra trascrizione in corso
+    instances = []
+
+    def __init__(self, audio, *args, instance=0, **kwargs):
+        super().__init__()
+        self.audio = audio
+        self.instance = instance
+
+    def run(self):
+        if self.instance in FakeTranscriptionWorker.running_instances:
+            FakeTranscriptionWorker.overlaps += 1
+        FakeTranscriptionWorker.running_instances.add(self.instance)
+        FakeTranscriptionWorker.instances.append(self.instance)
+        FakeTranscriptionWorker.running_count += 1
+        FakeTranscriptionWorker.max_running = max(FakeTranscriptionWorker.max_running,
+                                                  FakeTranscriptionWorker.running_count)
+        time.sleep(0.05)
+        FakeTranscriptionWorker.running_count -= 1
+        FakeTranscriptionWorker.running_instances.discard(self.instance)
+        if self.audio == "rotto.wav":
+            self.error.emit("Errore lettura file")
+            return
+        self.segments_ready.emit([Segment(0.0, 1.0, "ciao", 0.0, 0.0)])
+        self.finished.emit("ciao")
+
+
+class FakeSummaryWorker(QThread):
+    token = pyqtSignal(str)
+    partial = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(str)
+
+    def __init__(self, transcript, model_name=None, segments=None):
+        super().__init__()
+        self.transcript = transcript
+        self.segments = segments
+
+    def run(self):
+        self.finished.emit({"summary": self.transcript, "key_points": [], "action_items": [],
+                            "segments": len(self.segments or [])})
+
+
+class TestJobRunner(unittest.TestCase):
+    """Test esecuzione dei job con concorrenza limitata per stadio"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = JobQueue(Path(self.tmp.name))
+        self.addCleanup(self.queue.close)
+        for name, fake in (("TranscriptionWorker", FakeTranscriptionWorker), ("SummaryWorker", FakeSummaryWorker)):
+            patcher = mock.patch.object(recorder_app, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        FakeTranscriptionWorker.max_running = 0
+        FakeTranscriptionWorker.overlaps = 0
+        FakeTranscriptionWorker.instances = []
+
+    def wait(self, runner, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while runner.active() and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+        self.assertFalse(runner.active())
+
+    def test_back_to_back_jobs(self):
+        """Test due registrazioni consecutive: una trascrizione alla volta, entrambe completate"""
+        runner = JobRunner(self.queue, {"transcribe": 1, "summarize": 1})
+        finished = {}
+        runner.finished.connect(lambda job_id, results: finished.setdefault(job_id, results))
+        jobs = [runner.submit("a.wav"), runner.submit("b.wav"), runner.submit("c.wav")]
+        self.assertEqual(runner.running("transcribe"), 1)
+        self.wait(runner)
+
+        self.assertEqual(sorted(finished), jobs)
+        self.assertEqual(finished[jobs[0]]["segments"], 1)
+        self.assertEqual(FakeTranscriptionWorker.max_running, 1)
+
+    def test_concurrent_jobs_use_own_instances(self):
+        """Test trascrizioni concorrenti su istanze Whisper diverse, liberate a fine job anche se fallito"""
+        runner = JobRunner(self.queue, {"transcribe": 2, "summarize": 1})
+        for audio in ("a.wav", "rotto.wav", "b.wav", "c.wav", "d.wav"):
+            runner.submit(audio)
+        self.wait(runner)
+
+        self.assertEqual(FakeTranscriptionWorker.max_running, 2)
+        self.assertEqual(FakeTranscriptionWorker.overlaps, 0)
+        self.assertEqual(set(FakeTranscriptionWorker.instances), {0, 1})
+        self.assertEqual(runner._free_slots, [0, 1])
+
+    def test_failure_does_not_block_queue(self):
+        """Test che un job fallito non fermi i successivi"""
+        runner = JobRunner(self.queue, {"transcribe": 1, "summarize": 1})
+        failed = []
+        runner.failed.connect(lambda job_id, error: failed.append(job_id))
+        broken, ok = runner.submit("rotto.wav"), runner.submit("a.wav")
+        self.wait(runner)
+
+        self.assertEqual(failed, [broken])
+        self.assertEqual(self.queue.get(ok)["status"], "done")
+
+    def test_memory_recording_lost_on_restart(self):
+        """Test registrazione in memoria: eseguita nella stessa sessione, persa dopo un riavvio"""
+        self.queue.submit(None)  # job di una sessione precedente, senza file
+        runner = JobRunner(self.queue, {"transcribe": 1, "summarize": 1})
+        buffer = AudioBuffer(16000)
+        buffer.append(b"\x00\x00" * 160)
+        job_id = runner.submit(buffer)
+        self.wait(runner)
+
+        states = {job["id"]: job["status"] for job in self.queue.jobs()}
+        self.assertEqual(states, {1: "failed", job_id: "done"})
+        self.assertEqual(buffer.length, 0)  # buffer liberato dopo la trascrizione
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestJobQueue))
+    suite.addTests(loader.loadTestsFromTestCase(TestJobRunner))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
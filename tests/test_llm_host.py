@@ -0,0 +1,156 @@
+"""
+Test suite for LLMHost (modello GPT4All persistente)
+"""
+
+import unittest
+import sys
+import os
+import time
+import threading
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import LLMHost, GenerationCancelled
+
+
+class FakeGPT:
+    """GPT4All finto che conta le generazioni"""
+
+    def __init__(self):
+        self.prompts = []
+        self.closed = False
+
+    def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return '{"summary": "ok", "key_points": [], "action_items": []}'
+
+    def close(self):
+        self.closed = True
+
+
+class SlowGPT(FakeGPT):
+    """GPT4All finto in streaming: genera token finché la callback non ritorna False"""
+
+    def generate(self, prompt, streaming=False, callback=None, **kwargs):
+        self.prompts.append(prompt)
+        for _ in range(500):
+            if not callback(0, "x"):
+                return
+            time.sleep(0.01)
+            yield "x"
+
+
+class TestLLMHost(unittest.TestCase):
+    """Test riuso e rilascio del modello"""
+
+    def setUp(self):
+        self.created = []
+
+    def factory(self):
+        model = FakeGPT()
+        self.created.append(model)
+        return model
+
+    def test_model_reused_across_generations(self):
+        """Test che il modello venga caricato una sola volta"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=self.factory)
+
+        host.generate("uno")
+        host.generate("due")
+
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.created[0].prompts, ["uno", "due"])
+
+    def test_lazy_load(self):
+        """Test che il modello non venga caricato alla creazione"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=self.factory)
+        self.assertFalse(host.is_loaded())
+        self.assertEqual(len(self.created), 0)
+
+    def test_warmup_loads_in_background(self):
+        """Test che warmup() carichi il modello senza generare"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=self.factory)
+        host.warmup()
+        host._warmup_thread.join(2)
+
+        self.assertTrue(host.is_loaded())
+        host.generate("prompt")
+        self.assertEqual(len(self.created), 1)
+
+    def test_release_closes_model(self):
+        """Test che release() chiuda e scarichi il modello"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=self.factory)
+        host.generate("prompt")
+        host.release()
+
+        self.assertFalse(host.is_loaded())
+        self.assertTrue(self.created[0].closed)
+
+        # Una nuova generazione ricarica il modello
+        host.generate("prompt")
+        self.assertEqual(len(self.created), 2)
+
+    def test_idle_timeout_releases(self):
+        """Test rilascio automatico dopo il timeout di inattività"""
+        host = LLMHost("fake.gguf", idle_timeout=0.1, factory=self.factory)
+        host.generate("prompt")
+        self.assertTrue(host.is_loaded())
+
+        time.sleep(0.4)
+        self.assertFalse(host.is_loaded())
+        host.shutdown()
+
+    def test_cancel_stops_generation(self):
+        """Test che cancel() fermi la generazione in corso e che shutdown() rilasci il modello"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=SlowGPT)
+        tokens = []
+        outcome = []
+
+        def generate():
+            try:
+                host.generate("p", on_token=tokens.append)
+            except GenerationCancelled as e:
+                outcome.append(e)
+
+        thread = threading.Thread(target=generate)
+        thread.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        self.assertTrue(host.shutdown(timeout=2))
+        thread.join(2)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertFalse(host.is_loaded())
+        self.assertEqual(len(outcome), 1)
+        self.assertLess(len(tokens), 100)
+        # Dopo shutdown l'host torna utilizzabile
+        host.generate("p", on_token=lambda token: True)
+
+    def test_shutdown_skips_busy_host(self):
+        """Test che shutdown() non resti bloccato se il lock dell'host non si libera"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=self.factory)
+        host.generate("prompt")
+        busy = threading.Thread(target=host._lock.acquire)
+        busy.start()
+        busy.join()
+
+        self.assertFalse(host.shutdown(timeout=0.1))
+        self.assertTrue(host.is_loaded())
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestLLMHost))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,151 @@
+"""
+Test suite for metriche per stadio (Metrics, span di trascrizione e GPT4All)
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import Metrics, LLMHost, transcribe_audio
+
+
+class TestMetrics(unittest.TestCase):
+    """Test span e contatori"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "metrics.jsonl"
+        self.metrics = Metrics(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def records(self):
+        return [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+
+    def test_span_written_as_json_line(self):
+        """Test che uno span venga scritto con durata e campi aggiuntivi"""
+        with self.metrics.span("decode", model="base") as span:
+            span["tokens"] = 12
+
+        record = self.records()[0]
+        self.assertEqual(record["kind"], "span")
+        self.assertEqual(record["name"], "decode")
+        self.assertEqual(record["model"], "base")
+        self.assertEqual(record["tokens"], 12)
+        self.assertGreaterEqual(record["seconds"], 0)
+
+    def test_rtf_from_audio_seconds(self):
+        """Test real-time factor calcolato dalla durata audio"""
+        with mock.patch("recorder_app.time.perf_counter", side_effect=[10.0, 15.0]):
+            with self.metrics.span("transcribe", audio_seconds=50.0):
+                pass
+
+        self.assertAlmostEqual(self.metrics.last("transcribe")["rtf"], 0.1)
+
+    def test_span_records_error(self):
+        """Test che un'eccezione venga registrata e propagata"""
+        with self.assertRaises(RuntimeError):
+            with self.metrics.span("load"):
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.records()[0]["error"], "RuntimeError")
+
+    def test_counters_flushed(self):
+        """Test accumulo e scrittura dei contatori"""
+        self.metrics.count("llm.tokens", 10)
+        self.metrics.count("llm.tokens", 5)
+        self.metrics.flush_counters()
+
+        self.assertEqual(self.records()[-1]["llm.tokens"], 15)
+
+    def test_disabled_file(self):
+        """Test metriche solo in memoria senza file"""
+        metrics = Metrics(None)
+        with metrics.span("x"):
+            pass
+        self.assertIsNotNone(metrics.last("x"))
+
+
+class StreamingGPT:
+    """GPT4All finto che in streaming restituisce un token alla volta"""
+
+    def generate(self, prompt, streaming=False, **kwargs):
+        tokens = ["{", '"summary"', ": ", '"ok"', "}"]
+        return iter(tokens) if streaming else "".join(tokens)
+
+
+class FakeWhisperModel:
+    def transcribe(self, audio, language=None):
+        return {"text": " ciao", "segments": [
+            {"seek": 0, "start": 0.0, "end": 1.0, "text": " ciao", "tokens": [1, 2, 3]},
+            {"seek": 0, "start": 1.0, "end": 2.0, "text": " mondo", "tokens": [4]},
+        ]}
+
+
+class TestStageSpans(unittest.TestCase):
+    """Test strumentazione degli stadi"""
+
+    def setUp(self):
+        self.metrics = Metrics(None)
+        patcher = mock.patch.object(recorder_app, "metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_llm_generation_split(self):
+        """Test separazione valutazione prompt / generazione e token/s"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=StreamingGPT)
+        text = host.generate("prompt", max_tokens=50)
+
+        self.assertEqual(text, '{"summary": "ok"}')
+        record = self.metrics.last("llm.generate")
+        self.assertEqual(record["tokens"], 5)
+        self.assertIn("prompt_seconds", record)
+        self.assertIn("tokens_per_second", record)
+        self.assertIsNotNone(self.metrics.last("llm.load"))
+
+    def test_transcription_span(self):
+        """Test durata audio, segmenti e token della trascrizione"""
+        audio = np.zeros(16000 * 4, dtype=np.float32)
+        with mock.patch("recorder_app.get_whisper_model", return_value=FakeWhisperModel()):
+            transcribe_audio(audio)
+
+        record = self.metrics.last("whisper.transcribe")
+        self.assertEqual(record["audio_seconds"], 4.0)
+        self.assertEqual(record["segments"], 2)
+        self.assertEqual(record["windows"], 1)
+        self.assertEqual(record["tokens"], 4)
+        self.assertIn("rtf", record)
+
+    def test_parse_span(self):
+        """Test span del parsing della risposta"""
+        recorder_app.parse_summary_response('{"summary": "x", "key_points": [], "action_items": []}')
+        self.assertIsNotNone(self.metrics.last("summary.parse"))
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestMetrics))
+    suite.addTests(loader.loadTestsFromTestCase(TestStageSpans))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
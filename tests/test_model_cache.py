@@ -0,0 +1,158 @@
+"""
+Test suite for ModelCache (cache modelli Whisper)
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import ModelCache
+
+
+class FakeModel:
+    """Modello finto con dimensione dichiarata"""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+
+def make_cache(max_bytes):
+    return ModelCache(max_bytes, size_of=lambda m: m.size)
+
+
+class TestModelCache(unittest.TestCase):
+    """Test caricamento e riuso dei modelli"""
+
+    def test_loads_once(self):
+        """Test che il loader venga chiamato una sola volta per chiave"""
+        cache = make_cache(1000)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return FakeModel("base", 100)
+
+        first = cache.get(("whisper", "base", "cpu"), loader)
+        second = cache.get(("whisper", "base", "cpu"), loader)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+
+    def test_different_keys(self):
+        """Test che chiavi diverse (es. device) abbiano modelli separati"""
+        cache = make_cache(1000)
+        cpu = cache.get(("whisper", "base", "cpu"), lambda: FakeModel("cpu", 100))
+        cuda = cache.get(("whisper", "base", "cuda"), lambda: FakeModel("cuda", 100))
+
+        self.assertIsNot(cpu, cuda)
+        self.assertEqual(cache.total_bytes(), 200)
+
+    def test_lru_eviction(self):
+        """Test eviction del modello meno usato oltre il budget"""
+        cache = make_cache(250)
+        cache.get("tiny", lambda: FakeModel("tiny", 100))
+        cache.get("base", lambda: FakeModel("base", 100))
+        # Tocca tiny: base diventa il meno recente
+        cache.get("tiny", lambda: FakeModel("tiny", 100))
+        cache.get("small", lambda: FakeModel("small", 100))
+
+        self.assertIn("tiny", cache)
+        self.assertIn("small", cache)
+        self.assertNotIn("base", cache)
+        self.assertLessEqual(cache.total_bytes(), 250)
+
+    def test_oversized_model_kept(self):
+        """Test che un modello più grande del budget resti comunque disponibile"""
+        cache = make_cache(50)
+        cache.get("base", lambda: FakeModel("base", 100))
+        model = cache.get("medium", lambda: FakeModel("medium", 500))
+
+        self.assertEqual(model.name, "medium")
+        self.assertIn("medium", cache)
+        self.assertNotIn("base", cache)
+
+    def test_concurrent_get_loads_once(self):
+        """Test che thread concorrenti condividano un unico caricamento"""
+        cache = make_cache(1000)
+        calls = []
+        results = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return FakeModel("base", 100)
+
+        def worker():
+            results.append(cache.get("base", loader))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(cache._key_locks, {})
+
+    def test_key_locks_released(self):
+        """Test che i lock per chiave non restino dopo caricamenti, eviction ed errori"""
+        cache = make_cache(150)
+        for instance in range(20):
+            cache.get(("base", instance), lambda: FakeModel("base", 100))
+
+        def broken():
+            raise RuntimeError("modello corrotto")
+
+        with self.assertRaises(RuntimeError):
+            cache.get("rotto", broken)
+        self.assertEqual(len(cache._models), 1)
+        self.assertEqual(cache._key_locks, {})
+
+    def test_in_use_and_pinned_not_evicted(self):
+        """Test che le istanze in uso o fissate non si sfrattino a vicenda oltre il budget"""
+        cache = make_cache(150)
+        cache.get(("base", 0), lambda: FakeModel("worker 0", 100), pin=True)
+        with cache.in_use(("base", 1)):
+            cache.get(("base", 1), lambda: FakeModel("worker 1", 100))
+            with self.assertLogs("recorder_app", "WARNING"):
+                cache.get("tiny", lambda: FakeModel("tiny", 40))
+            self.assertIn(("base", 0), cache)
+            self.assertIn(("base", 1), cache)
+
+        # A trascrizione finita l'istanza non fissata torna soggetta al budget
+        self.assertIn(("base", 0), cache)
+        self.assertNotIn(("base", 1), cache)
+        self.assertLessEqual(cache.total_bytes(), 150)
+
+    def test_clear(self):
+        """Test svuotamento cache"""
+        cache = make_cache(1000)
+        cache.get("base", lambda: FakeModel("base", 100))
+        cache.clear()
+
+        self.assertNotIn("base", cache)
+        self.assertEqual(cache.total_bytes(), 0)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestModelCache))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,177 @@
+"""
+Test suite for registrazione multi-dispositivo (TrackAligner, MultiTrackRecorder, transcribe_tracks)
+"""
+
+import unittest
+import sys
+import os
+import json
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import TrackAligner, MultiTrackRecorder, merge_track_segments, transcribe_tracks, read_tracks
+from tests.fake_pyaudio import FakePyAudio
+
+RATE = 16000
+
+
+def block(value, n=1024):
+    return np.full(n, value, dtype=np.int16)
+
+
+class TestTrackAligner(unittest.TestCase):
+    """Test allineamento delle tracce sul clock comune"""
+
+    def test_late_track_padded_at_start(self):
+        """Test che una traccia partita dopo riceva silenzio in testa"""
+        aligner = TrackAligner(2, RATE, started_at=100.0)
+        # Traccia 0 parte subito, traccia 1 con 0.5 s di ritardo
+        aligner.push(0, block(1, RATE), captured_at=101.0)
+        aligner.push(1, block(2, RATE // 2), captured_at=101.0)
+
+        frames = aligner.pop_frames()
+        self.assertEqual(frames.shape, (RATE, 2))
+        self.assertEqual(aligner.offsets, [0, RATE // 2])
+        self.assertTrue((frames[:RATE // 2, 1] == 0).all())
+        self.assertTrue((frames[RATE // 2:, 1] == 2).all())
+        self.assertTrue((frames[:, 0] == 1).all())
+
+    def test_waits_for_slowest_track(self):
+        """Test che vengano emessi solo i frame presenti su tutte le tracce"""
+        aligner = TrackAligner(2, RATE, started_at=0.0)
+        aligner.push(0, block(1, 2048), captured_at=2048 / RATE)
+        self.assertIsNone(aligner.pop_frames())
+
+        aligner.push(1, block(2, 1024), captured_at=1024 / RATE)
+        self.assertEqual(len(aligner.pop_frames()), 1024)
+
+    def test_stalled_track_filled_with_silence(self):
+        """Test che un dispositivo fermo non blocchi le altre tracce"""
+        aligner = TrackAligner(2, RATE, started_at=0.0, max_lag_seconds=1.0)
+        aligner.push(1, block(2, 10), captured_at=10 / RATE)
+        aligner.push(0, block(1, 3 * RATE), captured_at=3.0)
+
+        frames = aligner.pop_frames()
+        self.assertEqual(len(frames), 2 * RATE)
+        self.assertGreater(aligner.gap_samples[1], 0)
+
+    def test_late_samples_trimmed_after_padding(self):
+        """Test che i campioni arrivati in ritardo per il tratto riempito vengano scartati"""
+        aligner = TrackAligner(2, RATE, started_at=0.0, max_lag_seconds=1.0)
+        aligner.push(0, block(1, RATE), captured_at=1.0)
+        aligner.push(1, block(2, RATE), captured_at=1.0)
+        aligner.pop_frames()
+        # Traccia 1 ferma per 3 s: riempita fino a 1 s dietro la traccia 0
+        aligner.push(0, block(1, 3 * RATE), captured_at=4.0)
+        aligner.pop_frames()
+        self.assertEqual(aligner.gap_samples[1], 2 * RATE)
+
+        # I 3 s arretrati arrivano insieme: i primi 2 s cadono nel silenzio già inserito
+        aligner.push(1, block(3, 3 * RATE), captured_at=4.0)
+        aligner.push(0, block(1, RATE), captured_at=5.0)
+        aligner.push(1, block(2, RATE), captured_at=5.0)
+        frames = aligner.pop_frames()
+
+        self.assertEqual(aligner.trimmed_samples[1], 2 * RATE)
+        self.assertEqual(len(frames), 2 * RATE)
+        self.assertTrue((frames[:RATE, 1] == 3).all())
+        self.assertTrue((frames[RATE:, 1] == 2).all())
+        self.assertIsNone(aligner.pop_frames())
+
+    def test_flush_pads_shorter_tracks(self):
+        """Test che flush() completi le tracce alla stessa lunghezza"""
+        aligner = TrackAligner(2, RATE, started_at=0.0)
+        aligner.push(0, block(1, 100), captured_at=100 / RATE)
+        aligner.push(1, block(2, 40), captured_at=40 / RATE)
+        aligner.pop_frames()
+
+        frames = aligner.flush()
+        self.assertEqual(frames.shape, (60, 2))
+        self.assertTrue((frames[:, 1] == 0).all())
+
+
+class TestMergeTrackSegments(unittest.TestCase):
+    """Test unione delle trascrizioni per traccia"""
+
+    def test_ordered_and_labelled(self):
+        """Test ordine temporale ed etichette, con segmenti consecutivi uniti"""
+        mic = {"segments": [{"start": 0.0, "end": 2.0, "text": " Ciao"},
+                            {"start": 2.0, "end": 3.0, "text": " a tutti"},
+                            {"start": 70.0, "end": 71.0, "text": " Grazie"}]}
+        loopback = {"segments": [{"start": 5.0, "end": 6.0, "text": " Buongiorno"}]}
+
+        merged = merge_track_segments([mic, loopback], ["Mic", "Sistema"])
+
+        self.assertEqual(merged["text"].splitlines(), [
+            "[00:00] Mic: Ciao a tutti",
+            "[00:05] Sistema: Buongiorno",
+            "[01:10] Mic: Grazie",
+        ])
+        self.assertEqual(merged["segments"][2]["speaker"], "Sistema")
+
+
+class FakeWhisperModel:
+    def __init__(self, text):
+        self.text = text
+
+    def transcribe(self, audio, language=None):
+        return {"text": self.text, "segments": [{"start": float(audio[0] * 100), "end": 1.0, "text": self.text}]}
+
+
+class TestMultiTrackRecorder(unittest.TestCase):
+    """Test registrazione e trascrizione per traccia"""
+
+    def test_record_and_transcribe_tracks(self):
+        """Test file a due canali, etichette e trascrizione parallela"""
+        recorder = MultiTrackRecorder([0, 1], ["Mic", "Sistema"], audio_format="wav")
+        paths = []
+        recorder.finished.connect(paths.append)
+        # Ogni dispositivo consegna 20 blocchi con un valore diverso (1000, 2000)
+        fake = FakePyAudio(recorder, lambda input_device_index=None, **kwargs:
+                           [block(1000 * (input_device_index + 1))] * 20, streams=2)
+        with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: fake):
+            recorder.run()
+
+        self.assertEqual(len(paths), 1)
+        path = paths[0]
+        try:
+            tracks = read_tracks(path)
+            self.assertEqual(len(tracks), 2)
+            self.assertEqual(len(tracks[0]), len(tracks[1]))
+            self.assertAlmostEqual(float(tracks[1].max()), 2000 / 32768, places=4)
+
+            with mock.patch("recorder_app.get_whisper_model",
+                            side_effect=lambda size, instance=0, pin=False: FakeWhisperModel(f"voce {instance}")):
+                result = transcribe_tracks(path)
+
+            self.assertIn("Mic: voce 0", result["text"])
+            # Istanza propria per la seconda traccia, distinta da quelle degli altri job
+            self.assertIn("Sistema: voce (0, 1)", result["text"])
+        finally:
+            for f in (path, path + ".tracks.json"):
+                if os.path.exists(f):
+                    os.remove(f)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestTrackAligner))
+    suite.addTests(loader.loadTestsFromTestCase(TestMergeTrackSegments))
+    suite.addTests(loader.loadTestsFromTestCase(TestMultiTrackRecorder))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,186 @@
+"""
+Test suite for riuso dello stato KV del prefisso dei prompt (LLMHost, prompt a prefisso fisso)
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import (LLMHost, Metrics, build_summary_prompt, build_chunk_prompt, build_reduce_prompt,
+                          SUMMARY_PROMPT_PREFIX, CHUNK_PROMPT_PREFIX, REDUCE_PROMPT_PREFIX, NO_KEY_POINTS)
+
+RESPONSE = '{"summary": "ok", "key_points": [], "action_items": []}'
+
+
+class FakeContext:
+    """Come LLModelPromptContext: token in contesto e posizione di decodifica"""
+
+    def __init__(self):
+        self.tokens = []
+        self.n_past = 0
+
+    @property
+    def tokens_size(self):
+        return len(self.tokens)
+
+
+class FakeLLModel:
+    """llmodel finto: tronca i token a n_past, valuta solo i nuovi e conta quanti ne valuta"""
+
+    def __init__(self):
+        self.context = None
+        self.vocab = {}
+        self.evaluated = []
+
+    def tokenize(self, text):
+        return [self.vocab.setdefault(word, len(self.vocab)) for word in text.split()]
+
+    def prompt_model(self, prompt, prompt_template, callback, n_predict=200, reset_context=False, **kwargs):
+        if self.context is None:
+            self.context = FakeContext()
+        if reset_context:
+            self.context.n_past = 0
+        new = self.tokenize(prompt)
+        self.evaluated.append(len(new))
+        self.context.tokens = self.context.tokens[:self.context.n_past] + new
+        self.context.n_past = len(self.context.tokens)
+        output = []
+        for token in [RESPONSE[:20], RESPONSE[20:]][:n_predict]:
+            self.context.tokens.append(-1)
+            self.context.n_past += 1
+            if not callback(0, token):
+                break
+            output.append(token)
+        return output
+
+    def prompt_model_streaming(self, prompt, prompt_template, callback, **kwargs):
+        return iter(self.prompt_model(prompt, prompt_template, callback, **kwargs))
+
+
+class FakeGPT4All:
+    """GPT4All finto: generate() rivaluta sempre tutto il prompt"""
+
+    def __init__(self):
+        self.model = FakeLLModel()
+        self._history = None
+
+    def generate(self, prompt, streaming=False, callback=None, max_tokens=200, **kwargs):
+        return self.model.prompt_model_streaming(prompt, "%1", callback or (lambda token_id, response: True),
+                                                 n_predict=max_tokens, reset_context=True)
+
+
+class TestPrefixCache(unittest.TestCase):
+    """Test ripristino del prefisso tra generazioni"""
+
+    def setUp(self):
+        self.metrics = Metrics(None)
+        patcher = mock.patch.object(recorder_app, "metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gpt = FakeGPT4All()
+        self.host = LLMHost("fake.gguf", idle_timeout=0, factory=lambda: self.gpt)
+        self.prefix_tokens = len(SUMMARY_PROMPT_PREFIX.split())
+
+    def generate(self, transcript):
+        return self.host.generate(build_summary_prompt(transcript), max_tokens=100, prefix=SUMMARY_PROMPT_PREFIX)
+
+    def test_second_prompt_evaluates_only_suffix(self):
+        """Test che il secondo prompt valuti solo la parte dopo il prefisso"""
+        self.assertEqual(self.generate("prima riunione sul budget"), RESPONSE)
+        self.assertEqual(self.generate("seconda riunione sul personale"), RESPONSE)
+
+        prefix_eval, first_eval, second_eval = self.gpt.model.evaluated
+        self.assertEqual(prefix_eval, self.prefix_tokens)
+        self.assertEqual(second_eval, first_eval)
+        self.assertEqual(self.host.prefix_stats, {"hits": 1, "misses": 1, "saved_tokens": self.prefix_tokens})
+
+        record = self.metrics.last("llm.generate")
+        self.assertEqual(record["prefix_cache"], "hit")
+        self.assertEqual(record["prefix_tokens_saved"], self.prefix_tokens)
+        self.assertEqual(record["prefix_hit_rate"], 0.5)
+        self.assertEqual(self.metrics.counters["llm.prefix_cache.saved_tokens"], self.prefix_tokens)
+
+    def test_context_shift_invalidates_snapshot(self):
+        """Test che un contesto modificato dopo lo snapshot costringa a rivalutare il prefisso"""
+        self.generate("prima riunione")
+        self.gpt.model.context.tokens[0] = -99  # finestra scorsa: il prefisso non è più all'inizio
+        self.generate("seconda riunione")
+
+        self.assertEqual(self.host.prefix_stats["misses"], 2)
+        self.assertEqual(self.gpt.model.evaluated.count(self.prefix_tokens), 2)
+
+    def test_different_prefix_and_release(self):
+        """Test prefissi diversi e rilascio del modello: nuovo snapshot"""
+        self.generate("riunione")
+        self.host.generate(build_reduce_prompt([{"summary": "parte", "key_points": [NO_KEY_POINTS],
+                                                 "action_items": []}]), prefix=REDUCE_PROMPT_PREFIX)
+        self.host.release()
+        self.gpt.model.context = None
+        self.generate("riunione")
+        self.assertEqual(self.host.prefix_stats["hits"], 0)
+
+    def test_disabled(self):
+        """Test che con il riuso disabilitato il prompt venga passato intero a GPT4All"""
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=lambda: self.gpt, prefix_cache=False)
+        for transcript in ("uno", "due"):
+            host.generate(build_summary_prompt(transcript), prefix=SUMMARY_PROMPT_PREFIX)
+        self.assertEqual(self.gpt.model.evaluated[0], self.gpt.model.evaluated[1])
+        self.assertGreater(self.gpt.model.evaluated[0], self.prefix_tokens)
+        self.assertEqual(host.prefix_stats["hits"], 0)
+
+
+    def test_fallback_when_internal_api_changes(self):
+        """Test generazione completa se l'API interna di gpt4all rifiuta la chiamata a prefisso"""
+        streaming = self.gpt.model.prompt_model_streaming
+
+        def changed_api(prompt, prompt_template, callback, reset_context=False, **kwargs):
+            if not reset_context:
+                raise TypeError("prompt_model() got an unexpected keyword argument")
+            return streaming(prompt, prompt_template, callback, reset_context=reset_context, **kwargs)
+
+        self.gpt.model.prompt_model_streaming = changed_api
+        with self.assertLogs("recorder_app", "WARNING"):
+            self.assertEqual(self.generate("prima riunione"), RESPONSE)
+        self.assertEqual(self.generate("seconda riunione"), RESPONSE)
+        self.assertFalse(self.host.prefix_cache)
+
+    def test_disabled_on_untested_gpt4all(self):
+        """Test riuso disattivato con versioni di gpt4all non verificate"""
+        with mock.patch.object(recorder_app, "GPT4ALL_VERSION", (3, 0, 0)):
+            host = LLMHost("fake.gguf", idle_timeout=0, factory=lambda: self.gpt)
+        self.assertFalse(host.prefix_cache)
+
+
+class TestPromptPrefixes(unittest.TestCase):
+    """Test che le parti variabili dei prompt seguano il prefisso fisso"""
+
+    def test_prompts_start_with_prefix(self):
+        """Test prefisso fisso in testa a summary, map e reduce"""
+        self.assertTrue(build_summary_prompt("testo").startswith(SUMMARY_PROMPT_PREFIX))
+        self.assertTrue(build_chunk_prompt("testo", 2, 5).startswith(CHUNK_PROMPT_PREFIX))
+        self.assertIn("PARTE 2 DI 5", build_chunk_prompt("testo", 2, 5))
+        partial = {"summary": "parte", "key_points": ["kp"], "action_items": []}
+        self.assertTrue(build_reduce_prompt([partial]).startswith(REDUCE_PROMPT_PREFIX))
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestPrefixCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestPromptPrefixes))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,100 @@
+"""
+Test suite for registrazione compressa (FLAC/Opus) e decodifica dei file registrati
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import SoundFileWriter, resolve_recording_format, load_audio_file, audio_duration
+
+RATE = 16000
+
+
+def tone(seconds, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+class TestResolveFormat(unittest.TestCase):
+    """Test scelta del formato effettivo"""
+
+    def test_fallback_without_soundfile(self):
+        """Test che senza soundfile i formati compressi ricadano su WAV"""
+        with mock.patch.object(recorder_app, "soundfile", None):
+            self.assertEqual(resolve_recording_format("flac"), "wav")
+            self.assertEqual(resolve_recording_format("wav"), "wav")
+
+    def test_unknown_format(self):
+        """Test formato sconosciuto"""
+        self.assertEqual(resolve_recording_format("mp3"), "wav")
+
+
+@unittest.skipUnless(recorder_app.soundfile is not None, "soundfile non installato")
+class TestSoundFileWriter(unittest.TestCase):
+    """Test encoding in streaming e lettura diretta"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, audio_format, samples, rate=RATE):
+        path = self.dir / name
+        with SoundFileWriter(path, rate, audio_format) as writer:
+            # Blocchi da 1024 frame come in AudioRecorder
+            for i in range(0, len(samples), 1024):
+                writer.writeframes(samples[i:i + 1024].tobytes())
+        return path
+
+    def test_flac_lossless_roundtrip(self):
+        """Test che FLAC restituisca esattamente i campioni scritti"""
+        samples = tone(2)
+        path = self.write("rec.flac", "flac", samples)
+
+        audio = load_audio_file(path)
+        np.testing.assert_allclose(audio, samples.astype(np.float32) / 32768.0, atol=1e-6)
+        self.assertLess(path.stat().st_size, len(samples) * 2)
+
+    def test_opus_smaller_than_wav(self):
+        """Test che Opus sia molto più piccolo del PCM e mantenga la durata"""
+        samples = tone(5)
+        path = self.write("rec.ogg", "opus", samples)
+
+        self.assertLess(path.stat().st_size, len(samples) * 2 / 5)
+        self.assertAlmostEqual(audio_duration(path), 5.0, delta=0.1)
+        self.assertAlmostEqual(len(load_audio_file(path)) / RATE, 5.0, delta=0.1)
+
+    def test_resampled_to_whisper_rate(self):
+        """Test ricampionamento a 16 kHz dei file a 48 kHz"""
+        path = self.write("rec48.flac", "flac", tone(1, 48000), rate=48000)
+        self.assertEqual(len(load_audio_file(path)), RATE)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestResolveFormat))
+    suite.addTests(loader.loadTestsFromTestCase(TestSoundFileWriter))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
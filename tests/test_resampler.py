@@ -0,0 +1,99 @@
+"""
+Test suite for cattura al sample rate nativo (StreamResampler)
+"""
+
+import unittest
+import sys
+import os
+from math import gcd
+from unittest import mock
+
+import numpy as np
+from scipy.signal import resample_poly
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import StreamResampler, AudioRecorder, native_capture_rate
+from tests.fake_pyaudio import FakePyAudio
+
+
+def stream(resampler, signal, seed=0):
+    """Ricampiona signal a blocchi di dimensione casuale"""
+    rng = np.random.default_rng(seed)
+    out = []
+    pos = 0
+    while pos < len(signal):
+        size = int(rng.integers(1, 4000))
+        out.append(resampler.process(signal[pos:pos + size]))
+        pos += size
+    out.append(resampler.flush())
+    return np.concatenate(out)
+
+
+class TestStreamResampler(unittest.TestCase):
+    """Test equivalenza con resample_poly"""
+
+    def test_matches_resample_poly(self):
+        """Test che i blocchi concatenati coincidano con il ricampionamento offline"""
+        rng = np.random.default_rng(1)
+        for rate in (48000, 44100, 22050, 8000):
+            signal = rng.normal(size=rate).astype(np.float32)
+            g = gcd(rate, 16000)
+            expected = resample_poly(signal, 16000 // g, rate // g)
+
+            result = stream(StreamResampler(rate), signal)
+            self.assertEqual(len(result), len(expected), rate)
+            np.testing.assert_allclose(result, expected, atol=1e-4)
+
+    def test_tone_frequency_preserved(self):
+        """Test che un tono a 1 kHz resti a 1 kHz dopo 48k -> 16k"""
+        t = np.arange(48000) / 48000
+        result = stream(StreamResampler(48000), np.sin(2 * np.pi * 1000 * t).astype(np.float32))
+
+        spectrum = np.abs(np.fft.rfft(result))
+        self.assertAlmostEqual(np.argmax(spectrum) * 16000 / len(result), 1000, delta=2)
+
+    def test_native_rate_from_device_info(self):
+        """Test rate di default del dispositivo con fallback"""
+        self.assertEqual(native_capture_rate({"defaultSampleRate": 48000.0}, 16000), 48000)
+        self.assertEqual(native_capture_rate({"maxInputChannels": 1}, 16000), 16000)
+
+
+class TestNativeRateCapture(unittest.TestCase):
+    """Test registrazione al rate nativo"""
+
+    def test_device_opened_at_native_rate(self):
+        """Test apertura a 48 kHz e uscita a 16 kHz"""
+        recorder = AudioRecorder(device_index=0, in_memory=True, capture_rate=None)
+        # 10 blocchi al rate nativo del dispositivo
+        fake = FakePyAudio(recorder, lambda frames_per_buffer=None, **kwargs:
+                           [np.zeros(frames_per_buffer, dtype=np.int16)] * 10, rate=48000)
+        buffers = []
+        recorder.buffer_ready.connect(buffers.append)
+        with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: fake):
+            recorder.run()
+
+        self.assertEqual(fake.opened[0]["rate"], 48000)
+        # Blocchi di 1024 frame a 16 kHz equivalgono a 3072 frame a 48 kHz
+        self.assertEqual(len(buffers[0].view()), 10 * 1024)
+        buffers[0].close()
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamResampler))
+    suite.addTests(loader.loadTestsFromTestCase(TestNativeRateCapture))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
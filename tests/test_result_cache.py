@@ -0,0 +1,164 @@
+"""
+Test suite for ResultCache (cache trascrizioni e summary)
+"""
+
+import unittest
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import ResultCache, transcribe_audio, summarize_transcript
+
+
+class FakeWhisperModel:
+    """Modello finto che conta le trascrizioni"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, language=None):
+        self.calls += 1
+        return {"text": " testo", "segments": [{"start": 0.0, "end": 1.0, "text": " testo"}]}
+
+
+class FakeHost:
+    """Host GPT4All finto che conta le generazioni"""
+
+    def __init__(self, response='{"summary": "ok", "key_points": ["a"], "action_items": []}'):
+        self.calls = 0
+        self.response = response
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        return self.response
+
+
+class TestResultCache(unittest.TestCase):
+    """Test della cache su disco"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.cache = ResultCache(self.dir / "cache", max_bytes=10 * 1024 * 1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_audio(self, name, content):
+        path = self.dir / name
+        path.write_bytes(content)
+        return str(path)
+
+    def test_put_get(self):
+        """Test salvataggio e lettura"""
+        self.cache.put("summaries", "abc", {"summary": "x"})
+        self.assertEqual(self.cache.get("summaries", "abc"), {"summary": "x"})
+        self.assertIsNone(self.cache.get("summaries", "missing"))
+
+    def test_put_leaves_no_temporary_files(self):
+        """Test scrittura atomica con file temporanei univoci, rimossi anche in caso di errore"""
+        self.cache.put("summaries", "abc", {"summary": "x"})
+        self.cache.put("summaries", "abc", {"summary": object()})  # non serializzabile
+
+        self.assertEqual(self.cache.get("summaries", "abc"), {"summary": "x"})
+        self.assertEqual([p.name for p in (self.dir / "cache" / "summaries").iterdir()], ["abc.json"])
+
+    def test_audio_key_depends_on_content_and_options(self):
+        """Test chiave basata sul contenuto, non sul nome del file"""
+        a = self.write_audio("a.wav", b"RIFF1234")
+        b = self.write_audio("b.wav", b"RIFF1234")
+        c = self.write_audio("c.wav", b"RIFF5678")
+
+        self.assertEqual(ResultCache.audio_key(a, model="base"), ResultCache.audio_key(b, model="base"))
+        self.assertNotEqual(ResultCache.audio_key(a, model="base"), ResultCache.audio_key(c, model="base"))
+        self.assertNotEqual(ResultCache.audio_key(a, model="base"), ResultCache.audio_key(a, model="small"))
+
+    def test_audio_key_for_arrays(self):
+        """Test chiave per audio in memoria"""
+        audio = np.zeros(100, dtype=np.float32)
+        self.assertEqual(ResultCache.audio_key(audio), ResultCache.audio_key(audio.copy()))
+        self.assertNotEqual(ResultCache.audio_key(audio), ResultCache.audio_key(np.ones(100, dtype=np.float32)))
+
+    def test_audio_key_for_strided_views(self):
+        """Test stessa chiave per una vista non contigua e per la sua copia"""
+        stereo = np.random.default_rng(0).random((3 * 1024 * 1024, 2), dtype=np.float32)
+        channel = stereo[:, 1]
+        self.assertFalse(channel.flags.c_contiguous)
+        self.assertEqual(ResultCache.audio_key(channel), ResultCache.audio_key(channel.copy()))
+        self.assertNotEqual(ResultCache.audio_key(channel), ResultCache.audio_key(stereo[:, 0]))
+
+    def test_eviction_removes_oldest(self):
+        """Test eviction LRU oltre la dimensione massima"""
+        cache = ResultCache(self.dir / "small", max_bytes=250)
+        for i, key in enumerate(["old", "mid", "new"]):
+            cache.put("transcripts", key, {"text": "x" * 100})
+            path = self.dir / "small" / "transcripts" / f"{key}.json"
+            os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+        cache.evict()
+
+        self.assertIsNone(cache.get("transcripts", "old"))
+        self.assertIsNotNone(cache.get("transcripts", "new"))
+
+    def test_disabled_cache(self):
+        """Test cache disabilitata con dimensione 0"""
+        cache = ResultCache(self.dir / "off", max_bytes=0)
+        cache.put("summaries", "abc", {"summary": "x"})
+        self.assertIsNone(cache.get("summaries", "abc"))
+        self.assertFalse((self.dir / "off").exists())
+
+    def test_transcription_short_circuits(self):
+        """Test che una seconda trascrizione dello stesso audio non usi Whisper"""
+        audio = self.write_audio("meeting.wav", b"RIFF-audio")
+        model = FakeWhisperModel()
+        with mock.patch("recorder_app.get_whisper_model", return_value=model), \
+                mock.patch("recorder_app.load_audio_file", return_value=np.zeros(16000, dtype=np.float32)):
+            first = transcribe_audio(audio, cache=self.cache)
+            second = transcribe_audio(audio, cache=self.cache)
+            transcribe_audio(audio, language="en", cache=self.cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.calls, 2)
+
+    def test_summary_short_circuits(self):
+        """Test che un summary già calcolato venga riusato"""
+        host = FakeHost()
+        first = summarize_transcript("Riunione breve.", hosts=[host], cache=self.cache)
+        second = summarize_transcript("Riunione breve.", hosts=[host], cache=self.cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(host.calls, 1)
+
+    def test_fallback_summary_not_cached(self):
+        """Test che un summary ricavato dal parsing di ripiego non venga salvato in cache"""
+        host = FakeHost("RIASSUNTO: riunione breve\nPUNTI CHIAVE:\n- budget")
+        first = summarize_transcript("Riunione breve.", hosts=[host], cache=self.cache)
+        calls = host.calls
+        summarize_transcript("Riunione breve.", hosts=[host], cache=self.cache)
+
+        self.assertEqual(first["summary"], "riunione breve")
+        self.assertEqual(host.calls, 2 * calls)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestResultCache))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
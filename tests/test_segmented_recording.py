@@ -0,0 +1,202 @@
+"""
+Test suite for registrazione a segmenti (SegmentedRecording, checkpoint della trascrizione, recupero dopo crash)
+"""
+
+import unittest
+import sys
+import os
+import json
+import wave
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import SegmentedRecording, TimeMap, JobQueue, transcribe_segmented, RECORDING_MANIFEST
+
+RATE = 16000
+
+
+def pcm(seconds, value=1000):
+    return np.full(int(seconds * RATE), value, dtype=np.int16).tobytes()
+
+
+def write_blocks(recording, seconds):
+    data = pcm(seconds)
+    # Blocchi da 1024 frame come in AudioRecorder
+    for i in range(0, len(data), 2048):
+        recording.writeframes(data[i:i + 2048])
+
+
+def simulate_crash(recording):
+    """Dati del segmento aperto su disco, header WAV mai aggiornato"""
+    recording._writer._file.flush()
+    path = recording.segment_path(len(recording.segments))
+    with open(path, 'r+b') as f:
+        f.seek(4)
+        f.write(b"\x00" * 4)
+        f.seek(40)
+        f.write(b"\x00" * 4)
+
+
+class TestSegmentedRecording(unittest.TestCase):
+    """Test scrittura dei segmenti e manifest"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_rolling_segments(self):
+        """Test passaggio al segmento successivo a lunghezza fissa, anche a metà blocco"""
+        with SegmentedRecording.create(self.tmp.name, RATE, segment_seconds=1.0) as recording:
+            write_blocks(recording, 2.5)
+            self.assertEqual(len(recording.segments), 2)  # il terzo è ancora aperto
+
+        reopened = SegmentedRecording(recording.path)
+        self.assertTrue(reopened.complete)
+        self.assertEqual([segment["frames"] for segment in reopened.segments], [RATE, RATE, RATE // 2])
+        self.assertEqual(reopened.segment_offset(2), 2.0)
+        with wave.open(str(reopened.segment_path(1)), 'rb') as wf:
+            self.assertEqual(wf.getnframes(), RATE)
+
+    def test_recover_open_segment(self):
+        """Test recupero del segmento aperto al crash, con header WAV riparato"""
+        recording = SegmentedRecording.create(self.tmp.name, RATE, segment_seconds=1.0)
+        write_blocks(recording, 1.5)
+        simulate_crash(recording)
+
+        restarted = SegmentedRecording(recording.path)
+        self.assertFalse(restarted.complete)
+        restarted.recover()
+        self.assertTrue(restarted.complete)
+        self.assertAlmostEqual(restarted.duration, 1.5, places=2)
+        with wave.open(str(restarted.segment_path(1)), 'rb') as wf:
+            self.assertEqual(wf.getnframes(), restarted.segments[1]["frames"])
+
+
+class TestResumableTranscription(unittest.TestCase):
+    """Test trascrizione ripresa dall'ultimo segmento completato"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # Valore diverso per ogni secondo: il segmento si riconosce dall'audio
+        with SegmentedRecording.create(self.tmp.name, RATE, segment_seconds=1.0) as recording:
+            for second in range(3):
+                recording.writeframes(pcm(1.0, value=1000 * (second + 1)))
+        self.recording = recording
+        self.path = str(recording.path)
+        self.calls = []
+
+    def fake_transcribe(self, fail_on=None):
+        def part(audio, seconds):
+            return int(round(audio[int(seconds * RATE)] * 32768 / 1000)) - 1
+
+        def transcribe(audio, *args, **kwargs):
+            # Il segmento trascritto occupa il centro dell'audio, i vicini la sovrapposizione
+            index = part(audio, len(audio) / RATE / 2)
+            if index == fail_on:
+                raise RuntimeError("processo interrotto")
+            self.calls.append(index)
+            # Un segmento Whisper ogni mezzo secondo, testo dal secondo registrato in cui cade
+            segments = [{"start": t + 0.2, "end": t + 0.5, "text": f" parte {part(audio, t + 0.35)}", "tokens": [1]}
+                        for t in np.arange(0, len(audio) / RATE - 0.4, 0.5)]
+            kwargs["on_segments"](segments)
+            return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+        return transcribe
+
+    def test_resume_after_failure(self):
+        """Test che dopo un'interruzione vengano trascritti solo i segmenti senza checkpoint"""
+        with mock.patch.object(recorder_app, "transcribe_audio", self.fake_transcribe(fail_on=1)):
+            with self.assertRaises(RuntimeError):
+                transcribe_segmented(self.path, overlap=0.5)
+        with mock.patch.object(recorder_app, "transcribe_audio", self.fake_transcribe()):
+            emitted = []
+            result = transcribe_segmented(self.path, on_segments=emitted.extend, overlap=0.5)
+
+        self.assertEqual(self.calls, [0, 1, 2])
+        self.assertEqual(result["text"], "parte 0 parte 0 parte 1 parte 1 parte 2 parte 2")
+        self.assertEqual([segment["start"] for segment in result["segments"]], [0.2, 0.7, 1.2, 1.7, 2.2, 2.7])
+        self.assertEqual(emitted, result["segments"])
+        self.assertNotIn("tokens", result["segments"][0])
+
+    def test_overlap_keeps_boundary_segments_once(self):
+        """Test che i segmenti Whisper nella sovrapposizione vengano tenuti da un solo segmento"""
+        with mock.patch.object(recorder_app, "transcribe_audio", self.fake_transcribe()):
+            with_overlap = transcribe_segmented(self.path, overlap=0.5)
+            without_overlap = transcribe_segmented(self.path, overlap=0.0)
+
+        self.assertEqual(with_overlap["segments"], without_overlap["segments"])
+        self.assertEqual(len(self.calls), 6)
+
+    def test_vad_time_map_applied(self):
+        """Test che i tempi tornino a quelli della registrazione originale con la mappa del VAD"""
+        recording = SegmentedRecording(self.path)
+        # 10 s di silenzio scartati dopo il primo secondo
+        recording.time_map = TimeMap(RATE, entries=[(0, 0), (RATE, 11 * RATE)])
+        recording.close()
+        with mock.patch.object(recorder_app, "transcribe_audio", self.fake_transcribe()):
+            result = transcribe_segmented(self.path)
+
+        self.assertEqual([segment["start"] for segment in result["segments"]], [0.2, 0.7, 11.2, 11.7, 12.2, 12.7])
+
+    def test_checkpoint_ignored_for_other_model(self):
+        """Test checkpoint non riusati se cambiano modello o lingua"""
+        with mock.patch.object(recorder_app, "transcribe_audio", self.fake_transcribe()):
+            transcribe_segmented(self.path, model_size="base")
+            transcribe_segmented(self.path, model_size="small")
+        self.assertEqual(len(self.calls), 6)
+
+
+class TestCrashRecovery(unittest.TestCase):
+    """Test registrazioni rimaste senza job dopo un crash"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = JobQueue(Path(self.tmp.name) / "jobs")
+        self.addCleanup(self.queue.close)
+
+    def test_orphan_recording_queued(self):
+        """Test che una registrazione interrotta venga accodata al riavvio e rimossa a fine job"""
+        recording = SegmentedRecording.create(self.queue.recordings_dir, RATE, segment_seconds=1.0)
+        write_blocks(recording, 1.5)
+        simulate_crash(recording)
+        empty = SegmentedRecording.create(self.queue.recordings_dir, RATE)
+
+        self.assertEqual(self.queue.recover(), 1)
+        self.assertEqual(self.queue.recover(), 0)
+        self.assertFalse(empty.path.exists())
+        job = self.queue.claim("transcribe")
+        self.assertEqual((job["audio_file"], job["owns_audio"]), (str(recording.path), 1))
+        with open(recording.path / RECORDING_MANIFEST, encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)["segments"]), 2)
+
+        self.queue.advance(job["id"], transcript="", segments=[])
+        self.queue.claim("summarize")
+        self.queue.advance(job["id"], results={})
+        self.assertFalse(recording.path.exists())
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentedRecording))
+    suite.addTests(loader.loadTestsFromTestCase(TestResumableTranscription))
+    suite.addTests(loader.loadTestsFromTestCase(TestCrashRecovery))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,171 @@
+"""
+Test suite for segmenti con timestamp (SegmentStore, emissione incrementale, chunk per il summary)
+"""
+
+import unittest
+import sys
+import os
+import json
+import queue
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import (Segment, SegmentStore, AudioChunk, StreamingTranscriber, TranscriptionWorker,
+                          ResultCache, split_segments, summarize_transcript, format_report, process_audio_file,
+                          transcribe_audio, CHARS_PER_TOKEN)
+
+WHISPER_SEGMENTS = [
+    {"seek": 0, "start": 0.0, "end": 2.5, "text": " Buongiorno a tutti.", "avg_logprob": -0.2,
+     "no_speech_prob": 0.01, "tokens": [1, 2]},
+    {"seek": 0, "start": 2.5, "end": 65.0, "text": " Iniziamo la riunione", "avg_logprob": -0.4,
+     "no_speech_prob": 0.02, "tokens": [3]},
+]
+
+
+class FakeWhisperModel:
+    def transcribe(self, audio, language=None):
+        return {"text": "".join(s["text"] for s in WHISPER_SEGMENTS), "segments": WHISPER_SEGMENTS}
+
+
+class TestSegmentStore(unittest.TestCase):
+    """Test dello store compatto dei segmenti"""
+
+    def test_extend_from_whisper_segments(self):
+        """Test conversione dai segmenti di Whisper e accesso per indice"""
+        store = SegmentStore(WHISPER_SEGMENTS)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store[-1], Segment(2.5, 65.0, "Iniziamo la riunione", -0.4, 0.02))
+        self.assertEqual(store.text, "Buongiorno a tutti. Iniziamo la riunione")
+        self.assertEqual(store.duration, 65.0)
+
+    def test_extend_returns_added(self):
+        """Test che extend() ritorni solo i segmenti nuovi, con etichetta della traccia"""
+        store = SegmentStore(WHISPER_SEGMENTS[:1])
+        added = store.extend([{"start": 70.0, "end": 71.0, "text": " Grazie", "speaker": "Mic"}])
+        self.assertEqual(added, [Segment(70.0, 71.0, "Mic: Grazie", 0.0, 0.0)])
+
+    def test_timestamped_export(self):
+        """Test righe con timestamp e round-trip in dizionari"""
+        store = SegmentStore(WHISPER_SEGMENTS)
+        self.assertEqual(store.timestamped_text().splitlines(), [
+            "[00:00 - 00:02] Buongiorno a tutti.",
+            "[00:02 - 01:05] Iniziamo la riunione",
+        ])
+        self.assertEqual(SegmentStore(Segment(**d) for d in store.to_dicts())[1], store[1])
+        self.assertIn("SEGMENTI", format_report(store.text, "", store))
+
+
+class TestIncrementalSegments(unittest.TestCase):
+    """Test emissione dei segmenti durante la trascrizione"""
+
+    def test_worker_emits_segments(self):
+        """Test che TranscriptionWorker emetta i segmenti oltre al testo"""
+        worker = TranscriptionWorker(np.zeros(16000, dtype=np.float32))
+        received = []
+        worker.segments_ready.connect(received.extend)
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("recorder_app.get_whisper_model", return_value=FakeWhisperModel()), \
+                mock.patch.object(recorder_app, "result_cache", ResultCache(Path(tmp), max_bytes=0)):
+            worker.run()
+
+        self.assertEqual([segment.start for segment in received], [0.0, 2.5])
+
+    def test_cached_result_emits_segments(self):
+        """Test che un risultato in cache venga emesso come segmenti"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(Path(tmp))
+            audio = np.zeros(16000, dtype=np.float32)
+            with mock.patch("recorder_app.get_whisper_model", return_value=FakeWhisperModel()):
+                transcribe_audio(audio, cache=cache)
+                received = []
+                transcribe_audio(audio, cache=cache, on_segments=received.extend)
+        self.assertEqual(len(received), 2)
+
+    def test_streaming_segments_absolute_times(self):
+        """Test tempi dei segmenti live riferiti all'inizio della registrazione"""
+        transcriber = StreamingTranscriber(queue.Queue())
+        chunk = AudioChunk(np.zeros(16000, dtype=np.float32), 16000, 28.0, 0.0, float("inf"))
+        segments = transcriber._chunk_segments(FakeWhisperModel(), chunk)
+        self.assertEqual([(s.start, s.end) for s in segments], [(28.0, 30.5), (30.5, 93.0)])
+
+
+class FakeHost:
+    def __init__(self):
+        self.prompts = []
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return json.dumps({"summary": "parte", "key_points": ["kp"], "action_items": []})
+
+
+class TestSegmentChunks(unittest.TestCase):
+    """Test chunk del summary sui confini dei segmenti"""
+
+    def test_chunks_close_on_segment_boundaries(self):
+        """Test che nessun segmento venga diviso tra due chunk"""
+        store = SegmentStore()
+        for i in range(40):
+            store.append(i, i + 1, f"segmento numero {i} senza punto finale")
+        chunks = split_segments(store, max_tokens=50)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 50 * CHARS_PER_TOKEN for chunk in chunks))
+        self.assertEqual(" ".join(chunks), store.text)
+
+    def test_summary_uses_segments(self):
+        """Test map-reduce con chunk costruiti dai segmenti"""
+        store = SegmentStore()
+        for i in range(300):
+            store.append(i, i + 1, f"Intervento {i} sul budget del progetto")
+        host = FakeHost()
+        with mock.patch.object(recorder_app, "split_segments", wraps=split_segments) as split:
+            summarize_transcript(store.text, hosts=[host], segments=store)
+        split.assert_called_once()
+        self.assertGreater(len(host.prompts), 1)
+
+
+class TestBatchExport(unittest.TestCase):
+    """Test segmenti nei risultati della modalità batch"""
+
+    def test_json_includes_segments(self):
+        """Test che il JSON scritto accanto al file contenga i segmenti"""
+        with tempfile.TemporaryDirectory() as tmp:
+            audio_file = Path(tmp) / "riunione.wav"
+            audio_file.write_bytes(b"")
+            with mock.patch.object(recorder_app, "transcribe_audio", return_value=FakeWhisperModel().transcribe(None)):
+                process_audio_file(audio_file, summarize=False)
+
+            data = json.loads(audio_file.with_name("riunione.analisi.json").read_text(encoding="utf-8"))
+            self.assertEqual(data["segments"][1]["start"], 2.5)
+            self.assertIn("[00:02 - 01:05]", audio_file.with_name("riunione.analisi.txt").read_text(encoding="utf-8"))
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestIncrementalSegments))
+    suite.addTests(loader.loadTestsFromTestCase(TestSegmentChunks))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchExport))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,220 @@
+"""
+Test suite for servizio HTTP locale (TranscriptionServer): upload, coda, concorrenza e backpressure
+"""
+
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+import http.client
+from pathlib import Path
+from unittest import mock
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import TranscriptionServer, JobQueue
+
+AUDIO = b"RIFF" + b"\x00" * 4096
+
+
+def request(port, method, path, body=None, headers=None, encode_chunked=False):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request(method, path, body=body, headers=headers or {}, encode_chunked=encode_chunked)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"null"), dict(response.getheaders())
+    finally:
+        connection.close()
+
+
+def wait_status(port, job_id, status="done", timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = request(port, "GET", f"/jobs/{job_id}")[1]
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} non arrivato a {status}: {job}")
+
+
+class TestTranscriptionServer(unittest.TestCase):
+    """Test del servizio su localhost con trascrizione e analisi finte"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.queue = JobQueue(Path(self.tmp.name))
+        self.addCleanup(self.queue.close)
+        self.release = threading.Event()
+        self.release.set()
+        self.running = 0
+        self.max_running = 0
+        self.instances = set()
+        self.lock = threading.Lock()
+        for name, fake in (("transcribe_audio", self.fake_transcribe), ("summarize_transcript", self.fake_summarize)):
+            patcher = mock.patch.object(recorder_app, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_transcribe(self, audio, model_size, language, instance=0, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.instances.add(instance)
+        self.release.wait(5)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        size = os.path.getsize(audio)
+        return {"text": f" {size} byte {model_size} {language}",
+                "segments": [{"start": 0.0, "end": 1.0, "text": f" {size} byte", "tokens": [1]}]}
+
+    def fake_summarize(self, transcript, model_name, hosts=None, cache=None, segments=None, **kwargs):
+        return {"summary": transcript, "key_points": [], "action_items": [], "segments": len(segments)}
+
+    def run_server(self, scenario, **kwargs):
+        async def main():
+            server = TranscriptionServer(self.queue, preload=False, **kwargs)
+            host, port = await server.start("127.0.0.1", 0)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, scenario, port)
+            finally:
+                self.release.set()
+                await server.stop()
+        return asyncio.run(main())
+
+    def test_upload_and_wait(self):
+        """Test upload con Content-Length e risposta a elaborazione conclusa"""
+        def scenario(port):
+            return request(port, "POST", "/jobs?name=riunione.wav&language=en&wait=1", body=AUDIO)
+
+        status, job, _ = self.run_server(scenario)
+        self.assertEqual(status, 200)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["transcript"], f"{len(AUDIO)} byte base en")
+        self.assertEqual(job["results"]["segments"], 1)
+        self.assertEqual(job["name"], "riunione.wav")
+        self.assertEqual([p.name for p in Path(self.tmp.name).iterdir() if p.is_file() and p.suffix == ".wav"], [])
+
+    def test_chunked_upload_and_poll(self):
+        """Test upload chunked (streaming) con risposta 202 e stato letto in seguito"""
+        def scenario(port):
+            blocks = (AUDIO[i:i + 1000] for i in range(0, len(AUDIO), 1000))
+            status, body, _ = request(port, "POST", "/jobs?summary=0", body=blocks, encode_chunked=True)
+            self.assertEqual(status, 202)
+            return wait_status(port, body["id"])
+
+        job = self.run_server(scenario)
+        self.assertEqual(job["transcript"], f"{len(AUDIO)} byte base it")
+        self.assertIsNone(job["results"])
+
+    def test_backpressure(self):
+        """Test 503 con Retry-After quando la coda è piena, accettato di nuovo quando si libera"""
+        self.release.clear()
+
+        def scenario(port):
+            first = request(port, "POST", "/jobs", body=AUDIO)
+            second = request(port, "POST", "/jobs", body=AUDIO)
+            health = request(port, "GET", "/health")[1]
+            self.release.set()
+            wait_status(port, first[1]["id"])
+            third = request(port, "POST", "/jobs?wait=1", body=AUDIO)
+            return first, second, health, third
+
+        first, second, health, third = self.run_server(scenario, max_pending=1)
+        self.assertEqual(first[0], 202)
+        self.assertEqual(second[0], 503)
+        self.assertIn("Retry-After", second[2])
+        self.assertEqual(health["pending"], 1)
+        self.assertEqual(third[0], 200)
+
+    def test_concurrency_limit(self):
+        """Test trascrizioni limitate ai worker dello stadio, ognuno con la propria istanza del modello"""
+        def scenario(port):
+            ids = [request(port, "POST", "/jobs", body=AUDIO)[1]["id"] for _ in range(5)]
+            return [wait_status(port, job_id) for job_id in ids]
+
+        jobs = self.run_server(scenario, concurrency={"transcribe": 2, "summarize": 1})
+        self.assertEqual(len(jobs), 5)
+        self.assertLessEqual(self.max_running, 2)
+        self.assertTrue(self.instances <= {0, 1})
+
+    def test_errors(self):
+        """Test job inesistente, upload troppo grande, modello non valido e job fallito con nuovo tentativo"""
+        def broken(audio, *args, **kwargs):
+            raise RuntimeError("modello corrotto")
+
+        def scenario(port):
+            missing = request(port, "GET", "/jobs/999")[0]
+            too_large = request(port, "POST", "/jobs", body=AUDIO)[0]
+            bad_model = request(port, "POST", "/jobs?model=enorme", body=b"x")[0]
+            with mock.patch.object(recorder_app, "transcribe_audio", broken):
+                failed = request(port, "POST", "/jobs?wait=1", body=b"x")[1]
+            retried = request(port, "POST", f"/jobs/{failed['id']}/retry")[0]
+            return missing, too_large, bad_model, failed, retried, wait_status(port, failed["id"])
+
+        missing, too_large, bad_model, failed, retried, done = self.run_server(scenario, max_upload_bytes=1024)
+        self.assertEqual((missing, too_large, bad_model, retried), (404, 413, 400, 202))
+        self.assertEqual(failed["status"], "failed")
+        self.assertIn("modello corrotto", failed["error"])
+        self.assertEqual(done["transcript"], "1 byte base it")
+
+    def test_queue_calls_off_event_loop(self):
+        """Test chiamate SQLite della coda eseguite nel thread dedicato, non nel loop asyncio"""
+        threads = set()
+        for name in ("claim", "counts", "get", "submit", "advance"):
+            original = getattr(self.queue, name)
+
+            def traced(*args, _original=original, **kwargs):
+                threads.add(threading.current_thread().name)
+                return _original(*args, **kwargs)
+            patcher = mock.patch.object(self.queue, name, traced)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        def scenario(port):
+            job = request(port, "POST", "/jobs?wait=1", body=AUDIO)[1]
+            request(port, "GET", "/health")
+            return request(port, "GET", f"/jobs/{job['id']}")[1]
+
+        self.assertEqual(self.run_server(scenario)["status"], "done")
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith("server-db") for name in threads), threads)
+
+    def test_preload_pins_slot_models(self):
+        """Test modello Whisper precaricato per ogni slot e fissato nella cache"""
+        backend = mock.Mock()
+
+        async def main():
+            server = TranscriptionServer(self.queue, {"transcribe": 2, "summarize": 0})
+            await server.start("127.0.0.1", 0)
+            await server.stop()
+            return server
+
+        with mock.patch.object(recorder_app, "resolve_backend", return_value=backend):
+            asyncio.run(main()).executor.shutdown(wait=True)
+        self.assertEqual(backend.get_model.call_args_list,
+                         [mock.call("base", instance=slot, pin=True, concurrent=2) for slot in range(2)])
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestTranscriptionServer))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,172 @@
+"""
+Test suite for trascrizione live (AudioChunker, StreamingTranscriber)
+"""
+
+import unittest
+import sys
+import os
+import queue
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import AudioChunker, AudioChunk, StreamingTranscriber
+
+
+class TestAudioChunker(unittest.TestCase):
+    """Test suddivisione in chunk con sovrapposizione"""
+
+    def setUp(self):
+        # 10 campioni/s per test leggibili: chunk 1s, overlap 0.4s
+        self.chunker = AudioChunker(10, chunk_seconds=1.0, overlap_seconds=0.4)
+
+    def test_no_chunk_before_full(self):
+        """Test che nessun chunk venga emesso prima di chunk_len campioni"""
+        self.assertEqual(self.chunker.push(np.ones(9, dtype=np.float32)), [])
+
+    def test_chunks_overlap(self):
+        """Test offset e contenuto dei chunk sovrapposti"""
+        samples = np.arange(22, dtype=np.float32)
+        chunks = self.chunker.push(samples)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([c.offset for c in chunks], [0.0, 0.6, 1.2])
+        np.testing.assert_array_equal(chunks[0].audio, samples[0:10])
+        np.testing.assert_array_equal(chunks[1].audio, samples[6:16])
+        np.testing.assert_array_equal(chunks[2].audio, samples[12:22])
+
+    def test_push_in_small_blocks(self):
+        """Test che blocchi piccoli producano gli stessi chunk"""
+        samples = np.arange(22, dtype=np.float32)
+        chunks = []
+        for i in range(0, 22, 3):
+            chunks.extend(self.chunker.push(samples[i:i + 3]))
+
+        self.assertEqual(len(chunks), 3)
+        np.testing.assert_array_equal(chunks[2].audio, samples[12:22])
+
+    def test_keep_windows(self):
+        """Test finestre possedute: la sovrapposizione è assegnata a metà"""
+        chunks = self.chunker.push(np.zeros(16, dtype=np.float32))
+
+        self.assertEqual(chunks[0].keep_from, 0.0)
+        self.assertAlmostEqual(chunks[0].keep_to, 0.8)
+        self.assertAlmostEqual(chunks[1].keep_from, 0.2)
+
+    def test_flush_returns_tail(self):
+        """Test che flush() ritorni la coda non ancora coperta"""
+        self.chunker.push(np.arange(13, dtype=np.float32))
+        last = self.chunker.flush()
+
+        self.assertIsNotNone(last)
+        self.assertEqual(last.offset, 0.6)
+        self.assertEqual(len(last.audio), 7)
+        self.assertEqual(last.keep_to, float("inf"))
+
+    def test_flush_short_recording(self):
+        """Test registrazione più corta di un chunk"""
+        self.chunker.push(np.ones(4, dtype=np.float32))
+        last = self.chunker.flush()
+
+        self.assertEqual(last.offset, 0.0)
+        self.assertEqual(last.keep_from, 0.0)
+        self.assertEqual(len(last.audio), 4)
+
+    def test_flush_empty(self):
+        """Test flush senza campioni"""
+        self.assertIsNone(self.chunker.flush())
+
+    def test_invalid_overlap(self):
+        """Test che overlap >= chunk venga rifiutato"""
+        with self.assertRaises(ValueError):
+            AudioChunker(10, chunk_seconds=1.0, overlap_seconds=1.0)
+
+
+class FakeWhisperModel:
+    """Modello finto che ritorna segmenti fissi per ogni chunk"""
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    def transcribe(self, audio, language=None):
+        return {"text": "", "segments": self.segments}
+
+
+class TestStreamingTranscriber(unittest.TestCase):
+    """Test del consumer della trascrizione live"""
+
+    def test_overlap_segments_filtered(self):
+        """Test che i segmenti nella sovrapposizione vengano scartati"""
+        model = FakeWhisperModel([
+            {"start": 0.0, "end": 2.0, "text": " inizio"},
+            {"start": 2.0, "end": 28.0, "text": " centro"},
+            {"start": 29.0, "end": 30.0, "text": " coda"},
+        ])
+        transcriber = StreamingTranscriber(queue.Queue())
+        chunk = AudioChunk(np.zeros(16000, dtype=np.float32), 16000, 28.0, 1.5, 29.0)
+
+        segments = transcriber._chunk_segments(model, chunk)
+        self.assertEqual([segment.text for segment in segments], ["centro"])
+        # Tempi assoluti dall'inizio della registrazione
+        self.assertEqual((segments[0].start, segments[0].end), (30.0, 56.0))
+
+    def test_run_consumes_until_sentinel(self):
+        """Test che run() trascriva tutti i chunk fino al sentinel None"""
+        model = FakeWhisperModel([{"start": 0.0, "end": 1.0, "text": " ciao"}])
+        chunks = queue.Queue()
+        for offset in (0.0, 28.0):
+            chunks.put(AudioChunk(np.zeros(16000, dtype=np.float32), 16000, offset, 0.0, float("inf")))
+        chunks.put(None)
+
+        transcriber = StreamingTranscriber(chunks)
+        results = []
+        transcriber.finished.connect(results.append)
+        with mock.patch("recorder_app.get_whisper_model", return_value=model):
+            transcriber.run()
+
+        self.assertEqual(transcriber.texts, ["ciao", "ciao"])
+        self.assertEqual(results, ["ciao ciao"])
+
+    def test_own_instance_in_use_while_decoding(self):
+        """Test istanza Whisper propria della live, esclusa dall'eviction durante ogni chunk"""
+        key = recorder_app.whisper_model_key("base", instance=recorder_app.STREAM_WHISPER_INSTANCE)
+        guarded = []
+
+        class GuardedModel(FakeWhisperModel):
+            def transcribe(self, audio, language=None):
+                guarded.append(key in recorder_app._whisper_cache._in_use)
+                return super().transcribe(audio, language)
+
+        chunks = queue.Queue()
+        chunks.put(AudioChunk(np.zeros(16000, dtype=np.float32), 16000, 0.0, 0.0, float("inf")))
+        chunks.put(None)
+        transcriber = StreamingTranscriber(chunks, backend="openai-whisper")
+        with mock.patch("recorder_app.get_whisper_model",
+                        return_value=GuardedModel([{"start": 0.0, "end": 1.0, "text": " ciao"}])) as get_model:
+            transcriber.run()
+
+        self.assertEqual(guarded, [True])
+        self.assertTrue(all(call.kwargs["instance"] == recorder_app.STREAM_WHISPER_INSTANCE
+                            for call in get_model.call_args_list))
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioChunker))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingTranscriber))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
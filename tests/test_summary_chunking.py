@@ -0,0 +1,139 @@
+"""
+Test suite for summary map-reduce (split_transcript, summarize_transcript)
+"""
+
+import unittest
+import sys
+import os
+import json
+import threading
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import (split_transcript, estimate_tokens, merge_partial_summaries,
+                          summarize_transcript, CHARS_PER_TOKEN, NO_KEY_POINTS)
+
+
+class FakeHost:
+    """Host GPT4All finto: risponde con JSON e registra i prompt"""
+
+    def __init__(self):
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+            n = len(self.prompts)
+        if prompt.startswith("Queste sono le analisi parziali"):
+            return json.dumps({"summary": "finale", "key_points": ["kp finale"], "action_items": ["task"]})
+        return json.dumps({"summary": f"parte {n}", "key_points": [f"kp {n}"], "action_items": ["task"]})
+
+
+class TestSplitTranscript(unittest.TestCase):
+    """Test suddivisione della trascrizione per budget di token"""
+
+    def test_short_text_single_chunk(self):
+        """Test che un testo corto resti un solo chunk"""
+        self.assertEqual(split_transcript("Ciao. Come va?", max_tokens=100), ["Ciao. Come va?"])
+
+    def test_chunks_within_budget(self):
+        """Test che ogni chunk rispetti il budget"""
+        text = " ".join(f"Questa è la frase numero {i}." for i in range(200))
+        chunks = split_transcript(text, max_tokens=50)
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 50 * CHARS_PER_TOKEN)
+            # Confini di frase preservati
+            self.assertTrue(chunk.endswith("."))
+        self.assertEqual(" ".join(chunks), text)
+
+    def test_text_without_punctuation(self):
+        """Test trascrizione senza punteggiatura: taglio sulle parole"""
+        text = " ".join(["parola"] * 500)
+        chunks = split_transcript(text, max_tokens=20)
+
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk), 20 * CHARS_PER_TOKEN)
+        self.assertEqual(" ".join(chunks).split(), text.split())
+
+    def test_empty_text(self):
+        """Test trascrizione vuota"""
+        self.assertEqual(split_transcript(""), [])
+
+    def test_estimate_tokens(self):
+        """Test stima token proporzionale ai caratteri"""
+        self.assertLess(estimate_tokens("a" * 100), estimate_tokens("a" * 1000))
+
+
+class TestMergePartials(unittest.TestCase):
+    """Test unione deterministica delle analisi parziali"""
+
+    def test_dedupe(self):
+        """Test rimozione duplicati e placeholder"""
+        merged = merge_partial_summaries([
+            {"summary": "Uno.", "key_points": ["Budget", NO_KEY_POINTS], "action_items": ["Chiamare Mario"]},
+            {"summary": "Due.", "key_points": ["budget", "Scadenze"], "action_items": ["chiamare mario"]},
+        ])
+
+        self.assertEqual(merged["summary"], "Uno. Due.")
+        self.assertEqual(merged["key_points"], ["Budget", "Scadenze"])
+        self.assertEqual(merged["action_items"], ["Chiamare Mario"])
+
+
+class TestSummarizeTranscript(unittest.TestCase):
+    """Test pipeline di summary"""
+
+    def test_single_pass_for_short_transcript(self):
+        """Test che trascrizioni corte usino un solo prompt"""
+        host = FakeHost()
+        result = summarize_transcript("Riunione breve.", hosts=[host])
+
+        self.assertEqual(len(host.prompts), 1)
+        self.assertIn("Riunione breve.", host.prompts[0])
+        self.assertEqual(result["summary"], "parte 1")
+
+    def test_map_reduce_for_long_transcript(self):
+        """Test map su ogni chunk e reduce finale"""
+        host = FakeHost()
+        transcript = " ".join(f"Frase di prova numero {i} della riunione." for i in range(1000))
+        chunks = split_transcript(transcript)
+        result = summarize_transcript(transcript, hosts=[host])
+
+        map_prompts = [p for p in host.prompts if p.startswith("Analizza la parte")]
+        self.assertEqual(len(map_prompts), len(chunks))
+        self.assertTrue(host.prompts[-1].startswith("Queste sono le analisi parziali"))
+        self.assertEqual(result["summary"], "finale")
+        self.assertEqual(result["key_points"], ["kp finale"])
+
+    def test_parallel_hosts(self):
+        """Test che la fase map distribuisca i chunk tra più host"""
+        hosts = [FakeHost(), FakeHost()]
+        transcript = " ".join(f"Frase di prova numero {i} della riunione." for i in range(1000))
+        summarize_transcript(transcript, hosts=hosts)
+
+        self.assertTrue(all(h.prompts for h in hosts))
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSplitTranscript))
+    suite.addTests(loader.loadTestsFromTestCase(TestMergePartials))
+    suite.addTests(loader.loadTestsFromTestCase(TestSummarizeTranscript))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
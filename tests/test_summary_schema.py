@@ -0,0 +1,121 @@
+"""
+Test suite for validazione della risposta del summary (schema, stop anticipato, rigenerazione del campo)
+"""
+
+import unittest
+import sys
+import os
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import SummaryStreamParser, summarize_transcript, NO_KEY_POINTS
+
+
+class ScriptedHost:
+    """Host finto: risponde in streaming con le risposte date, in ordine, e conta i token generati"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.generated = []
+
+    def load(self):
+        pass
+
+    def generate(self, prompt, on_token=None, **kwargs):
+        self.prompts.append(prompt)
+        response = self.responses.pop(0)
+        tokens = [response[i:i + 4] for i in range(0, len(response), 4)]
+        output = []
+        for token in tokens:
+            output.append(token)
+            if on_token is not None and on_token(token):
+                break
+        self.generated.append(len(output))
+        return "".join(output)
+
+
+class TestSchemaAcceptor(unittest.TestCase):
+    """Test validazione incrementale sullo schema"""
+
+    def test_wrong_type_marked_failed(self):
+        """Test campo con tipo sbagliato non accettato, gli altri sì"""
+        parser = SummaryStreamParser()
+        parser.feed('{"summary": "ok", "key_points": "non è una lista", "action_items": [], "extra": 1}')
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.failed, ["key_points"])
+        self.assertEqual(parser.missing(), ["key_points"])
+        self.assertEqual(parser.fields, {"summary": "ok", "action_items": []})
+
+    def test_preamble_rejected(self):
+        """Test risposta scartata se il JSON non inizia entro max_preamble caratteri"""
+        parser = SummaryStreamParser(max_preamble=20)
+        parser.feed("Certo! Ecco un'analisi dettagliata della riunione: ")
+        self.assertTrue(parser.rejected)
+        self.assertTrue(parser.stopped)
+
+    def test_malformed_member_rejected(self):
+        """Test campo non JSON: risposta scartata, campi precedenti conservati"""
+        parser = SummaryStreamParser()
+        parser.feed('{"summary": "ok", "key_points": [punto uno], "action_items": []}')
+        self.assertTrue(parser.rejected)
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.missing(), ["key_points", "action_items"])
+
+
+class TestFieldRetry(unittest.TestCase):
+    """Test rigenerazione dei soli campi non validi"""
+
+    def test_only_failed_field_regenerated(self):
+        """Test che il nuovo tentativo continui il JSON dai campi già accettati"""
+        host = ScriptedHost('{"summary": "Riunione breve", "key_points": 3, "action_items": ["task"]}',
+                            '["Budget approvato", "Nuove assunzioni"], "action_items": ["altro"]} e poi testo extra')
+        result = summarize_transcript("Riunione breve.", hosts=[host])
+
+        self.assertEqual(result, {"summary": "Riunione breve", "key_points": ["Budget approvato", "Nuove assunzioni"],
+                                  "action_items": ["task"]})
+        self.assertEqual(len(host.prompts), 2)
+        retry_prompt = host.prompts[1]
+        self.assertTrue(retry_prompt.startswith(host.prompts[0]))
+        self.assertTrue(retry_prompt.endswith('{"summary": "Riunione breve", "action_items": ["task"], "key_points": '))
+        # Fermato alla virgola dopo il valore
+        self.assertEqual(host.generated[1], len('["Budget approvato", "Nuove assunzioni"],') // 4 + 1)
+
+    def test_chatter_stops_generation(self):
+        """Test stop anticipato sul testo prima del JSON e campi rigenerati uno alla volta"""
+        chatter = "Certamente, ecco l'analisi della trascrizione richiesta. " * 20
+        host = ScriptedHost(chatter + '{"summary": "tardi"}',
+                            '"Sintesi", "key_points": [',
+                            '["kp"]}',
+                            '[]}')
+        result = summarize_transcript("Riunione breve.", hosts=[host])
+
+        self.assertLess(host.generated[0] * 4, len(chatter))
+        self.assertEqual(result, {"summary": "Sintesi", "key_points": ["kp"], "action_items": []})
+        self.assertEqual(len(host.prompts), 4)
+
+    def test_fallback_when_retry_fails(self):
+        """Test parsing tradizionale se anche il nuovo tentativo non è valido"""
+        host = ScriptedHost('{"summary": "ok", "key_points": 1, "action_items": []}', 'niente JSON qui')
+        result = summarize_transcript("Riunione breve.", hosts=[host])
+        self.assertEqual(result["summary"], "ok")
+        self.assertEqual(result["key_points"], [NO_KEY_POINTS])
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSchemaAcceptor))
+    suite.addTests(loader.loadTestsFromTestCase(TestFieldRetry))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,121 @@
+"""
+Test suite for streaming dei token GPT4All (SummaryStreamParser, stop alla graffa finale)
+"""
+
+import unittest
+import sys
+import os
+import json
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recorder_app import LLMHost, SummaryStreamParser, summarize_transcript
+
+RESPONSE = json.dumps({
+    "summary": "Riunione sul budget {Q3}, con \"virgolette\", e virgole",
+    "key_points": ["Budget approvato", "Nuovo [piano]"],
+    "action_items": [],
+})
+
+
+def tokens(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamingGPT:
+    """GPT4All finto: genera token finché la callback lo consente"""
+
+    def __init__(self, text=RESPONSE + "\n\nEcco il riepilogo richiesto. " * 20):
+        self.tokens = tokens(text)
+        self.generated = 0
+
+    def generate(self, prompt, streaming=False, callback=None, **kwargs):
+        for token in self.tokens:
+            if callback is not None and not callback(0, token):
+                return
+            self.generated += 1
+            yield token
+
+
+class TestSummaryStreamParser(unittest.TestCase):
+    """Test parsing incrementale del JSON"""
+
+    def test_fields_completed_in_order(self):
+        """Test campi completati uno alla volta, ignorando virgole e graffe nelle stringhe"""
+        parser = SummaryStreamParser()
+        completed = []
+        for token in tokens(RESPONSE):
+            completed += parser.feed(token)
+
+        self.assertEqual(completed, ["summary", "key_points", "action_items"])
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.partial()["summary"], json.loads(RESPONSE)["summary"])
+        self.assertEqual(parser.partial()["key_points"], ["Budget approvato", "Nuovo [piano]"])
+
+    def test_partial_before_closing_brace(self):
+        """Test campo disponibile appena arriva la virgola che lo segue"""
+        parser = SummaryStreamParser()
+        self.assertEqual(parser.feed('Ecco: {"summary": "Breve'), [])
+        self.assertEqual(parser.feed(' riunione", "key_points": ["a"'), ["summary"])
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.partial(), {"summary": "Breve riunione"})
+
+    def test_escaped_quote(self):
+        """Test virgolette escapate dentro una stringa"""
+        parser = SummaryStreamParser()
+        parser.feed('{"summary": "dice \\"fine}\\", poi", "action_items": []}')
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.fields["summary"], 'dice "fine}", poi')
+
+
+class TestEarlyStop(unittest.TestCase):
+    """Test interruzione della generazione alla graffa finale"""
+
+    def test_generation_stops_at_closing_brace(self):
+        """Test che i token dopo la chiusura del JSON non vengano generati"""
+        model = StreamingGPT()
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=lambda: model)
+        received = []
+        partials = []
+        result = summarize_transcript("Breve trascrizione della riunione.", hosts=[host],
+                                      on_token=received.append, on_partial=partials.append)
+
+        self.assertEqual(result["summary"], json.loads(RESPONSE)["summary"])
+        self.assertEqual(result["action_items"], [])
+        # Si ferma al token che contiene la graffa finale
+        self.assertTrue("".join(received).startswith(RESPONSE))
+        self.assertEqual(model.generated, len(received))
+        self.assertLess(model.generated, len(model.tokens))
+        self.assertEqual([list(partial) for partial in partials],
+                         [["summary"], ["summary", "key_points"], ["summary", "key_points", "action_items"]])
+
+    def test_non_streaming_model(self):
+        """Test modello che ritorna la risposta intera in una volta"""
+        class PlainGPT:
+            def generate(self, prompt, **kwargs):
+                return RESPONSE
+
+        host = LLMHost("fake.gguf", idle_timeout=0, factory=PlainGPT)
+        partials = []
+        result = summarize_transcript("Breve trascrizione.", hosts=[host], on_partial=partials.append)
+        self.assertEqual(result["key_points"], ["Budget approvato", "Nuovo [piano]"])
+        self.assertEqual(len(partials), 1)
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestSummaryStreamParser))
+    suite.addTests(loader.loadTestsFromTestCase(TestEarlyStop))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())
@@ -0,0 +1,186 @@
+"""
+Test suite for VoiceActivityGate and TimeMap
+"""
+
+import unittest
+import sys
+import os
+import queue
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Aggiungi parent directory al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recorder_app
+from recorder_app import (VoiceActivityGate, TimeMap, AudioRecorder, ResultCache, StreamingTranscriber,
+                          TranscriptionWorker)
+from tests.fake_pyaudio import FakePyAudio
+
+RATE = 16000
+BLOCK = 1024
+
+
+def tone_blocks(seconds, amplitude=8000):
+    """Blocchi int16 di un tono a 440 Hz (parlato simulato)"""
+    n = int(seconds * RATE) // BLOCK
+    t = np.arange(n * BLOCK) / RATE
+    samples = (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    return [samples[i:i + BLOCK].tobytes() for i in range(0, len(samples), BLOCK)]
+
+
+def silence_blocks(seconds, amplitude=20):
+    """Blocchi int16 di rumore di fondo debole"""
+    n = int(seconds * RATE) // BLOCK
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, amplitude, n * BLOCK).astype(np.int16)
+    return [samples[i:i + BLOCK].tobytes() for i in range(0, len(samples), BLOCK)]
+
+
+def run_gate(gate, blocks):
+    out = []
+    for block in blocks:
+        out.extend(gate.process(block))
+    return out
+
+
+class TestVoiceActivityGate(unittest.TestCase):
+    """Test rimozione silenzi"""
+
+    def test_long_silence_dropped(self):
+        """Test che un silenzio lungo venga compresso"""
+        gate = VoiceActivityGate(RATE)
+        blocks = tone_blocks(2) + silence_blocks(10) + tone_blocks(2)
+        out = run_gate(gate, blocks)
+
+        out_seconds = sum(len(b) for b in out) / 2 / RATE
+        self.assertLess(out_seconds, 6)
+        self.assertGreater(gate.dropped_seconds, 8)
+
+    def test_speech_preserved(self):
+        """Test che tutti i blocchi di parlato vengano scritti"""
+        gate = VoiceActivityGate(RATE)
+        speech = tone_blocks(1)
+        out = run_gate(gate, silence_blocks(5) + speech + silence_blocks(5) + speech)
+
+        for block in speech:
+            self.assertIn(block, out)
+
+    def test_short_pause_kept(self):
+        """Test che le pause brevi restino nell'audio"""
+        gate = VoiceActivityGate(RATE, keep_silence_seconds=0.5)
+        blocks = tone_blocks(1) + silence_blocks(0.3) + tone_blocks(1)
+        out = run_gate(gate, blocks)
+
+        self.assertEqual(len(out), len(blocks))
+        self.assertEqual(gate.dropped_seconds, 0)
+
+    def test_time_map_points_back_to_original(self):
+        """Test che la TimeMap riporti il parlato al tempo originale"""
+        gate = VoiceActivityGate(RATE)
+        before = tone_blocks(2) + silence_blocks(10)
+        run_gate(gate, before)
+        resume_output = gate.output_samples
+        run_gate(gate, tone_blocks(2))
+
+        # Il parlato ripreso (dopo il pre-roll) corrisponde a ~12s dall'inizio
+        original = gate.time_map.to_input_seconds(resume_output / RATE)
+        self.assertAlmostEqual(original, len(before) * BLOCK / RATE, delta=0.5)
+        # Prima della compressione i tempi coincidono
+        self.assertAlmostEqual(gate.time_map.to_input_seconds(1.0), 1.0)
+
+
+class TestTimeMap(unittest.TestCase):
+    """Test persistenza della TimeMap"""
+
+    def test_save_load_roundtrip(self):
+        """Test salvataggio e caricamento"""
+        time_map = TimeMap(RATE, datetime(2025, 1, 1, 10, 0, 0))
+        time_map.add(RATE * 5, RATE * 20)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "map.json")
+            time_map.save(path)
+            loaded = TimeMap.load(path)
+
+        self.assertEqual(loaded.entries, [(0, 0), (RATE * 5, RATE * 20)])
+        self.assertEqual(loaded.to_input_seconds(6), 21)
+        self.assertEqual(loaded.to_wall_clock(6), datetime(2025, 1, 1, 10, 0, 21))
+
+
+class FakeWhisperModel:
+    """Un segmento a 0.1 s dall'inizio dell'audio ricevuto e uno a 0.1 s dal tempo indicato"""
+
+    def __init__(self, resume_seconds):
+        self.resume_seconds = resume_seconds
+
+    def transcribe(self, audio, language=None, **kwargs):
+        segments = [{"start": 0.1, "end": 0.5, "text": " prima"},
+                    {"start": self.resume_seconds + 0.1, "end": self.resume_seconds + 0.5, "text": " dopo"}]
+        return {"text": " prima dopo", "segments": segments}
+
+
+class TestVadTimestamps(unittest.TestCase):
+    """Test timestamp riportati alla registrazione con VAD in memoria e nella trascrizione live"""
+
+    def setUp(self):
+        self.blocks = tone_blocks(1) + silence_blocks(5) + tone_blocks(1)
+        chunks = queue.Queue()
+        self.recorder = AudioRecorder(device_index=0, vad=True, in_memory=True, chunk_queue=chunks)
+        buffers = []
+        self.recorder.buffer_ready.connect(buffers.append)
+        with mock.patch.object(recorder_app.pyaudio, "PyAudio", lambda: FakePyAudio(self.recorder, self.blocks)):
+            self.recorder.run()
+        self.buffer = buffers[0]
+        self.addCleanup(self.buffer.close)
+        self.chunks = [chunk for chunk in iter(chunks.get_nowait, None)]
+        # Ripresa del parlato: tempo nell'audio compresso e nella registrazione originale
+        resume_output, resume_input = self.buffer.time_map.entries[-1]
+        self.resume = resume_output / RATE
+        self.original = resume_input / RATE
+
+    def test_in_memory_segments_mapped(self):
+        """Test segmenti di una registrazione in memoria con VAD nei tempi della registrazione"""
+        self.assertLess(self.buffer.duration, len(self.blocks) * BLOCK / RATE - 3)
+        worker = TranscriptionWorker(self.buffer)
+        received = []
+        worker.segments_ready.connect(received.extend)
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("recorder_app.get_whisper_model", return_value=FakeWhisperModel(self.resume)), \
+                mock.patch.object(recorder_app, "result_cache", ResultCache(Path(tmp), max_bytes=0)):
+            worker.run()
+
+        self.assertEqual([segment.start for segment in received], [0.1, round(self.original + 0.1, 2)])
+        self.assertGreater(received[1].start, 4.0)
+
+    def test_live_chunk_segments_mapped(self):
+        """Test segmenti della trascrizione live con VAD nei tempi della registrazione"""
+        self.assertEqual(len(self.chunks), 1)
+        self.assertIs(self.chunks[0].time_map, self.recorder.vad_gate.time_map)
+        segments = StreamingTranscriber(queue.Queue())._chunk_segments(FakeWhisperModel(self.resume),
+                                                                       self.chunks[0])
+
+        self.assertEqual([segment.start for segment in segments], [0.1, round(self.original + 0.1, 2)])
+
+
+def run_tests():
+    """Esegue tutti i test"""
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+
+    suite.addTests(loader.loadTestsFromTestCase(TestVoiceActivityGate))
+    suite.addTests(loader.loadTestsFromTestCase(TestTimeMap))
+    suite.addTests(loader.loadTestsFromTestCase(TestVadTimestamps))
+
+    runner = unittest.TextTestRunner(verbosity=2)
+    result = runner.run(suite)
+
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_tests())